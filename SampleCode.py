@@ -41,34 +41,50 @@
 
 # And I validate the PDF document "UMS025"
 
-import pdfplumber
 import sys
 import re
 import json
 import os
-from pypdf import PdfReader
-from pypdf.errors import PdfReadError
 from datetime import datetime
-from RL_valid_pdf.json_work.extract_to_json import extract_pdf_lines_layout
-
-def extract_pdf_to_json(pdf_path):
-    """Extract all PDF data into a structured JSON object (plus layout)."""
-    pdf_data = {
-        "filename": os.path.basename(pdf_path),
-        "extraction_date": datetime.now().isoformat(),
-        "tables": [],
-        "layout": extract_pdf_lines_layout(pdf_path)
-    }
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables()
+from multi_match import MultiPatternMatcher
+from normalise import Normaliser
+from section_index import FULL, index_from_extraction
+from json_work.python_files.document_session import open_session
+from json_work.python_files.lazy_document import resolve_pages
+from validation_spec import load_spec
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs", "UMS025_P45.json")
+
+def extract_pdf_to_json(pdf_path, pages=None):
+    """Extract all PDF data into a structured JSON object (plus layout).
+
+    pdf_path may also be an open DocumentSession; the layout and the tables
+    are read from the same parsed document.
+    pages: optional 1-based page numbers to scan for tables (negative counts
+    from the end); other pages are never parsed.
+    """
+    session = open_session(pdf_path)
+    try:
+        pdf_data = {
+            "filename": os.path.basename(str(session.path or pdf_path)),
+            "extraction_date": datetime.now().isoformat(),
+            "tables": [],
+            "layout": session.lines_layout()
+        }
+
+        for index in resolve_pages(pages, len(session)):
+            page_num = index + 1
+            tables = session.tables(index)
+            session.release(index)
             if tables:
                 for table in tables:
                     pdf_data["tables"].append({
                         "page": page_num,
                         "data": table
                     })
+    finally:
+        if session is not pdf_path:
+            session.close()
 
     return pdf_data
 
@@ -87,10 +103,21 @@ def load_json(filename):
     return None
 
 def validate_pdf(fulltext, pdf_path):
-    """Validate file is readable PDF and has content"""
+    """Validate file is readable PDF and has content
+
+    pdf_path may also be the DocumentSession used for extraction, so the
+    check reuses its parsed document instead of reading the file again.
+    """
+    try:
+        session = open_session(pdf_path)
+    except OSError:
+        session = None
     try:
-        PdfReader(pdf_path)
-    except PdfReadError:
+        valid = session is not None and session.is_valid()
+    finally:
+        if session is not None and session is not pdf_path:
+            session.close()
+    if not valid:
         print("Invalid PDF file", file=sys.stderr)
         return False
 
@@ -100,30 +127,43 @@ def validate_pdf(fulltext, pdf_path):
         print("No data found in PDF extraction", file=sys.stderr)
         return False
     
-def validate_p45(fulltext, expected_values):
-    """Validate P45 section contains expected fields and values"""
+def _matcher(expected_values, normaliser=None):
+    """One matcher over the values, normalised like the index text if given"""
+    return MultiPatternMatcher(normaliser.values(expected_values) if normaliser else expected_values)
+
+def validate_p45(index, expected_values, section="p45", normaliser=None):
+    """Validate P45 section contains expected fields and values
+
+    index is the document's SectionIndex; values are matched in one pass over
+    the full text and count when they lie inside the section. With a
+    normaliser, index is over the normalised text and messages keep the
+    values as written in the spec.
+    """
     validations = {}
-    
+    hits = index.presence(_matcher(expected_values, normaliser), [section])
+
     for key, value in expected_values.items():
-        result = validate_field(key, value, fulltext)
-        validations.update(result)
-    
+        if section in hits.get(key, ()) or value == "":
+            validations[key] = "PASS, is valid"
+        else:
+            validations[key] = f"FAIL — Expected '{value}'"
+
     return validations
 
-def validate_field(label, expected, text):
-    if expected in text:
-        return {label: "PASS, is valid"}
-    else:
-        return {label: f"FAIL — Expected '{expected}'"}
-    
-def cross_validate(full_text, p45_text, expected_values):
+def section_presence(index, expected_values, section="p45", normaliser=None):
+    """(in full document, in section) per key, from a single match pass"""
+    hits = index.presence(_matcher(expected_values, normaliser), [section])
+    presence = {}
+    for key, value in expected_values.items():
+        where = hits.get(key, set()) if value else {FULL, section}
+        presence[key] = (FULL in where, section in where)
+    return presence
+
+def cross_validate(index, expected_values, section="p45", normaliser=None):
     """Ensure P45 values match the rest of the PDF"""
     mismatches = {}
     
-    for key, value in expected_values.items():
-        in_full = value in full_text
-        in_p45 = value in p45_text
-        
+    for key, (in_full, in_p45) in section_presence(index, expected_values, section, normaliser).items():
         if in_full != in_p45:
             mismatches[key] = f"Mismatch - Full doc: {in_full}, P45: {in_p45}"
         if in_full and not in_p45:
@@ -181,65 +221,50 @@ def main():
 
     # Source-of-truth text from JSON
     full_text = pdf_data.get("full_document", "") or ""
-    p45_text = pdf_data.get("p45_section", "") or ""
-    pre5_text = pdf_data.get("pre5_section", "") or ""
 
     # Basic sanity check
-    if not (full_text.strip() or p45_text.strip()):
+    if not full_text.strip():
         print(json.dumps({"PDF Validation": "FAIL - empty JSON content"}))
         return
 
-    # --- Test definitions (adjust values as needed) ---
-    expected_p45values = {
-        "NI Number": "WM764243B",
-        "Title": "MR",
-        "Surname": "UATJMFC",
-        "First Name": "TDMJMFC",
-        "Leaving Date": "27 11 2025",
-        "Tax Code": "1250L",
-        "Total Pay to Date": "193,164.73",
-        "Total Tax to Date": "85,305.15",
-        "Date of Birth": "01 01 1995",
-        "Address": "AVENUE STREET",
-        "Postcode": "W2 4BA",
-        "Month Number": "8"
-    }
+    # --- Test definitions (specs/UMS025_P45.json) ---
+    spec = load_spec(SPEC_PATH)
+    spec_sections = spec["sections"]
+    sections = {s["name"]: s for s in spec_sections}
+    expected_p45values = sections["p45"]["expected_values"]
+    Additional_Validations = sections["pre5"]["contains"]
+    expected_comparisons = sections["p45"]["cross_check"]
 
-    Additional_Validations = [
-        "26 November 2025",
-        "Plan Value: £190,664.73",
-        "Cash Withdrawal: £190,664.73",
-        "Plan value after withdrawal: £0.00",
-        "Customer ID: 7700049486",
-        "Pension Plan: 1000059054L",
-    ]
-
-    expected_comparisons = {
-        "NI Number": "WM764243B",
-        "Title": "MR",
-        "First Name": "TDMJMFC",
-        "Surname": "UATJMFC",
-        "Leaving Date": "27 11 2025",
-        "Tax Code": "1250L",
-        "Address": "AVENUE STREET",
-        "Postcode": "W2 4BA",
-        "Date": "29 11 2025"
-    }
+    # Sections are offsets into full_text (section_index in the JSON), not copies
+    try:
+        index = index_from_extraction(pdf_data, spec_sections)
+    except ValueError as e:
+        print(f"ERROR: {json_filename}: {e}", file=sys.stderr)
+        sys.exit(2)
+    for name in ("p45", "pre5"):
+        if name in index.unplaced:
+            print(f"ERROR: section '{name}' cannot be located in {json_filename}; its checks fail", file=sys.stderr)
+
+    # The spec's normalisation (case, whitespace, amounts, dates) is applied to
+    # the text once; sections keep their spans through the offset map
+    normaliser = Normaliser.from_options(spec.get("normalisation"))
+    if normaliser.active:
+        normalised = normaliser.apply(full_text)
+        index = index.remapped(normalised.text, normalised.to_normalised)
 
     # --- Run validations ---
     # Validate only P45 area (pages after 5)
-    p45_validations = validate_p45(p45_text, expected_p45values)
+    p45_validations = validate_p45(index, expected_p45values, "p45", normaliser)
 
     # Validate additional values expected on pages 1-5
     pre5_validations = {}
     for val in Additional_Validations:
-        pre5_validations[val] = "PASS, is valid" if val in pre5_text else f"FAIL — Expected '{val}' on pages 1-5"
+        pre5_validations[val] = "PASS, is valid" if index.contains(normaliser.value(val), "pre5") else f"FAIL — Expected '{val}' on pages 1-5"
 
     # Compare expected keys between full PDF and P45
     comparison_validations = {}
-    for key, val in expected_comparisons.items():
-        in_full = val in full_text
-        in_p45 = val in p45_text
+    for key, (in_full, in_p45) in section_presence(index, expected_comparisons, "p45", normaliser).items():
+        val = expected_comparisons[key]
         if in_full and in_p45:
             comparison_validations[key] = "PASS, present in both full PDF and P45"
         elif in_full and not in_p45:
@@ -0,0 +1,337 @@
+# batch.py
+# Batch orchestrator: validate a directory (or glob) of PDFs across a process pool.
+# Each document runs the same template -> extraction -> validation steps as main.py,
+# but results are returned per document instead of exiting.
+# With --manifest, documents and their expected values are streamed from a CSV/Parquet
+# file and validated against one compiled spec (--spec).
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from extraction_cache import DEFAULT_CACHE_DIR, open_cache
+from main import _ensure_template, _resolve_paths, validate_document
+from validation_spec import MANIFEST_PDF_COLUMN, iter_manifest, load_plan
+
+from json_work.python_files.extract_backends import BACKENDS, DEFAULT_BACKEND
+from json_work.python_files.pdf_input import collect_pdfs
+from json_work.python_files.template_registry import load_registry
+
+
+def _prepare_templates(pdfs: List[Path], registry_path: Optional[str] = None) -> None:
+    # Build missing templates once per doc type in the parent, so workers never
+    # race to write the same template file. Doc types in the registry need none.
+    registry = load_registry(registry_path) if registry_path else None
+    seen = set()
+    for pdf in pdfs:
+        _, tpl_path, _, boxes_pdf, _ = _resolve_paths(str(pdf))
+        if tpl_path in seen:
+            continue
+        seen.add(tpl_path)
+        _ensure_template(tpl_path, boxes_pdf, verbose=False, registry=registry, doc_type=pdf.stem)
+
+
+def _output_paths(pdfs: List[Path]) -> List[Optional[str]]:
+    # Extraction JSON is named after the PDF stem; when two inputs share a stem,
+    # give each its own file so concurrent workers never write the same path.
+    stems = {}
+    for pdf in pdfs:
+        stems[pdf.stem] = stems.get(pdf.stem, 0) + 1
+
+    outs = []
+    for pdf in pdfs:
+        if stems[pdf.stem] == 1:
+            outs.append(None)
+            continue
+        _, _, first_half_json, _, _ = _resolve_paths(str(pdf))
+        tag = hashlib.sha1(str(pdf).encode("utf-8")).hexdigest()[:8]
+        outs.append(str(first_half_json.with_name(f"{pdf.stem}.{tag}.first_half.json")))
+    return outs
+
+
+def _validate_one(task: tuple) -> dict:
+    # Worker entry point: never raises, so one bad PDF cannot sink the batch.
+    # The spec, the template registry and the extraction cache are opened once per
+    # worker process (load_plan, load_registry and open_cache keep them).
+    # options: cache_dir, spec_path, state_dir, backend, registry, columnar and stream,
+    # shared by every task of a run.
+    pdf_path, out_json, overrides, doc_type, options = task
+    cache_dir, spec_path, state_dir = options["cache_dir"], options["spec_path"], options["state_dir"]
+    try:
+        return validate_document(
+            pdf_path,
+            verbose=False,
+            out_json=Path(out_json) if out_json else None,
+            cache_dir=Path(cache_dir) if cache_dir else None,
+            cache=open_cache(cache_dir) if cache_dir else None,
+            plan=load_plan(spec_path) if spec_path else None,
+            overrides=overrides,
+            doc_type=doc_type,
+            state_dir=Path(state_dir) if state_dir else None,
+            backend=options["backend"],
+            registry=load_registry(options["registry"]) if options["registry"] else None,
+            columnar=options["columnar"],
+            stream=options["stream"]
+        )
+    except Exception as e:
+        return {
+            "pdf": pdf_path,
+            "exit_code": 2,
+            "checks": [],
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+        }
+
+
+def _task_options(
+    cache_dir: Optional[Path],
+    spec_path: Optional[str],
+    state_dir: Optional[Path],
+    backend: str = DEFAULT_BACKEND,
+    registry_path: Optional[str] = None,
+    columnar: bool = False,
+    stream: bool = False
+) -> dict:
+    return {
+        "cache_dir": str(cache_dir) if cache_dir is not None else None,
+        "spec_path": spec_path,
+        "state_dir": str(state_dir) if state_dir is not None else None,
+        "backend": backend,
+        "registry": registry_path,
+        "columnar": columnar,
+        "stream": stream,
+    }
+
+
+def run_batch(
+    pdfs: List[Path],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+    spec_path: Optional[str] = None,
+    state_dir: Optional[Path] = None,
+    backend: str = DEFAULT_BACKEND,
+    registry_path: Optional[str] = None,
+    columnar: bool = False,
+    stream: bool = False
+) -> List[dict]:
+    # Validate every PDF and return per-document results in input order.
+    if not pdfs:
+        return []
+    _prepare_templates(pdfs, registry_path)
+
+    options = _task_options(cache_dir, spec_path, state_dir, backend, registry_path, columnar, stream)
+    args = [(str(p), out, None, None, options) for p, out in zip(pdfs, _output_paths(pdfs))]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [_validate_one(a) for a in args]
+
+    # Batch several documents per task to keep IPC overhead low on large runs.
+    chunksize = chunksize or max(1, min(32, len(args) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_validate_one, args, chunksize=chunksize))
+
+
+def _manifest_tasks(manifest: Path, options: dict) -> Iterator[tuple]:
+    # One task per manifest row. Relative PDF paths are taken from the manifest's
+    # folder; templates are built in the parent the first time a doc type appears,
+    # and repeated stems get their own output file, as in _output_paths.
+    templates = set()
+    stems = set()
+    registry = load_registry(options["registry"]) if options["registry"] else None
+    for row in iter_manifest(manifest):
+        pdf = Path(row[MANIFEST_PDF_COLUMN])
+        if not pdf.is_absolute():
+            pdf = manifest.parent / pdf
+        pdf = pdf.resolve()
+        doc_type = row.get("doc_type") or None
+
+        _, tpl_path, first_half_json, boxes_pdf, _ = _resolve_paths(str(pdf), doc_type)
+        if tpl_path not in templates:
+            templates.add(tpl_path)
+            _ensure_template(tpl_path, boxes_pdf, verbose=False, registry=registry, doc_type=doc_type or pdf.stem)
+
+        out = None
+        if first_half_json in stems:
+            tag = hashlib.sha1(str(pdf).encode("utf-8")).hexdigest()[:8]
+            out = str(first_half_json.with_name(first_half_json.name.replace(".first_half.json", f".{tag}.first_half.json")))
+        stems.add(first_half_json)
+        yield str(pdf), out, row, doc_type, options
+
+
+def run_manifest(
+    manifest: Path,
+    workers: Optional[int] = None,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+    spec_path: Optional[str] = None,
+    max_pending: Optional[int] = None,
+    state_dir: Optional[Path] = None,
+    backend: str = DEFAULT_BACKEND,
+    registry_path: Optional[str] = None,
+    columnar: bool = False,
+    stream: bool = False
+) -> Iterator[dict]:
+    # Stream a manifest through the pool, yielding results in row order. At most
+    # max_pending rows are in flight, so memory stays flat on very large manifests.
+    workers = workers or os.cpu_count() or 1
+    options = _task_options(cache_dir, spec_path, state_dir, backend, registry_path, columnar, stream)
+    tasks = _manifest_tasks(Path(manifest), options)
+    if workers == 1:
+        for task in tasks:
+            yield _validate_one(task)
+        return
+
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_validate_one, task))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class BatchSummary:
+    # Running totals for the summary, fed one result at a time so a streamed
+    # manifest never holds its results; only failing documents keep a line.
+
+    def __init__(self):
+        self.documents = self.passed = 0
+        self.hits = self.misses = self.reused = self.evaluated = 0
+        self.exit_code = 0
+        self.failed: List[str] = []
+        self.errors: List[str] = []
+
+    def add(self, r: dict) -> None:
+        code = r.get("exit_code", 2)
+        self.documents += 1
+        self.exit_code = max(self.exit_code, code)
+        self.hits += r.get("cache", {}).get("hits", 0)
+        self.misses += r.get("cache", {}).get("misses", 0)
+        self.reused += r.get("incremental", {}).get("reused", 0)
+        self.evaluated += r.get("incremental", {}).get("evaluated", 0)
+        if code == 0:
+            self.passed += 1
+        elif code == 1:
+            names = [c.get("name", "unknown_check") for c in r.get("checks", []) if not c.get("pass")]
+            detail = ", ".join(names) if names else (r.get("error") or "FAIL")
+            self.failed.append(f"  {r['pdf']}: {detail}")
+        else:
+            self.errors.append(f"  {r['pdf']}: {r.get('error') or 'unknown error'}")
+
+    def format(self) -> str:
+        out = ["\nBATCH VALIDATION SUMMARY", "-" * 60]
+        out.append(f"Documents: {self.documents}  Passed: {self.passed}  Failed: {len(self.failed)}  "
+                   f"Errors: {len(self.errors)}")
+        if self.hits or self.misses:
+            out.append(f"Extraction cache: {self.hits} hits, {self.misses} misses")
+        if self.reused or self.evaluated:
+            out.append(f"Incremental: {self.reused} checks reused, {self.evaluated} evaluated")
+
+        if self.failed:
+            out.append("\nFAILED:")
+            out.extend(self.failed)
+        if self.errors:
+            out.append("\nERRORS:")
+            out.extend(self.errors)
+
+        out.append("-" * 60 + "\n")
+        return "\n".join(out)
+
+
+class ResultsWriter:
+    # Writes {"results": [...]} one result at a time, as they arrive.
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._f = self.path.open("w", encoding="utf-8")
+        self._f.write('{"results": [')
+        self._count = 0
+
+    def write(self, result: dict) -> None:
+        self._f.write(",\n" if self._count else "\n")
+        self._f.write(json.dumps(result, indent=2))
+        self._count += 1
+
+    def close(self) -> None:
+        self._f.write("\n]}\n")
+        self._f.close()
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Validate many PDFs (directory, glob or files) with a process pool.")
+    ap.add_argument("targets", nargs="*", help="PDF files, directories or glob patterns")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ap.add_argument("--chunksize", type=int, default=None, help="Documents per worker task")
+    ap.add_argument("--json", dest="json_out", help="Write per-document results to this JSON file")
+    ap.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Extraction cache directory")
+    ap.add_argument("--no-cache", action="store_true", help="Always re-extract")
+    ap.add_argument("--spec", help="Validation spec (JSON/YAML) used for every document")
+    ap.add_argument("--manifest", help="CSV/Parquet manifest: a 'pdf' column plus per-document expected values")
+    ap.add_argument("--state-dir", help="Incremental mode: only re-evaluate checks whose inputs changed")
+    ap.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                    help="Text extraction backend for every document")
+    ap.add_argument("--registry", help="Template registry file; loaded once per worker")
+    ap.add_argument("--columnar", action="store_true", help="Store extractions as .cols files instead of JSON")
+    ap.add_argument("--stream", action="store_true",
+                    help="Extract to NDJSON and write each document's checks as they complete (see main.py)")
+    args = ap.parse_args()
+    if args.stream and (args.state_dir or args.columnar):
+        ap.error("--stream cannot be combined with --state-dir or --columnar")
+
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    spec_path = str(Path(args.spec).resolve()) if args.spec else None
+    state_dir = Path(args.state_dir).resolve() if args.state_dir else None
+    registry_path = str(Path(args.registry).resolve()) if args.registry else None
+    if spec_path:
+        load_plan(spec_path)  # fail fast on a bad spec, before any worker starts
+
+    if args.manifest:
+        results = run_manifest(Path(args.manifest), workers=args.workers,
+                               cache_dir=cache_dir, spec_path=spec_path, state_dir=state_dir,
+                               backend=args.backend, registry_path=registry_path,
+                               columnar=args.columnar, stream=args.stream)
+    else:
+        pdfs = collect_pdfs(args.targets)
+        if not pdfs:
+            print("[ERROR] No PDFs matched the given targets", file=sys.stderr)
+            sys.exit(2)
+        results = run_batch(pdfs, workers=args.workers, chunksize=args.chunksize,
+                            cache_dir=cache_dir, spec_path=spec_path, state_dir=state_dir,
+                            backend=args.backend, registry_path=registry_path, columnar=args.columnar,
+                            stream=args.stream)
+
+    # Results are summarised and written as they arrive; none are kept.
+    summary = BatchSummary()
+    writer = ResultsWriter(args.json_out) if args.json_out else None
+    try:
+        for r in results:
+            summary.add(r)
+            if writer is not None:
+                writer.write(r)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(summary.format())
+    if writer is not None:
+        print(f"[OK] Wrote batch results to: {args.json_out}")
+
+    sys.exit(summary.exit_code)
+
+
+if __name__ == "__main__":
+    main()
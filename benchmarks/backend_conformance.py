@@ -0,0 +1,132 @@
+# backend_conformance.py
+# Run both extraction backends over one PDF and show where they differ: box
+# texts, full text (line diff), per-page text of the simple extractor, and the
+# outcome of every check in the spec. Exit code 1 when any check outcome differs.
+# Run from the repo root:
+#   python -m benchmarks.backend_conformance
+#   python -m benchmarks.backend_conformance some.pdf --template some_boxes_template.json --spec specs/x.json
+
+import argparse
+import difflib
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+from json_SL import load_json
+from json_work.python_files.extract_backends import BACKENDS, open_backend
+from json_work.python_files.extract_boxes_to_json import extract_to_json
+from json_work.python_files.pdf_input import PdfSource
+from validation_spec import load_plan
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PDF = REPO_ROOT / "json_work" / "sample_pdfs" / "UMS025.pdf"
+DEFAULT_TEMPLATE = REPO_ROOT / "json_work" / "json_files" / "UMS025_boxes_template.json"
+DEFAULT_SPEC = REPO_ROOT / "specs" / "UMS025.json"
+REFERENCE = "pdfplumber"
+
+
+def _extract(pdf: Path, template: Path, work_dir: Path, repeat: int = 3) -> Dict[str, dict]:
+    # Template extraction per backend, with its best-of-`repeat` wall time
+    # (the first run also pays the library import).
+    out = {}
+    for name in BACKENDS:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            path = extract_to_json(str(pdf), str(template), work_dir / f"{name}.json", backend=name)
+            best = min(best, time.perf_counter() - t0)
+        out[name] = {"seconds": best, "data": load_json(path)}
+    return out
+
+
+def _page_texts(pdf: Path) -> Dict[str, list]:
+    with PdfSource(pdf) as src:
+        texts = {}
+        for name in BACKENDS:
+            with open_backend(name, src) as backend:
+                texts[name] = [backend.text(i) for i in range(len(backend))]
+        return texts
+
+
+def _diff(a: str, b: str, label_a: str, label_b: str, limit: int = 20) -> list:
+    lines = list(difflib.unified_diff(a.splitlines(), b.splitlines(), label_a, label_b, lineterm="", n=1))
+    if len(lines) > limit:
+        lines = lines[:limit] + [f"... {len(lines) - limit} more diff lines"]
+    return lines
+
+
+def compare(pdf: Path, template: Path, spec: Path) -> int:
+    plan = load_plan(str(spec))
+    with tempfile.TemporaryDirectory(prefix="rlpdf_backends_") as tmp:
+        runs = _extract(pdf, template, Path(tmp))
+    ref = runs[REFERENCE]["data"]
+    differences = 0
+    check_mismatches = 0
+
+    print(f"Backend conformance on {pdf.name} (reference: {REFERENCE})")
+    for name, run in runs.items():
+        print(f"  {name:<12} extract_to_json {run['seconds'] * 1000:8.1f} ms")
+
+    ref_checks = {c["name"]: c["pass"] for c in plan.run(ref)}
+    for name, run in runs.items():
+        if name == REFERENCE:
+            continue
+        data = run["data"]
+        print(f"\n== {name} vs {REFERENCE}")
+
+        names = sorted(set(ref["boxes"]) | set(data["boxes"]))
+        box_diffs = 0
+        for box in names:
+            a = (ref["boxes"].get(box) or {}).get("raw_text")
+            b = (data["boxes"].get(box) or {}).get("raw_text")
+            if a != b:
+                box_diffs += 1
+                print(f"  box {box}:\n    {REFERENCE}: {a!r}\n    {name}: {b!r}")
+        print(f"  boxes: {len(names) - box_diffs}/{len(names)} identical")
+
+        full_diff = _diff(ref["full_text"], data["full_text"], REFERENCE, name)
+        print("  full_text: identical" if not full_diff else "  full_text differs:")
+        for line in full_diff:
+            print(f"    {line}")
+
+        checks = {c["name"]: c["pass"] for c in plan.run(data)}
+        mismatched = [c for c in ref_checks if checks.get(c) != ref_checks[c]]
+        print(f"  checks: {len(ref_checks) - len(mismatched)}/{len(ref_checks)} same outcome")
+        for c in mismatched:
+            print(f"    {c}: {REFERENCE}={ref_checks[c]} {name}={checks.get(c)}")
+        differences += box_diffs + (1 if full_diff else 0)
+        check_mismatches += len(mismatched)
+
+    texts = _page_texts(pdf)
+    print("\n== page text (simple extractor, every page)")
+    for name, pages in texts.items():
+        if name == REFERENCE:
+            continue
+        for i, (a, b) in enumerate(zip(texts[REFERENCE], pages)):
+            page_diff = _diff(a, b, f"{REFERENCE} p{i + 1}", f"{name} p{i + 1}", limit=10)
+            if page_diff:
+                differences += 1
+                print("\n".join(f"    {line}" for line in page_diff))
+        same = sum(1 for a, b in zip(texts[REFERENCE], pages) if a == b)
+        print(f"  {name}: {same}/{len(pages)} pages identical")
+
+    if check_mismatches:
+        print(f"\n[ERROR] {check_mismatches} check outcome(s) differ between backends", file=sys.stderr)
+        return 1
+    print(f"\n[OK] All check outcomes agree; {differences} text difference(s)")
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare extraction backends on one PDF.")
+    ap.add_argument("pdf", nargs="?", default=str(DEFAULT_PDF))
+    ap.add_argument("--template", default=str(DEFAULT_TEMPLATE))
+    ap.add_argument("--spec", default=str(DEFAULT_SPEC))
+    args = ap.parse_args()
+    sys.exit(compare(Path(args.pdf), Path(args.template), Path(args.spec)))
+
+
+if __name__ == "__main__":
+    main()
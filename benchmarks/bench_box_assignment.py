@@ -0,0 +1,110 @@
+# bench_box_assignment.py
+# Micro-benchmark: naive per-box word scan vs the grid index in box_geometry,
+# plus the optional NumPy path (--sweep prints the grid/NumPy crossover).
+# Run from the repo root: python -m benchmarks.bench_box_assignment
+
+import argparse
+import random
+import time
+from typing import Dict, List, Tuple
+
+from json_work.python_files.box_geometry import (
+    BoxGrid,
+    assign_reading_order,
+    assign_words_naive,
+    assign_words_to_boxes,
+    np,
+)
+
+PAGE_W, PAGE_H = 595.0, 842.0
+
+
+def synthetic_words(n: int, rng: random.Random) -> List[Dict]:
+    # Words laid out in lines like a dense statement page.
+    words = []
+    for i in range(n):
+        x0 = rng.uniform(0, PAGE_W - 40)
+        top = rng.uniform(0, PAGE_H - 10)
+        width = rng.uniform(8, 40)
+        words.append({"text": f"w{i}", "x0": x0, "x1": x0 + width, "top": top, "bottom": top + 9.5})
+    return words
+
+
+def synthetic_boxes(n: int, rng: random.Random) -> List[Tuple[float, float, float, float]]:
+    # Boxes of mixed size, some overlapping, as drawn on real templates.
+    rects = []
+    for _ in range(n):
+        w = rng.uniform(20, 250)
+        h = rng.uniform(10, 80)
+        x0 = rng.uniform(0, PAGE_W - w)
+        y0 = rng.uniform(0, PAGE_H - h)
+        rects.append((x0, y0, x0 + w, y0 + h))
+    return rects
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def sweep(rng: random.Random, repeat: int) -> None:
+    # Reading-ordered assignment (what extraction needs) at growing page sizes.
+    # The grid is prebuilt, as CompiledTemplate caches it per page size.
+    print(f"{'words':>7} {'boxes':>6} {'pairs':>9} {'grid ms':>9} {'numpy ms':>9}")
+    for n_words, n_boxes in [(30, 3), (50, 7), (100, 7), (300, 7), (1000, 7), (300, 50),
+                             (3000, 20), (1000, 200), (10_000, 200), (30_000, 200)]:
+        words = synthetic_words(n_words, rng)
+        rects = synthetic_boxes(n_boxes, rng)
+        grid = BoxGrid(rects)
+        t_grid = _best_of(lambda: assign_reading_order(words, rects, grid=grid, use_numpy=False), repeat)
+        t_np = _best_of(lambda: assign_reading_order(words, rects, use_numpy=True), repeat)
+        print(f"{n_words:>7} {n_boxes:>6} {n_words * n_boxes:>9} {t_grid * 1000:>9.2f} {t_np * 1000:>9.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare naive and grid word-to-box assignment.")
+    ap.add_argument("--words", type=int, default=10_000)
+    ap.add_argument("--boxes", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--sweep", action="store_true", help="Print grid vs NumPy timings across page sizes")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.sweep:
+        if np is None:
+            raise SystemExit("[ERROR] --sweep needs NumPy installed")
+        sweep(rng, args.repeat)
+        return
+
+    words = synthetic_words(args.words, rng)
+    rects = synthetic_boxes(args.boxes, rng)
+
+    naive = assign_words_naive(words, rects)
+    grid = assign_words_to_boxes(words, rects)
+    if naive != grid:
+        raise SystemExit("[ERROR] grid assignment differs from naive _intersects scan")
+
+    t_naive = _best_of(lambda: assign_words_naive(words, rects), args.repeat)
+    t_grid = _best_of(lambda: assign_words_to_boxes(words, rects), args.repeat)
+
+    print(f"words={args.words} boxes={args.boxes} assignments={sum(len(b) for b in grid)}")
+    print(f"  naive : {t_naive * 1000:9.2f} ms")
+    print(f"  grid  : {t_grid * 1000:9.2f} ms  ({t_naive / t_grid:.1f}x)")
+
+    if np is not None:
+        ordered = assign_reading_order(words, rects, use_numpy=False)
+        if assign_reading_order(words, rects, use_numpy=True) != ordered:
+            raise SystemExit("[ERROR] NumPy assignment differs from the grid path")
+        t_sorted = _best_of(lambda: assign_reading_order(words, rects, use_numpy=False), args.repeat)
+        t_np = _best_of(lambda: assign_reading_order(words, rects, use_numpy=True), args.repeat)
+        print(f"  grid + sort  : {t_sorted * 1000:9.2f} ms")
+        print(f"  numpy lexsort: {t_np * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_columnar.py
+# Load time of a layout as JSON (json.load) versus the columnar format
+# (load_layout plus decoding its string table, i.e. ready to read texts), and
+# the file sizes. The sample layout is repeated to simulate longer documents.
+# Run from the repo root:
+#   python -m benchmarks.bench_columnar
+#   python -m benchmarks.bench_columnar --layout other.layout.json --copies 1 10
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from columnar import load_layout, save_layout
+from json_SL import save_json
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_LAYOUT = REPO_ROOT / "UMS025.layout.json"
+
+
+def _best(fn: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _repeat_layout(layout: dict, copies: int) -> dict:
+    pages = []
+    for n in range(copies):
+        for page in layout["pages"]:
+            number = len(pages) + 1
+            items = [dict(item, page=number) for item in page["textItems"]]
+            pages.append({"pageNumber": number, "rotation": page.get("rotation", 0), "textItems": items})
+    return {"pages": pages}
+
+
+def _load_json(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_cols(path: Path):
+    layout = load_layout(path)
+    layout.strings
+    return layout
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark layout loading: JSON vs columnar.")
+    ap.add_argument("--layout", default=str(DEFAULT_LAYOUT))
+    ap.add_argument("--copies", type=int, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    base = _load_json(Path(args.layout))
+    print(f"{'items':>8} | {'json KB':>8} {'cols KB':>8} | {'json.load':>10} {'columnar':>9} {'speedup':>8}  (ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in args.copies:
+            layout = _repeat_layout(base, copies)
+            json_path = save_json(layout, Path(tmp) / f"x{copies}.layout.json")
+            cols_path = save_layout(layout, Path(tmp) / f"x{copies}.layout.cols")
+            if load_layout(cols_path).to_dict() != _load_json(json_path):
+                print(f"[ERROR] round trip differs for {copies} copies", file=sys.stderr)
+                sys.exit(1)
+
+            t_json = _best(lambda: _load_json(json_path), args.repeat)
+            t_cols = _best(lambda: _load_cols(cols_path), args.repeat)
+            items = sum(len(p["textItems"]) for p in layout["pages"])
+            speedup = t_json / t_cols if t_cols else float("inf")
+            print(f"{items:>8} | {json_path.stat().st_size / 1024:>8.1f} {cols_path.stat().st_size / 1024:>8.1f}"
+                  f" | {t_json:>10.3f} {t_cols:>9.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_template_builder.py
+# Template building from a boxes PDF: the current builder (get_drawings, first two
+# pages and every page) versus fast mode (streamed raw drawings, duplicates
+# dropped, every page). Runs on UMS025_boxes.pdf and on synthetic vector-heavy
+# boxes PDFs: field boxes among logos, rules and a doubled border per box.
+# Fast mode must keep the current box names, minus the dropped duplicates.
+# Run from the repo root:
+#   python -m benchmarks.bench_template_builder
+#   python -m benchmarks.bench_template_builder --pages 2 10 --paths 500
+
+import argparse
+import math
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Set
+
+import fitz  # type: ignore
+
+from json_work.python_files.build_template_from_pdf import (
+    build_template,
+    build_template_fast,
+    build_template_first_two_pages,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLE = REPO_ROOT / "json_work" / "sample_pdfs" / "UMS025_boxes.pdf"
+PAGE_W, PAGE_H = 595.0, 842.0
+
+
+def _best(fn: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def make_boxes_pdf(path: Path, pages: int, paths: int, boxes: int = 12, seed: int = 0) -> Path:
+    # Each page: `paths` logo curves and rules, then `boxes` stroked field boxes,
+    # each followed by an inset border (a duplicate fast mode drops).
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=PAGE_W, height=PAGE_H)
+        for n in range(paths):
+            x, y = rng.uniform(20, PAGE_W - 60), rng.uniform(20, PAGE_H - 60)
+            if n % 3:
+                r = rng.uniform(4, 20)
+                page.draw_bezier((x, y), (x + r, y - r), (x + 2 * r, y + r), (x + 3 * r, y), width=0.5)
+            else:
+                page.draw_line((x, y), (x + rng.uniform(20, 200), y), width=0.3)
+        cols = 2
+        box_w = (PAGE_W - 80 - 10) / cols
+        box_h = min(60.0, (PAGE_H - 80) / math.ceil(boxes / cols) - 8)
+        for b in range(boxes):
+            x0 = 40 + (b % cols) * (box_w + 10)
+            y0 = 40 + (b // cols) * (box_h + 8)
+            page.draw_rect(fitz.Rect(x0, y0, x0 + box_w, y0 + box_h), width=1)
+            page.draw_rect(fitz.Rect(x0 + 1.5, y0 + 1.5, x0 + box_w - 1.5, y0 + box_h - 1.5), width=0.5)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def _names(template: dict) -> Set[str]:
+    return {f["name"] for page in template["pages"] for f in page["fields"]}
+
+
+def _row(label: str, pdf: Path, repeat: int) -> bool:
+    full = build_template(str(pdf))
+    fast = build_template_fast(str(pdf))
+    ok = _names(fast) <= _names(full)
+    if not ok:
+        print(f"[ERROR] {label}: fast mode produced box names the current builder does not", file=sys.stderr)
+    t_two = _best(lambda: build_template_first_two_pages(str(pdf)), repeat)
+    t_full = _best(lambda: build_template(str(pdf)), repeat)
+    t_fast = _best(lambda: build_template_fast(str(pdf)), repeat)
+    speedup = t_full / t_fast if t_fast else float("inf")
+    print(f"{label:>22} {len(full['pages']):>5} | {t_two:>9.2f} {t_full:>9.2f} {t_fast:>9.2f} {speedup:>7.1f}x"
+          f" | {len(_names(full)):>6} {len(_names(fast)):>6}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the template builder: get_drawings vs fast mode.")
+    ap.add_argument("--pages", type=int, nargs="+", default=[2, 10, 50])
+    ap.add_argument("--paths", type=int, default=300, help="Logo/rule paths per synthetic page")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'input':>22} {'pages':>5} | {'2 pages':>9} {'all':>9} {'fast all':>9} {'speedup':>8}"
+          f" | {'boxes':>6} {'fast':>6}  (ms)")
+    if SAMPLE.exists():
+        ok &= _row(SAMPLE.name, SAMPLE, args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf = make_boxes_pdf(Path(tmp) / f"synthetic{pages}_boxes.pdf", pages, args.paths)
+            ok &= _row(f"synthetic x{pages}", pdf, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
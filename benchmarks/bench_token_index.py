@@ -0,0 +1,85 @@
+# bench_token_index.py
+# Existence and in-box checks with and without the extraction's token index, on
+# synthetic texts of growing size and value counts (values are 1-3 word phrases
+# taken from the text, so most exist). Index times include decoding the index
+# from its JSON form, as ValidationPlan.run does; results must be identical.
+# Run from the repo root:
+#   python -m benchmarks.bench_token_index
+
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+import validations
+from multi_match import MultiPatternMatcher
+from token_index import TokenIndex
+from validations import box_checks, full_doc_checks
+
+BOXES = 10
+
+
+def _best(fn: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _text(rng: random.Random, vocab: List[str], words: int) -> str:
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def _values(rng: random.Random, words: List[str], count: int) -> Dict[str, str]:
+    return {f"v{i}": " ".join(words[j:j + rng.randint(1, 3)])
+            for i, j in enumerate(rng.choices(range(len(words) - 3), k=count))}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark token index lookups against substring search.")
+    ap.add_argument("--words", type=int, nargs="+", default=[2000, 20000, 200000])
+    ap.add_argument("--values", type=int, nargs="+", default=[50, 500, 2000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+             for _ in range(5000)]
+    # Measure the index itself, not the thresholds that decide when it is used.
+    validations.INDEXED_MIN_VALUES = 0
+    validations.INDEXED_BOX_CHARS = 0
+
+    mismatches = 0
+    print(f"{'words':>8} {'values':>7} | {'full scan':>10} {'full idx':>9} | {'box scan':>9} {'box idx':>9}  (ms)")
+    for words in args.words:
+        full_text = _text(rng, vocab, words)
+        boxes = {f"box_{k}": {"page": 1, "raw_text": _text(rng, vocab, max(words // BOXES, 10))}
+                 for k in range(BOXES)}
+        stored = TokenIndex.build(full_text, boxes).to_dict()
+        all_words = full_text.split()
+        for count in args.values:
+            expected = _values(rng, all_words, count)
+            matcher = MultiPatternMatcher(expected)
+            mapping = {name: list(expected) for name in boxes}
+
+            def indexed(fn):
+                return lambda: fn(TokenIndex.from_dict(stored))
+
+            full_scan = lambda: full_doc_checks(expected, full_text, matcher=matcher)
+            full_idx = indexed(lambda ix: full_doc_checks(expected, full_text, matcher=matcher, index=ix))
+            box_scan = lambda: box_checks(expected, boxes, mapping)
+            box_idx = indexed(lambda ix: box_checks(expected, boxes, mapping, index=ix))
+
+            if full_scan() != full_idx() or box_scan() != box_idx():
+                mismatches += 1
+                print(f"[ERROR] results differ for {words} words / {count} values")
+            print(f"{words:>8} {count:>7} | {_best(full_scan, args.repeat):>10.2f} {_best(full_idx, args.repeat):>9.2f}"
+                  f" | {_best(box_scan, args.repeat):>9.2f} {_best(box_idx, args.repeat):>9.2f}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# run_benchmarks.py
+# Time the extraction and validation hot paths on synthetic documents at several
+# scales, and save or compare against a baseline so regressions show up.
+# The committed baseline is benchmarks/baseline.json (default scales, taken on
+# the machine named in its "machine" field); runs compare against it unless
+# --no-compare is given. Re-save it after an intended speed change, or keep a
+# local one for your own machine.
+# Run from the repo root:
+#   python -m benchmarks.run_benchmarks
+#   python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+#   python -m benchmarks.run_benchmarks --compare my_baseline.json
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_pdf import STYLES, make_document
+from json_work.python_files.build_template_from_pdf import (
+    build_template_first_two_pages,
+    write_template_for_boxes_pdf,
+)
+from json_work.python_files.extract_boxes_to_json import extract_to_json
+from simpler.extract_to_json import extract_pdf_to_structured_json
+from validations import box_checks, full_doc_checks
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baseline.json"
+
+# pages, words per page, boxes per template page
+SCALES = {
+    "small": {"pages": 2, "words_per_page": 200, "boxes": 7},
+    "medium": {"pages": 10, "words_per_page": 600, "boxes": 20},
+    "large": {"pages": 40, "words_per_page": 1000, "boxes": 40},
+}
+
+
+def _best_of(fn: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(styles: List[str], scales: List[str], repeat: int, work_dir: Path) -> Dict[str, float]:
+    # Best-of-`repeat` seconds per "<style>/<scale>/<function>".
+    results: Dict[str, float] = {}
+    for style in styles:
+        for scale in scales:
+            doc = make_document(work_dir, style=style, **SCALES[scale])
+            tpl_path = write_template_for_boxes_pdf(str(doc.boxes_pdf_path), work_dir / f"{doc.doc_type}_template.json")
+            out_json = work_dir / f"{doc.doc_type}.first_half.json"
+            out_structured = work_dir / f"{doc.doc_type}.json"
+
+            extract_to_json(str(doc.pdf_path), str(tpl_path), out_json)
+            with out_json.open("r", encoding="utf-8") as f:
+                extraction = json.load(f)
+            full_text, boxes = extraction["full_text"], extraction["boxes"]
+            missing = [b for b in doc.box_mapping if b not in boxes]
+            if missing:
+                raise SystemExit(f"[ERROR] {doc.doc_type}: template lost boxes {missing[:5]}")
+            checks = full_doc_checks(doc.expected_values, full_text)
+            checks += box_checks(doc.expected_values, boxes, doc.box_mapping, {})
+            failed = [c["name"] for c in checks if not c["pass"]]
+            if failed:
+                raise SystemExit(f"[ERROR] {doc.doc_type}: generated values not extracted: {failed[:5]}")
+
+            timings = {
+                "build_template_first_two_pages": lambda: build_template_first_two_pages(str(doc.boxes_pdf_path)),
+                "extract_to_json": lambda: extract_to_json(str(doc.pdf_path), str(tpl_path), out_json),
+                "extract_pdf_to_structured_json": lambda: extract_pdf_to_structured_json(str(doc.pdf_path), str(out_structured)),
+                "full_doc_checks": lambda: full_doc_checks(doc.expected_values, full_text),
+                "box_checks": lambda: box_checks(doc.expected_values, boxes, doc.box_mapping, {}),
+            }
+            print(f"{style}/{scale}: {SCALES[scale]['pages']} pages, {doc.words} words, "
+                  f"{len(doc.expected_values)} values, {len(doc.box_mapping)} boxes")
+            for name, fn in timings.items():
+                key = f"{style}/{scale}/{name}"
+                results[key] = _best_of(fn, repeat)
+                print(f"  {name:<32} {results[key] * 1000:10.2f} ms")
+    return results
+
+
+def save_baseline(results: Dict[str, float], path: Path) -> None:
+    payload = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def compare(results: Dict[str, float], path: Path, threshold: float) -> List[str]:
+    # Keys that got slower than baseline * (1 + threshold).
+    with path.open("r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    print(f"\n{'benchmark':<60} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    regressions = []
+    for key, now in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<60} {'-':>10} {now * 1000:>10.2f} {'new':>8}")
+            continue
+        change = now / base - 1 if base else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<60} {base * 1000:>10.2f} {now * 1000:>10.2f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark extraction and validation on synthetic PDFs.")
+    ap.add_argument("--styles", default=",".join(STYLES), help=f"Comma-separated: {', '.join(STYLES)}")
+    ap.add_argument("--scales", default="small,medium", help=f"Comma-separated: {', '.join(SCALES)}")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save-baseline", help="Write results to this baseline JSON")
+    ap.add_argument("--compare", default=str(DEFAULT_BASELINE),
+                    help="Compare against this baseline JSON; exit 1 on regressions (default: %(default)s)")
+    ap.add_argument("--no-compare", action="store_true", help="Only time; do not compare against a baseline")
+    ap.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = ap.parse_args()
+
+    styles = [s for s in args.styles.split(",") if s]
+    scales = [s for s in args.scales.split(",") if s]
+    unknown = [s for s in styles if s not in STYLES] + [s for s in scales if s not in SCALES]
+    if unknown:
+        raise SystemExit(f"[ERROR] Unknown style/scale: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory(prefix="rlpdf_bench_") as tmp:
+        results = run(styles, scales, args.repeat, Path(tmp))
+
+    if args.save_baseline:
+        save_baseline(results, Path(args.save_baseline))
+        print(f"[OK] Wrote baseline to: {args.save_baseline}")
+    if args.compare and not args.no_compare and not args.save_baseline:
+        if not Path(args.compare).exists():
+            raise SystemExit(f"[ERROR] Baseline not found: {args.compare} (create it with --save-baseline)")
+        regressions = compare(results, Path(args.compare), args.threshold)
+        if regressions:
+            print(f"[ERROR] {len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+        print("[OK] No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# synthetic_pdf.py
+# Generate synthetic letter-style and P45-style PDFs for benchmarks.
+# Each document comes as a pair, like UMS025.pdf / UMS025_boxes.pdf: the main PDF
+# holds the text, the boxes PDF draws the same layout's field rectangles, so
+# build_template_first_two_pages() turns it into a template whose box names
+# (box_{page}_{drawing index}) line up with the returned box_mapping.
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import fitz  # type: ignore
+
+PAGE_W, PAGE_H = 595.0, 842.0
+MARGIN = 40.0
+BOX_PAGES = 2  # the template builder only reads the first two pages
+
+STYLES = ("letter", "p45")
+
+_VOCAB = (
+    "pension plan value withdrawal cash tax code payment statement account period date "
+    "customer reference total year month benefit lump sum income scheme member address "
+    "details please note that your the of and to in for on with this we have been"
+).split()
+
+
+@dataclass
+class SyntheticDoc:
+    pdf_path: Path
+    boxes_pdf_path: Path
+    doc_type: str
+    expected_values: Dict[str, str] = field(default_factory=dict)
+    box_mapping: Dict[str, List[str]] = field(default_factory=dict)
+    words: int = 0
+
+
+def _value(rng: random.Random, kind: int) -> str:
+    # Rotate through the value shapes found in real letters.
+    if kind == 0:
+        return f"{rng.randint(1, 999):,}{rng.randint(0, 999):03d}.{rng.randint(0, 99):02d}"
+    if kind == 1:
+        return f"{rng.randint(1, 28)} {rng.choice(['January', 'March', 'June', 'November'])} 2025"
+    if kind == 2:
+        return "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(rng.randint(6, 11)))
+    return f"{rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(1990, 2025)}"
+
+
+def _box_rects(style: str, n: int) -> List[Tuple[float, float, float, float]]:
+    # Letters: two columns of roomy boxes at the top of the page. P45 forms: a
+    # dense three-column grid over most of the page.
+    cols = 2 if style == "letter" else 3
+    rows = max(1, -(-n // cols))
+    region_h = (PAGE_H - 2 * MARGIN) * 0.85
+    if style == "letter":
+        region_h = min(region_h, rows * 54.0)
+    gap = 6.0
+    box_w = (PAGE_W - 2 * MARGIN - gap * (cols - 1)) / cols
+    box_h = min(70.0, region_h / rows - gap)
+    if box_w * box_h < 1500:
+        raise ValueError(f"{n} boxes do not fit on a {style} page")
+    rects = []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        x0 = MARGIN + c * (box_w + gap)
+        y0 = MARGIN + r * (box_h + gap)
+        rects.append((x0, y0, x0 + box_w, y0 + box_h))
+    return rects
+
+
+def _body_lines(rng: random.Random, words: int, top: float) -> List[Tuple[float, str]]:
+    # Filler text in 7pt lines from `top` to the bottom margin; words that do not
+    # fit are dropped.
+    lines = []
+    y = top + 8.0
+    per_line = 16
+    while words > 0 and y < PAGE_H - MARGIN:
+        n = min(per_line, words)
+        lines.append((y, " ".join(rng.choice(_VOCAB) for _ in range(n))))
+        words -= n
+        y += 8.5
+    return lines
+
+
+def make_document(
+    out_dir: str | Path,
+    style: str = "letter",
+    pages: int = 2,
+    words_per_page: int = 300,
+    boxes: int = 7,
+    seed: int = 0
+) -> SyntheticDoc:
+    # Write <doc_type>.pdf and <doc_type>_boxes.pdf into out_dir. `boxes` field
+    # rectangles are placed on each of the first two pages; every box holds two or
+    # three labelled values, which become the expected values.
+    if style not in STYLES:
+        raise ValueError(f"Unknown style: {style}")
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    doc_type = f"SYN_{style.upper()}_{pages}p_{words_per_page}w_{boxes}b"
+    result = SyntheticDoc(out_dir / f"{doc_type}.pdf", out_dir / f"{doc_type}_boxes.pdf", doc_type)
+
+    main = fitz.open()
+    drawn = fitz.open()
+    rects = _box_rects(style, boxes)
+    fontsize = 9.0 if style == "letter" else 7.0
+    for pno in range(pages):
+        page = main.new_page(width=PAGE_W, height=PAGE_H)
+        boxes_page = drawn.new_page(width=PAGE_W, height=PAGE_H)
+        body_top = MARGIN
+        if pno < BOX_PAGES:
+            for idx, (x0, y0, x1, y1) in enumerate(rects):
+                labels = []
+                y = y0 + fontsize + 3
+                for k in range(rng.randint(2, 3)):
+                    if y > y1 - 2:
+                        break
+                    label = f"Field {pno}.{idx}.{k}"
+                    value = _value(rng, k + idx)
+                    result.expected_values[label] = value
+                    labels.append(label)
+                    line = f"{label.split(' ')[1]}: {value}"
+                    page.insert_text((x0 + 4, y), line, fontsize=fontsize)
+                    boxes_page.insert_text((x0 + 4, y), line, fontsize=fontsize)
+                    result.words += len(line.split())
+                    y += fontsize + 3
+                boxes_page.draw_rect(fitz.Rect(x0, y0, x1, y1), color=(0, 0, 0), width=1)
+                result.box_mapping[f"box_{pno}_{idx}"] = labels
+            body_top = rects[-1][3] + 10 if rects else MARGIN
+
+        for y, line in _body_lines(rng, words_per_page, body_top):
+            page.insert_text((MARGIN, y), line, fontsize=7)
+            result.words += len(line.split())
+
+    main.save(result.pdf_path)
+    drawn.save(result.boxes_pdf_path)
+    main.close()
+    drawn.close()
+    return result
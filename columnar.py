@@ -0,0 +1,351 @@
+# columnar.py
+# Compact columnar storage for layout and extraction data.
+# A ".cols" file is a small JSON header followed by fixed-width little-endian
+# columns (one value per text item or box) and one string table. Strings are
+# stored once each, NUL-separated, and columns refer to them by index, so a
+# layout with thousands of items costs a few arrays instead of thousands of
+# {"text", "x", "y", "page"} objects. Loading is one read, a header parse and
+# memoryview casts: the columns come back as array-backed views without any
+# per-item parsing; the string table is decoded on first use.
+#
+#   layout:      columns page (H), x (d), y (d), text (I); header "pages" holds
+#                [pageNumber, rotation, first row, end row] per page.
+#   extraction:  one row per box: name, page, raw_text, count_words and the four
+#                box_denorm coordinates; full_text is a string, and any other
+#                top-level keys (doc_path, token_index, ...) stay in the header.
+#
+#   python columnar.py UMS025.layout.json              -> UMS025.layout.cols
+#   python columnar.py UMS025.layout.cols --to-json    -> UMS025.layout.json
+
+import argparse
+import json
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from json_SL import atomic_open, load_json, save_json
+
+COLUMNAR_SUFFIX = ".cols"
+FORMAT_VERSION = 1
+MAGIC = b"PDFCOLS\x00"
+_HEADER = struct.Struct("<8sI")  # magic, header JSON length
+_ALIGN = 8
+
+LAYOUT = "layout"
+EXTRACTION = "extraction"
+
+_LAYOUT_COLUMNS = (("page", "H"), ("x", "d"), ("y", "d"), ("text", "I"))
+_BOX_COLUMNS = (("name", "I"), ("page", "I"), ("raw_text", "I"), ("count_words", "I"),
+                ("x0", "d"), ("y0", "d"), ("x1", "d"), ("y1", "d"))
+_BOX_KEYS = {"page", "raw_text", "count_words", "box_denorm"}
+
+
+class ColumnarError(ValueError):
+    pass
+
+
+class StringTable:
+    # Interns strings while a file is written; each distinct string is stored once.
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, s: str) -> int:
+        sid = self.ids.get(s)
+        if sid is None:
+            if "\x00" in s:
+                raise ColumnarError("Strings containing NUL cannot be stored")
+            sid = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return sid
+
+    def encode(self) -> bytes:
+        return "\x00".join(self.strings).encode("utf-8")
+
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+def write_columns(path: str | Path, kind: str, columns: Dict[str, array], strings: StringTable,
+                  meta: Optional[dict] = None) -> Path:
+    # Write the columns (equal-length arrays), the string table and extra header
+    # fields to path, atomically.
+    blocks: List[bytes] = []
+    specs = []
+    for name, arr in columns.items():
+        data = arr
+        if sys.byteorder != "little":
+            data = array(arr.typecode, arr)
+            data.byteswap()
+        blocks.append(data.tobytes())
+        specs.append([name, arr.typecode, len(arr)])
+    blocks.append(strings.encode())
+
+    header = {"version": FORMAT_VERSION, "kind": kind, "columns": specs,
+              "strings": len(strings.strings), **(meta or {})}
+    # Block offsets are relative to the end of the (padded) header.
+    offset = 0
+    for spec, block in zip(specs + [None], blocks):
+        if spec is not None:
+            spec.append(offset)
+        else:
+            header["strings_at"] = [offset, len(block)]
+        offset += len(block) + _pad(len(block))
+    head = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    p = Path(path)
+    with atomic_open(p, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(head)))
+        f.write(head)
+        f.write(b"\0" * _pad(_HEADER.size + len(head)))
+        for block in blocks:
+            f.write(block)
+            f.write(b"\0" * _pad(len(block)))
+    return p
+
+
+class ColumnarFile:
+    # A loaded .cols file: header fields, column views and the string table.
+
+    def __init__(self, data: bytes):
+        if len(data) < _HEADER.size:
+            raise ColumnarError("Truncated columnar file")
+        magic, head_len = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ColumnarError("Not a columnar file")
+        start = _HEADER.size + head_len
+        self.header: dict = json.loads(str(data[_HEADER.size:start], "utf-8"))
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ColumnarError(f"Unsupported columnar format version: {self.header.get('version')}")
+        self.kind: str = self.header["kind"]
+        self._body = memoryview(data)[start + _pad(start):]
+        self.columns: Dict[str, memoryview] = {}
+        for name, typecode, count, offset in self.header["columns"]:
+            size = array(typecode).itemsize * count
+            view = self._body[offset:offset + size].cast(typecode)
+            if sys.byteorder != "little":
+                swapped = array(typecode, view)
+                swapped.byteswap()
+                view = memoryview(swapped)
+            self.columns[name] = view
+        self._strings: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ColumnarFile":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    @property
+    def strings(self) -> List[str]:
+        # The whole string table, decoded in one call on first use.
+        if self._strings is None:
+            offset, size = self.header["strings_at"]
+            blob = str(self._body[offset:offset + size], "utf-8")
+            self._strings = blob.split("\x00") if self.header["strings"] else []
+        return self._strings
+
+    def __len__(self) -> int:
+        first = next(iter(self.columns.values()), None)
+        return 0 if first is None else len(first)
+
+
+# --- layout -----------------------------------------------------------------------
+
+
+class LayoutColumns:
+    # Text items of a layout (DocumentSession.lines_layout shape) as columns.
+    # page/x/y/text are array-backed views; text holds string table ids.
+
+    def __init__(self, cols: ColumnarFile):
+        if cols.kind != LAYOUT:
+            raise ColumnarError(f"Expected a layout file, got '{cols.kind}'")
+        self._cols = cols
+        self.pages: List[Tuple[int, int, int, int]] = [tuple(p) for p in cols.header["pages"]]
+        self.page = cols.columns["page"]
+        self.x = cols.columns["x"]
+        self.y = cols.columns["y"]
+        self.text_ids = cols.columns["text"]
+
+    def __len__(self) -> int:
+        return len(self.text_ids)
+
+    @property
+    def strings(self) -> List[str]:
+        return self._cols.strings
+
+    def text(self, row: int) -> str:
+        return self.strings[self.text_ids[row]]
+
+    def rows(self, page_number: int) -> range:
+        # Rows of one page (by pageNumber); empty for pages not in the layout.
+        for number, _, start, end in self.pages:
+            if number == page_number:
+                return range(start, end)
+        return range(0)
+
+    def page_texts(self, page_number: int) -> List[str]:
+        strings = self.strings
+        return [strings[self.text_ids[r]] for r in self.rows(page_number)]
+
+    def iter_items(self) -> Iterator[dict]:
+        strings = self.strings
+        for r in range(len(self)):
+            yield {"text": strings[self.text_ids[r]], "x": self.x[r], "y": self.y[r], "page": self.page[r]}
+
+    def to_dict(self) -> dict:
+        # The original JSON shape.
+        strings = self.strings
+        pages = []
+        for number, rotation, start, end in self.pages:
+            pages.append({"pageNumber": number, "rotation": rotation, "textItems": [
+                {"text": strings[self.text_ids[r]], "x": self.x[r], "y": self.y[r], "page": self.page[r]}
+                for r in range(start, end)
+            ]})
+        return {"pages": pages}
+
+
+def save_layout(layout: dict, path: str | Path) -> Path:
+    # Write a {"pages": [{"pageNumber", "rotation", "textItems": [...]}]} layout.
+    strings = StringTable()
+    columns = {name: array(tc) for name, tc in _LAYOUT_COLUMNS}
+    pages = []
+    for page in layout.get("pages") or []:
+        start = len(columns["text"])
+        for item in page.get("textItems") or []:
+            columns["page"].append(item.get("page", page["pageNumber"]))
+            columns["x"].append(item["x"])
+            columns["y"].append(item["y"])
+            columns["text"].append(strings.add(item["text"]))
+        pages.append([page["pageNumber"], page.get("rotation", 0), start, len(columns["text"])])
+    return write_columns(path, LAYOUT, columns, strings, {"pages": pages})
+
+
+def load_layout(path: str | Path) -> LayoutColumns:
+    return LayoutColumns(ColumnarFile.load(path))
+
+
+# --- extraction -------------------------------------------------------------------
+
+
+def save_extraction_columns(extraction: dict, path: str | Path) -> Path:
+    # Write an extract_to_json result. Box keys other than the standard ones are
+    # kept in the header, so the round trip is exact.
+    strings = StringTable()
+    columns = {name: array(tc) for name, tc in _BOX_COLUMNS}
+    extra = {}
+    for name, box in (extraction.get("boxes") or {}).items():
+        columns["name"].append(strings.add(name))
+        columns["page"].append(box["page"])
+        columns["raw_text"].append(strings.add(box.get("raw_text") or ""))
+        columns["count_words"].append(box.get("count_words", 0))
+        for col, value in zip(("x0", "y0", "x1", "y1"), box["box_denorm"]):
+            columns[col].append(value)
+        others = {k: v for k, v in box.items() if k not in _BOX_KEYS}
+        if others:
+            extra[name] = others
+
+    meta = {k: v for k, v in extraction.items() if k not in ("boxes", "full_text")}
+    header = {"meta": meta, "full_text": strings.add(extraction.get("full_text") or "")}
+    if extra:
+        header["box_extra"] = extra
+    return write_columns(path, EXTRACTION, columns, strings, header)
+
+
+def load_extraction_columns(path: str | Path) -> dict:
+    # The extraction dict, as json.load of the equivalent JSON would return it.
+    cols = ColumnarFile.load(path)
+    if cols.kind != EXTRACTION:
+        raise ColumnarError(f"Expected an extraction file, got '{cols.kind}'")
+    strings = cols.strings
+    c = cols.columns
+    extra = cols.header.get("box_extra") or {}
+    boxes = {}
+    for r in range(len(cols)):
+        name = strings[c["name"][r]]
+        boxes[name] = {
+            "page": c["page"][r],
+            "raw_text": strings[c["raw_text"][r]],
+            "count_words": c["count_words"][r],
+            "box_denorm": [c["x0"][r], c["y0"][r], c["x1"][r], c["y1"][r]],
+            **extra.get(name, {}),
+        }
+    data = dict(cols.header["meta"])
+    data["boxes"] = boxes
+    data["full_text"] = strings[cols.header["full_text"]]
+    return data
+
+
+def is_columnar(path: str | Path) -> bool:
+    return Path(path).suffix.lower() == COLUMNAR_SUFFIX
+
+
+def load_extraction(path: str | Path) -> Optional[dict]:
+    # Extraction dict from a .cols or JSON file; None if the file does not exist.
+    if not is_columnar(path):
+        return load_json(path)
+    if not Path(path).exists():
+        return None
+    return load_extraction_columns(path)
+
+
+def save_extraction(extraction: dict, path: str | Path) -> Path:
+    # Columnar for a .cols path, pretty JSON otherwise.
+    if is_columnar(path):
+        return save_extraction_columns(extraction, path)
+    return save_json(extraction, path)
+
+
+# --- conversion -------------------------------------------------------------------
+
+
+def convert(src: str | Path, dst: Optional[str | Path] = None) -> Path:
+    # JSON -> .cols (layout or extraction, detected from the keys), or .cols ->
+    # JSON. dst defaults to src with the other suffix.
+    src = Path(src)
+    if is_columnar(src):
+        cols = ColumnarFile.load(src)
+        data = LayoutColumns(cols).to_dict() if cols.kind == LAYOUT else load_extraction_columns(src)
+        return save_json(data, dst or src.with_suffix(".json"))
+
+    data = load_json(src)
+    if not isinstance(data, dict):
+        raise ColumnarError(f"Cannot read JSON from {src}")
+    dst = dst or src.with_suffix(COLUMNAR_SUFFIX)
+    if "pages" in data:
+        return save_layout(data, dst)
+    if "boxes" in data:
+        return save_extraction_columns(data, dst)
+    raise ColumnarError(f"{src} is neither a layout nor an extraction JSON")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert layout/extraction JSON to the columnar format and back.")
+    ap.add_argument("files", nargs="+", help="JSON files, or .cols files with --to-json")
+    ap.add_argument("--to-json", action="store_true", help="Convert .cols files back to JSON")
+    ap.add_argument("--out", help="Output path (single input only)")
+    args = ap.parse_args()
+    if args.out and len(args.files) > 1:
+        ap.error("--out needs a single input file")
+
+    failed = 0
+    for src in args.files:
+        if args.to_json != is_columnar(src):
+            print(f"[ERROR] {src}: expected a {'.cols' if args.to_json else 'JSON'} file", file=sys.stderr)
+            failed += 1
+            continue
+        try:
+            out = convert(src, args.out)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] {src}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"[OK] {src} -> {out} ({Path(src).stat().st_size} -> {out.stat().st_size} bytes)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# extraction_cache.py
+# Content-addressed cache for extraction JSON.
+# Keys hash the PDF bytes, the template bytes, the extractor version and any
+# options, so a changed PDF or template is never served a stale extraction.
+
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+
+from json_SL import atomic_open
+
+DEFAULT_CACHE_DIR = Path(".cache") / "extraction"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    # Stream the file through SHA-256 without holding it in memory.
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(pdf_path, template_path: str | Path | None, extractor_version: str, **options) -> str:
+    # Combine content hashes and settings into one hex key. pdf_path may be a
+    # PdfSource, whose hash comes from its already mapped buffer; template_path may
+    # be a CompiledTemplate (e.g. from the template registry), hashed by content.
+    h = hashlib.sha256()
+    pdf_hash = pdf_path.sha256() if hasattr(pdf_path, "sha256") else file_sha256(pdf_path)
+    h.update(pdf_hash.encode("ascii"))
+    h.update(b"\0")
+    h.update(_template_digest(template_path).encode("ascii"))
+    h.update(b"\0")
+    h.update(extractor_version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _template_digest(template) -> str:
+    if not template:
+        return "-"
+    if hasattr(template, "sha256"):
+        return template.sha256()
+    return file_sha256(template)
+
+
+class ExtractionCache:
+    # Directory of <key>.json entries with least-recently-used eviction.
+    # A hit touches the entry's mtime, so eviction removes the oldest mtimes first
+    # once the total size passes max_bytes (or the count passes max_entries).
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: Optional[int] = None
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._count: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        # Two-character fan-out keeps directories small on large runs.
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        p = self._path(key)
+        try:
+            with p.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(p)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: dict) -> Path:
+        # Write atomically so concurrent workers never read a half-written entry.
+        # Overwriting a key replaces its entry, so the old size comes off the total.
+        p = self._path(key)
+        try:
+            old_size = p.stat().st_size
+        except FileNotFoundError:
+            old_size = None
+        with atomic_open(p) as f:
+            json.dump(data, f)
+
+        if self._size is not None:
+            self._size += p.stat().st_size - (old_size or 0)
+            self._count += 1 if old_size is None else 0
+        self._evict_if_needed()
+        return p
+
+    def _entries(self) -> list:
+        entries = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        # Sizes are tracked incrementally; the directory is only rescanned when a
+        # limit looks exceeded, then trimmed to 90% to avoid rescanning every put.
+        if self._size is None:
+            entries = self._entries()
+            self._size = sum(e[1] for e in entries)
+            self._count = len(entries)
+        over_size = self._size > self.max_bytes
+        over_count = self.max_entries is not None and self._count > self.max_entries
+        if not (over_size or over_count):
+            return
+
+        entries = sorted(self._entries())
+        size = sum(e[1] for e in entries)
+        count = len(entries)
+        size_target = int(self.max_bytes * 0.9)
+        count_target = int(self.max_entries * 0.9) if self.max_entries is not None else None
+        for _, entry_size, p in entries:
+            if size <= size_target and (count_target is None or count <= count_target):
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                continue
+            size -= entry_size
+            count -= 1
+            self.evictions += 1
+        self._size, self._count = size, count
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+_open: Dict[str, ExtractionCache] = {}
+
+
+def open_cache(root: str | Path = DEFAULT_CACHE_DIR) -> ExtractionCache:
+    # One ExtractionCache per directory per process, so its size tally is taken
+    # once (the first put scans the directory) and then kept up to date, instead
+    # of rescanning for every document of a batch.
+    key = str(Path(root).resolve())
+    if key not in _open:
+        _open[key] = ExtractionCache(root)
+    return _open[key]
@@ -0,0 +1,169 @@
+# incremental.py
+# Incremental re-validation: one small state file per document records the
+# extraction key (PDF + template + extractor version) and every check result,
+# keyed by a fingerprint of that check's inputs (kind, label, expected value, box).
+# On a re-run only checks with a new fingerprint, or all checks of a document
+# whose extraction key changed, are evaluated; the rest are reused as stored.
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+
+from extraction_cache import cache_key
+from json_SL import atomic_open
+from validation_spec import ValidationPlan
+from validations import box_checks, full_doc_checks
+
+DEFAULT_STATE_DIR = Path(".cache") / "state"
+
+
+def check_inputs(
+    expected_values: Dict[str, str],
+    box_mapping: Dict[str, List[str]],
+    aliases: Dict[str, str],
+    normalisation: Optional[list] = None
+) -> List[Tuple[str, str]]:
+    # (fingerprint, label) for every check full_doc_checks + box_checks would emit,
+    # in the same order. The label is what box_checks is called with on re-evaluation.
+    # normalisation: the plan's Normaliser.key(); part of value fingerprints when set.
+    out = []
+    for label, value in expected_values.items():
+        out.append((_fingerprint(["exists", label, value, None], normalisation), label))
+    for box_name, labels in box_mapping.items():
+        out.append((json.dumps(["box_present", None, None, box_name]), None))
+        for label in labels or []:
+            canon = aliases.get(label, label)
+            if canon in expected_values:
+                fp = _fingerprint(["in_box", canon, expected_values[canon], box_name], normalisation)
+            else:
+                fp = json.dumps(["expected_missing", label, canon, box_name])
+            out.append((fp, label))
+    return out
+
+
+def _fingerprint(parts: list, normalisation: Optional[list]) -> str:
+    return json.dumps(parts + [normalisation] if normalisation else parts)
+
+
+def evaluate_checks(
+    inputs: List[Tuple[str, str]],
+    data: dict,
+    plan: ValidationPlan,
+    expected_values: Dict[str, str]
+) -> Dict[str, dict]:
+    # Run the real check functions for just these inputs; returns {fingerprint: check}.
+    results: Dict[str, dict] = {}
+    exists = {}
+    per_box: Dict[str, List[Tuple[str, str]]] = {}
+    for fp, label in inputs:
+        kind, _, _, box_name = json.loads(fp)[:4]
+        if kind == "exists":
+            exists[label] = fp
+        else:
+            per_box.setdefault(box_name, []).append((fp, label))
+
+    shown = expected_values
+    expected_values, full_text, boxes, index = plan.prepare(data, expected_values)
+    if exists:
+        subset = {label: expected_values[label] for label in exists}
+        checks = full_doc_checks(subset, full_text, matcher=plan.matcher_for(subset), index=index, shown=shown)
+        results.update(zip(exists.values(), checks))
+
+    for box_name, items in per_box.items():
+        labels = [label for _, label in items if label is not None]
+        present, *label_checks = box_checks(expected_values, boxes, {box_name: labels}, plan.aliases, index=index,
+                                            shown=shown)
+        results[json.dumps(["box_present", None, None, box_name])] = present
+        results.update(zip((fp for fp, label in items if label is not None), label_checks))
+    return results
+
+
+class IncrementalState:
+    # Directory of per-document state files, named by a hash of the PDF path.
+
+    def __init__(self, root: str | Path = DEFAULT_STATE_DIR):
+        self.root = Path(root)
+        self.reused = 0
+        self.evaluated = 0
+
+    def _path(self, pdf_path: Path) -> Path:
+        digest = hashlib.sha1(str(pdf_path).encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def load(self, pdf_path: Path) -> Optional[dict]:
+        try:
+            with self._path(pdf_path).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, pdf_path: Path, state: dict) -> None:
+        # Atomic, like ExtractionCache.put, so an interrupted run leaves old state intact.
+        with atomic_open(self._path(pdf_path)) as f:
+            json.dump(state, f)
+
+    @staticmethod
+    def _stats(pdf_path: Path, tpl_path, extractor_version: str) -> dict:
+        # tpl_path may be a CompiledTemplate (registry entry), stamped by content hash.
+        pdf_st = pdf_path.stat()
+        if hasattr(tpl_path, "sha256"):
+            template = [tpl_path.doc_type, tpl_path.sha256()]
+        else:
+            tpl_st = tpl_path.stat()
+            template = [str(tpl_path), tpl_st.st_size, tpl_st.st_mtime_ns]
+        return {
+            "pdf": [pdf_st.st_size, pdf_st.st_mtime_ns],
+            "template": template,
+            "version": extractor_version,
+        }
+
+    def run(
+        self,
+        pdf_path: Path,
+        tpl_path: Path,
+        extractor_version: str,
+        plan: ValidationPlan,
+        overrides: Optional[dict],
+        load_data: Callable[[str], Optional[dict]],
+        source=None
+    ) -> Optional[List[dict]]:
+        # Return the checks for one document, evaluating only stale ones.
+        # load_data(extraction_key) is called at most once, and only when some
+        # check has to be evaluated; None from it means the extraction failed.
+        # The key is the extraction cache's; hashing is skipped when the PDF and
+        # template sizes and mtimes match what the previous run recorded.
+        # source: an open PdfSource for pdf_path, hashed from its buffer if needed.
+        state = self.load(pdf_path)
+        stats = self._stats(pdf_path, tpl_path, extractor_version)
+        if state and state.get("stats") == stats:
+            key = state["extraction_key"]
+        else:
+            key = cache_key(source or pdf_path, tpl_path, extractor_version)
+        expected_values, box_mapping, aliases = plan.expectations(overrides)
+        inputs = check_inputs(expected_values, box_mapping, aliases, plan.normaliser.key())
+
+        stored = {}
+        if state and state.get("extraction_key") == key:
+            stored = state.get("checks") or {}
+
+        stale = [(fp, label) for fp, label in inputs if fp not in stored]
+        results = {fp: stored[fp] for fp, _ in inputs if fp in stored}
+        if stale:
+            data = load_data(key)
+            if data is None:
+                return None
+            results.update(evaluate_checks(stale, data, plan, expected_values))
+
+        self.evaluated += len(stale)
+        self.reused += len(inputs) - len(stale)
+        self.save(pdf_path, {
+            "pdf": str(pdf_path),
+            "stats": stats,
+            "extraction_key": key,
+            "checks": results,
+        })
+        return [results[fp] for fp, _ in inputs]
+
+    def stats(self) -> dict:
+        return {"reused": self.reused, "evaluated": self.evaluated}
@@ -0,0 +1,204 @@
+# instrumentation.py
+# Lightweight per-stage timing and memory instrumentation.
+# Wrap work in `with stage("name", page=3):` or decorate functions with @timed().
+# Nothing is recorded until enable() is called; while disabled, stage() returns a
+# shared no-op context manager and @timed() adds one global lookup per call.
+# Each stage records wall time, CPU time, the process's peak RSS and, when memory
+# tracing is on, the tracemalloc peak reached inside the stage. Results export as
+# JSON or as Chrome trace events (chrome://tracing, Perfetto).
+
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource  # POSIX only
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class Recorder:
+    # Collects finished stages for this process.
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: List[dict] = []
+        self._open: List["_Stage"] = []
+        self._t0 = time.perf_counter_ns()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _harvest_peak(self) -> None:
+        # tracemalloc has one global peak; fold it into every open stage and
+        # reset it, so nested stages each see the peak of their own span.
+        if not self.trace_memory:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for s in self._open:
+            if peak > s.py_peak:
+                s.py_peak = peak
+        tracemalloc.reset_peak()
+
+    def summary(self) -> Dict[str, dict]:
+        # Totals per stage name, in first-seen order.
+        out: Dict[str, dict] = {}
+        for s in self.stages:
+            agg = out.setdefault(s["name"], {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "py_peak_kb": None})
+            agg["count"] += 1
+            agg["wall_ms"] += s["wall_ms"]
+            agg["cpu_ms"] += s["cpu_ms"]
+            if s.get("py_peak_kb") is not None:
+                agg["py_peak_kb"] = max(agg["py_peak_kb"] or 0, s["py_peak_kb"])
+        for agg in out.values():
+            agg["wall_ms"] = round(agg["wall_ms"], 3)
+            agg["cpu_ms"] = round(agg["cpu_ms"], 3)
+        return out
+
+    def to_json(self, path: str | Path) -> Path:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with p.open("w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages, "summary": self.summary()}, f, indent=2)
+        return p
+
+    def to_chrome_trace(self, path: str | Path) -> Path:
+        # Complete ("X") events; timestamps and durations in microseconds.
+        events = []
+        for s in self.stages:
+            args = dict(s.get("args") or {})
+            args.update({k: s[k] for k in ("cpu_ms", "rss_peak_kb", "py_peak_kb") if s.get(k) is not None})
+            events.append({
+                "name": s["name"],
+                "cat": "pipeline",
+                "ph": "X",
+                "ts": s["start_us"],
+                "dur": round(s["wall_ms"] * 1000, 3),
+                "pid": s["pid"],
+                "tid": s["tid"],
+                "args": args,
+            })
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with p.open("w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return p
+
+    def format_summary(self) -> str:
+        rows = [f"{'stage':<32} {'count':>5} {'wall ms':>10} {'cpu ms':>10} {'py peak KiB':>12}"]
+        for name, agg in self.summary().items():
+            peak = "" if agg["py_peak_kb"] is None else str(agg["py_peak_kb"])
+            rows.append(f"{name:<32} {agg['count']:>5} {agg['wall_ms']:>10.1f} {agg['cpu_ms']:>10.1f} {peak:>12}")
+        return "\n".join(rows)
+
+
+class _Stage:
+    __slots__ = ("rec", "name", "args", "wall0", "cpu0", "py_base", "py_peak")
+
+    def __init__(self, rec: Recorder, name: str, args: dict):
+        self.rec = rec
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        rec = self.rec
+        rec._harvest_peak()
+        self.py_base = tracemalloc.get_traced_memory()[0] if rec.trace_memory else 0
+        self.py_peak = self.py_base
+        rec._open.append(self)
+        self.cpu0 = time.process_time_ns()
+        self.wall0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        wall1 = time.perf_counter_ns()
+        cpu1 = time.process_time_ns()
+        rec = self.rec
+        rec._harvest_peak()
+        rec._open.remove(self)
+        record = {
+            "name": self.name,
+            "args": self.args,
+            "start_us": (self.wall0 - rec._t0) // 1000,
+            "wall_ms": (wall1 - self.wall0) / 1e6,
+            "cpu_ms": (cpu1 - self.cpu0) / 1e6,
+            "rss_peak_kb": _peak_rss_kb(),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "depth": len(rec._open),
+        }
+        if rec.trace_memory:
+            record["py_peak_kb"] = (self.py_peak - self.py_base) // 1024
+        rec.stages.append(record)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+_recorder: Optional[Recorder] = None
+
+
+def enable(trace_memory: bool = False) -> Recorder:
+    # Start recording in this process; trace_memory also starts tracemalloc,
+    # which slows allocation-heavy code noticeably, so it is opt-in.
+    global _recorder
+    _recorder = Recorder(trace_memory=trace_memory)
+    return _recorder
+
+
+def disable() -> Optional[Recorder]:
+    # Stop recording and return what was recorded.
+    global _recorder
+    rec, _recorder = _recorder, None
+    if rec is not None and rec.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return rec
+
+
+def recorder() -> Optional[Recorder]:
+    return _recorder
+
+
+def stage(name: str, **args):
+    rec = _recorder
+    if rec is None:
+        return _NULL_STAGE
+    return _Stage(rec, name, args)
+
+
+def timed(name: Optional[str] = None):
+    # Decorator form of stage(); the stage is named after the function by default.
+    def deco(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*a, **kw):
+            rec = _recorder
+            if rec is None:
+                return fn(*a, **kw)
+            with _Stage(rec, label, {}):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
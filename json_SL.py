@@ -1,10 +1,22 @@
-
 # json_SL.py
 # Simple JSON load/save helpers used across the pipeline.
+# NDJSON helpers stream one record per line for large extractions.
 
+from contextlib import contextmanager
 from pathlib import Path
 import json
-from typing import Any, Optional
+import os
+import time
+from typing import IO, Any, Iterator, Optional
+
+# Last record of a complete NDJSON stream; followers stop when they see it.
+END_RECORD = {"type": "end"}
+FOLLOW_TIMEOUT = 60.0
+
+
+class IncompleteStreamError(ValueError):
+    # An NDJSON stream ended (or its writer went quiet) before END_RECORD.
+    pass
 
 
 def load_json(path: str | Path) -> Optional[dict]:
@@ -16,10 +28,95 @@ def load_json(path: str | Path) -> Optional[dict]:
         return json.load(f)
 
 
-def save_json(obj: Any, path: str | Path) -> Path:
-    # Write obj to path as pretty JSON. Creates parents. Overwrites existing file.
+@contextmanager
+def atomic_open(path: str | Path, mode: str = "w") -> Iterator[IO]:
+    # Write to a per-process temp file next to path and move it into place on
+    # success, so readers (other workers, a later run) never see a half-written
+    # file. On an error the temp file is removed and path is left as it was.
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
+    tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open(mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+        os.replace(tmp, p)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def save_json(obj: Any, path: str | Path) -> Path:
+    # Write obj to path as pretty JSON. Creates parents. Overwrites existing file
+    # atomically, so concurrent readers see the old or the new content.
+    p = Path(path)
+    with atomic_open(p) as f:
         json.dump(obj, f, indent=2)
-   
+    return p
+
+
+class NdjsonWriter:
+    # Write one JSON record per line, flushed as it goes, so readers can consume
+    # the file while it is still being produced. close() appends END_RECORD.
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, record: dict) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self._f.write("\n")
+        self._f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.write(END_RECORD)
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the stream without END_RECORD so followers see it as incomplete.
+            self._f.close()
+
+
+def iter_ndjson(
+    path: str | Path,
+    follow: bool = False,
+    poll_interval: float = 0.2,
+    timeout: Optional[float] = FOLLOW_TIMEOUT
+) -> Iterator[dict]:
+    # Yield records one at a time, stopping at END_RECORD (which is not yielded).
+    # With follow=True, wait for a writer still producing the file instead of
+    # stopping at the current end; only complete lines are parsed. A stream that
+    # ends without END_RECORD (its writer failed) raises IncompleteStreamError:
+    # at end of file, or when following, after timeout seconds with no new data
+    # (None waits forever).
+    p = Path(path)
+    with p.open("r", encoding="utf-8") as f:
+        pending = ""
+        idle_since = time.monotonic()
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    raise IncompleteStreamError(f"{p} ends without an end record")
+                if timeout is not None and time.monotonic() - idle_since > timeout:
+                    raise IncompleteStreamError(f"{p}: no end record after {timeout:g}s without new data")
+                time.sleep(poll_interval)
+                continue
+            idle_since = time.monotonic()
+            pending += line
+            if not pending.endswith("\n"):
+                continue
+            record = json.loads(pending)
+            pending = ""
+            if record == END_RECORD:
+                return
+            yield record
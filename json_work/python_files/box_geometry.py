@@ -0,0 +1,204 @@
+# box_geometry.py
+# Pure-Python geometry helpers for mapping extracted words onto template boxes.
+# Kept free of PDF libraries so it can be reused and benchmarked in isolation.
+
+from math import sqrt
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python grid is used instead
+    np = None
+
+
+Rect = Tuple[float, float, float, float]
+
+# Below this many word x box pairs the grid is as fast as the NumPy path, whose
+# fixed cost is converting word dicts to arrays. The measured crossover is a few
+# hundred pairs (python -m benchmarks.bench_box_assignment --sweep).
+NUMPY_MIN_PAIRS = 500
+
+# Words per block when building the overlap matrix, to bound its memory.
+_NUMPY_BLOCK = 8192
+
+
+def _intersects(b: tuple, wdict: Dict) -> bool:
+    x0, y0, x1, y1 = b
+    return not (wdict["x1"] < x0 or wdict["x0"] > x1 or wdict["bottom"] < y0 or wdict["top"] > y1)
+
+
+def words_to_text(words: Sequence[Dict], y_tolerance: float = 3.0) -> str:
+    # Join words into lines (space-separated) and lines into text (newline-separated).
+    # Words arrive in extract_words() reading order; a new line starts when the top
+    # edge moves by more than y_tolerance, mirroring extract_text's default clustering.
+    lines: List[str] = []
+    current: List[str] = []
+    line_top = None
+    for wd in words:
+        top = wd["top"]
+        if line_top is not None and abs(top - line_top) > y_tolerance:
+            lines.append(" ".join(current))
+            current = []
+            line_top = None
+        if line_top is None:
+            line_top = top
+        current.append(wd["text"])
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+
+def assign_words_naive(words: Sequence[Dict], rects: Sequence[Rect]) -> List[List[Dict]]:
+    # Reference O(boxes x words) assignment; the grid path must match it exactly.
+    return [[wd for wd in words if _intersects(r, wd)] for r in rects]
+
+
+class BoxGrid:
+    # Uniform grid over the area covered by a page's boxes. Each cell lists the
+    # boxes touching it, so a word only needs exact tests against nearby boxes.
+    # Cell lookup is monotonic in each coordinate, which makes the candidate set a
+    # superset of the boxes _intersects accepts (edges touching count as overlap).
+
+    def __init__(self, rects: Sequence[Rect], cells_per_axis: int = 0):
+        self.rects = list(rects)
+        # Inverted rects never come out of the template builder, but _intersects
+        # still accepts some words for them, so they are always tested directly.
+        self._always = [i for i, r in enumerate(self.rects) if r[0] > r[2] or r[1] > r[3]]
+        good = [i for i, r in enumerate(self.rects) if r[0] <= r[2] and r[1] <= r[3]]
+
+        if not good:
+            self._n = 0
+            self._cells = []
+            return
+
+        self._xmin = min(self.rects[i][0] for i in good)
+        self._ymin = min(self.rects[i][1] for i in good)
+        self._xmax = max(self.rects[i][2] for i in good)
+        self._ymax = max(self.rects[i][3] for i in good)
+
+        n = cells_per_axis or max(1, int(sqrt(len(good)) * 2))
+        self._n = n
+        self._sx = n / ((self._xmax - self._xmin) or 1.0)
+        self._sy = n / ((self._ymax - self._ymin) or 1.0)
+
+        self._cells: List[List[int]] = [[] for _ in range(n * n)]
+        for i in good:
+            x0, y0, x1, y1 = self.rects[i]
+            cx0, cx1 = self._cx(x0), self._cx(x1)
+            cy0, cy1 = self._cy(y0), self._cy(y1)
+            for cy in range(cy0, cy1 + 1):
+                row = cy * n
+                for cx in range(cx0, cx1 + 1):
+                    self._cells[row + cx].append(i)
+
+    def _cx(self, x: float) -> int:
+        c = int((x - self._xmin) * self._sx)
+        return 0 if c < 0 else (self._n - 1 if c >= self._n else c)
+
+    def _cy(self, y: float) -> int:
+        c = int((y - self._ymin) * self._sy)
+        return 0 if c < 0 else (self._n - 1 if c >= self._n else c)
+
+    def assign(self, words: Sequence[Dict]) -> List[List[Dict]]:
+        # Return, per rect, the words overlapping it in their original order.
+        out: List[List[Dict]] = [[] for _ in self.rects]
+        rects = self.rects
+        cells = self._cells
+        n = self._n
+
+        for wd in words:
+            for i in self._always:
+                if _intersects(rects[i], wd):
+                    out[i].append(wd)
+            if not n:
+                continue
+
+            wx0, wx1, wtop, wbot = wd["x0"], wd["x1"], wd["top"], wd["bottom"]
+            if wx1 < self._xmin or wx0 > self._xmax or wbot < self._ymin or wtop > self._ymax:
+                continue
+
+            cx0, cx1 = self._cx(wx0), self._cx(wx1)
+            cy0, cy1 = self._cy(wtop), self._cy(wbot)
+            if cx0 == cx1 and cy0 == cy1:
+                candidates = cells[cy0 * n + cx0]
+            else:
+                seen = set()
+                for cy in range(cy0, cy1 + 1):
+                    row = cy * n
+                    for cx in range(cx0, cx1 + 1):
+                        seen.update(cells[row + cx])
+                candidates = seen
+
+            for i in candidates:
+                x0, y0, x1, y1 = rects[i]
+                if not (wx1 < x0 or wx0 > x1 or wbot < y0 or wtop > y1):
+                    out[i].append(wd)
+        return out
+
+
+def assign_words_to_boxes(words: Sequence[Dict], rects: Sequence[Rect]) -> List[List[Dict]]:
+    # Assign every word to every rect it overlaps in one pass over the words.
+    return BoxGrid(rects).assign(words)
+
+
+def _reading_key(wd: Dict) -> tuple:
+    return (wd["top"], wd["x0"])
+
+
+def assign_words_numpy(words: Sequence[Dict], rects: Sequence[Rect]) -> List[List[Dict]]:
+    # Vectorised assignment: the word x box overlap matrix is computed in blocks,
+    # then one lexsort orders every (box, word) pair by box, top, x0 and original
+    # word index, giving each box's words in reading order (ties keep word order,
+    # as the stable Python sort does).
+    if np is None:
+        raise RuntimeError("NumPy is not installed")
+    out: List[List[Dict]] = [[] for _ in rects]
+    if not words or not rects:
+        return out
+
+    n = len(words)
+    x0 = np.fromiter((wd["x0"] for wd in words), dtype=np.float64, count=n)
+    x1 = np.fromiter((wd["x1"] for wd in words), dtype=np.float64, count=n)
+    top = np.fromiter((wd["top"] for wd in words), dtype=np.float64, count=n)
+    bottom = np.fromiter((wd["bottom"] for wd in words), dtype=np.float64, count=n)
+    r = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    rx0, ry0, rx1, ry1 = r[:, 0], r[:, 1], r[:, 2], r[:, 3]
+
+    box_parts = []
+    word_parts = []
+    for start in range(0, n, _NUMPY_BLOCK):
+        sl = slice(start, start + _NUMPY_BLOCK)
+        # Same closed-interval test as _intersects, for a block of words at once.
+        miss = (x1[sl, None] < rx0) | (x0[sl, None] > rx1) | (bottom[sl, None] < ry0) | (top[sl, None] > ry1)
+        w_idx, b_idx = np.nonzero(~miss)
+        box_parts.append(b_idx)
+        word_parts.append(w_idx + start)
+
+    b_all = np.concatenate(box_parts)
+    w_all = np.concatenate(word_parts)
+    order = np.lexsort((w_all, x0[w_all], top[w_all], b_all))
+    b_sorted = b_all[order].tolist()
+    w_sorted = w_all[order].tolist()
+
+    for b, w in zip(b_sorted, w_sorted):
+        out[b].append(words[w])
+    return out
+
+
+def assign_reading_order(
+    words: Sequence[Dict],
+    rects: Sequence[Rect],
+    grid: Optional[BoxGrid] = None,
+    use_numpy: Optional[bool] = None
+) -> List[List[Dict]]:
+    # Per rect, the overlapping words sorted by (top, x0). use_numpy=None picks
+    # NumPy when it is installed and the page is large enough to pay off.
+    if use_numpy is None:
+        use_numpy = np is not None and len(words) * len(rects) >= NUMPY_MIN_PAIRS
+    if use_numpy:
+        return assign_words_numpy(words, rects)
+
+    assigned = (grid or BoxGrid(rects)).assign(words)
+    for in_box in assigned:
+        in_box.sort(key=_reading_key)
+    return assigned
@@ -2,13 +2,28 @@
 # json_work/python_files/build_template_from_pdf.py
 # Build a JSON template from rectangles drawn in a "boxes" PDF.
 # Exposes functions only; orchestrated by main.py.
+# fast=True streams each page's paths from PyMuPDF's raw drawing API and keeps
+# only box candidates as they arrive, instead of materialising every path with
+# get_drawings(), and drops rectangles that duplicate a kept one (the same box
+# drawn twice, or an inset border inside it). Box names stay
+# box_{page}_{drawing index} either way.
 
+from bisect import insort
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import json
 
-# PyMuPDF (fitz) is expected to be available in the runtime environment.
-import fitz  # type: ignore
+from instrumentation import stage, timed
+from json_SL import atomic_open
+from json_work.python_files.document_session import DocumentSession, open_session
+
+
+MIN_BOX_AREA = 1500
+# A rectangle is a duplicate when a kept one covers this share of the larger of
+# the two; smaller boxes nested inside a bigger one are separate fields.
+DUPLICATE_OVERLAP = 0.9
+
+Rect = Tuple[float, float, float, float]
 
 
 def _normalize_rect(rect, page_w: float, page_h: float) -> List[float]:
@@ -16,22 +31,63 @@ def _normalize_rect(rect, page_w: float, page_h: float) -> List[float]:
     return [rect.x0 / page_w, rect.y0 / page_h, rect.x1 / page_w, rect.y1 / page_h]
 
 
-def build_template_first_two_pages(pdf_path: str) -> Dict:
+@timed()
+def build_template(pdf_path: "str | DocumentSession", max_pages: Optional[int] = None, fast: bool = False) -> Dict:
+    # Create a template dict from the first max_pages pages of a "boxes" PDF
+    # (every page when None). pdf_path may also be an open DocumentSession
+    # (its PyMuPDF handle is reused). fast: see the module comment.
+    with stage("fitz.open"):
+        session = open_session(pdf_path)
+        session.fitz
+    try:
+        if fast:
+            return _build_template_fast(session, max_pages)
+        return _build_template(session, max_pages)
+    finally:
+        if session is not pdf_path:
+            session.close()
+
+
+def build_template_first_two_pages(pdf_path: "str | DocumentSession") -> Dict:
     # Create a template dict from the first two pages of a "boxes" PDF.
-    doc = fitz.open(pdf_path)
-    pages_to_process = min(2, len(doc))
-    template = {
-        "doc_type": Path(pdf_path).stem.replace("_boxes", ""),
+    return build_template(pdf_path, max_pages=2)
+
+
+def build_template_fast(pdf_path: "str | DocumentSession", max_pages: Optional[int] = None) -> Dict:
+    # Create a template dict from every page (or the first max_pages) in fast mode.
+    return build_template(pdf_path, max_pages=max_pages, fast=True)
+
+
+def _new_template(session: DocumentSession) -> Dict:
+    return {
+        "doc_type": session.path.stem.replace("_boxes", "") if session.path else "",
         "units": "normalized",
         "pages": []
     }
 
+
+def _field(page_index: int, idx: int, box_norm: List[float]) -> Dict:
+    return {
+        "name": f"box_{page_index}_{idx}",
+        "annotation_type": "RectangleDrawn",
+        "box": box_norm,
+        "extractor": "words",
+        "parsers": []
+    }
+
+
+def _build_template(session: DocumentSession, max_pages: Optional[int] = None) -> Dict:
+    pages_to_process = len(session) if max_pages is None else min(max_pages, len(session))
+    template = _new_template(session)
+
     for page_index in range(pages_to_process):
-        page = doc[page_index]
-        w, h = page.rect.width, page.rect.height
+        w, h = session.page_size(page_index)
         page_entry = {"page_num": page_index, "fields": [], "tables": []}
 
-        for idx, d in enumerate(page.get_drawings() or []):
+        with stage("get_drawings", page=page_index):
+            drawings = session.drawings(page_index)
+
+        for idx, d in enumerate(drawings):
             rect = d.get("rect")
             width = d.get("width")
             items = d.get("items", [])
@@ -44,28 +100,87 @@ def build_template_first_two_pages(pdf_path: str) -> Dict:
                 continue
 
             area = (rect.x1 - rect.x0) * (rect.y1 - rect.y0)
-            if area < 1500:
+            if area < MIN_BOX_AREA:
                 continue
 
-            box_norm = _normalize_rect(rect, w, h)
-            page_entry["fields"].append({
-                "name": f"box_{page_index}_{idx}",
-                "annotation_type": "RectangleDrawn",
-                "box": box_norm,
-                "extractor": "words",
-                "parsers": []
-            })
+            page_entry["fields"].append(_field(page_index, idx, _normalize_rect(rect, w, h)))
+
+        template["pages"].append(page_entry)
+
+    return template
+
+
+def _build_template_fast(session: DocumentSession, max_pages: Optional[int] = None) -> Dict:
+    pages_to_process = len(session) if max_pages is None else min(max_pages, len(session))
+    template = _new_template(session)
+
+    for page_index in range(pages_to_process):
+        w, h = session.page_size(page_index)
+        page_entry = {"page_num": page_index, "fields": [], "tables": []}
+
+        with stage("get_cdrawings", page=page_index):
+            boxes = _page_boxes(session, page_index)
+
+        for idx, (x0, y0, x1, y1) in boxes:
+            page_entry["fields"].append(_field(page_index, idx, [x0 / w, y0 / h, x1 / w, y1 / h]))
 
         template["pages"].append(page_entry)
 
     return template
 
 
-def write_template_for_boxes_pdf(pdf_path: str, out_path: Path) -> Path:
-    # Build and write the template JSON to out_path.
-    template = build_template_first_two_pages(pdf_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
+def _page_boxes(session: DocumentSession, page_index: int) -> List[Tuple[int, Rect]]:
+    # (drawing index, rect) of the page's box rectangles, duplicates dropped;
+    # the same paths _build_template keeps: stroked, with a 're' item, large.
+    boxes: List[Tuple[int, Rect]] = []
+    count = 0
+
+    def visit(d: dict) -> None:
+        nonlocal count
+        idx = count
+        count += 1
+        if d.get("width") is None:
+            return
+        x0, y0, x1, y1 = d["rect"]
+        if (x1 - x0) * (y1 - y0) < MIN_BOX_AREA:
+            return
+        if any(it[0] == "re" for it in d["items"]):
+            boxes.append((idx, (x0, y0, x1, y1)))
+
+    session.each_drawing(page_index, visit)
+    return _dedupe(boxes)
+
+
+def _dedupe(boxes: List[Tuple[int, Rect]]) -> List[Tuple[int, Rect]]:
+    # Keep boxes in drawing order, skipping any that a kept box already covers
+    # (DUPLICATE_OVERLAP of the larger area). Kept boxes are sorted by x0 so only
+    # those starting left of a candidate's right edge are compared.
+    kept: List[Tuple[int, Rect]] = []
+    by_x0: List[Tuple[float, Rect]] = []
+    for idx, rect in boxes:
+        x0, y0, x1, y1 = rect
+        area = (x1 - x0) * (y1 - y0)
+        duplicate = False
+        for kx0, (_, ky0, kx1, ky1) in by_x0:
+            if kx0 >= x1:
+                break
+            iw = min(x1, kx1) - max(x0, kx0)
+            ih = min(y1, ky1) - max(y0, ky0)
+            if iw > 0 and ih > 0 and iw * ih >= DUPLICATE_OVERLAP * max(area, (kx1 - kx0) * (ky1 - ky0)):
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append((idx, rect))
+            insort(by_x0, (x0, rect))
+    return kept
+
+
+def write_template_for_boxes_pdf(pdf_path: "str | DocumentSession", out_path: Path, fast: bool = False) -> Path:
+    # Build and write the template JSON to out_path (first two pages; every page
+    # in fast mode). Atomic: batch workers missing the same template each build
+    # it, and one may load it while another is still writing.
+    template = build_template_fast(pdf_path) if fast else build_template_first_two_pages(pdf_path)
+    with atomic_open(out_path) as f:
         json.dump(template, f, indent=2)
     return out_path
 
@@ -0,0 +1,182 @@
+# compiled_template.py
+# Load a boxes template once and reuse it across documents.
+# Field boxes are held in flat float arrays; denormalised rectangles and their grid
+# index are cached per (page, width, height), so repeated documents of the same
+# type skip both the JSON parse and the per-field denormalisation.
+# A pickled copy next to a JSON template (<template>.pkl) starts workers faster;
+# write it with:
+#   python -m json_work.python_files.compiled_template json_work/json_files/*_boxes_template.json
+
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import hashlib
+import json
+import pickle
+import sys
+
+from json_SL import atomic_open
+from json_work.python_files.box_geometry import BoxGrid, Rect, assign_reading_order
+
+BINARY_SUFFIX = ".pkl"
+
+
+class CompiledPage:
+    __slots__ = ("page_num", "names", "coords")
+
+    def __init__(self, page_num: int, names: Sequence[str], coords: array):
+        self.page_num = page_num
+        self.names = tuple(names)
+        # Normalised boxes, four doubles per field: x0, y0, x1, y1.
+        self.coords = coords
+
+    def __getstate__(self):
+        return (self.page_num, self.names, self.coords)
+
+    def __setstate__(self, state):
+        self.page_num, self.names, self.coords = state
+
+
+class CompiledTemplate:
+
+    def __init__(self, doc_type: Optional[str], units: Optional[str], pages: List[CompiledPage]):
+        self.doc_type = doc_type
+        self.units = units
+        self.pages = pages
+        self._rects: Dict[Tuple[int, float, float], List[Rect]] = {}
+        self._grids: Dict[Tuple[int, float, float], BoxGrid] = {}
+        self._sha256: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, template: Dict) -> "CompiledTemplate":
+        pages = []
+        for page_entry in template.get("pages", []):
+            fields = page_entry.get("fields", [])
+            coords = array("d")
+            for field in fields:
+                coords.extend(field["box"][:4])
+            pages.append(CompiledPage(page_entry["page_num"], [f["name"] for f in fields], coords))
+        return cls(template.get("doc_type"), template.get("units"), pages)
+
+    @classmethod
+    def from_json(cls, path: str | Path) -> "CompiledTemplate":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def rects(self, page_index: int, w: float, h: float) -> List[Rect]:
+        # Absolute rectangles for one compiled page, in field order.
+        key = (page_index, w, h)
+        cached = self._rects.get(key)
+        if cached is None:
+            c = self.pages[page_index].coords
+            cached = [(c[i] * w, c[i + 1] * h, c[i + 2] * w, c[i + 3] * h) for i in range(0, len(c), 4)]
+            self._rects[key] = cached
+        return cached
+
+    def assign(self, page_index: int, words: Sequence[Dict], w: float, h: float) -> List[Tuple[str, Rect, List[Dict]]]:
+        # Map words onto the page's fields: (name, rect, words in reading order).
+        key = (page_index, w, h)
+        grid = self._grids.get(key)
+        if grid is None:
+            grid = BoxGrid(self.rects(page_index, w, h))
+            self._grids[key] = grid
+
+        assigned = assign_reading_order(words, grid.rects, grid=grid)
+        return list(zip(self.pages[page_index].names, grid.rects, assigned))
+
+    def sha256(self) -> str:
+        # Hash of the template content (doc type, units, field names and boxes), so a
+        # template with no file of its own (e.g. a registry entry) can key caches.
+        if self._sha256 is None:
+            h = hashlib.sha256(json.dumps([self.doc_type, self.units]).encode("utf-8"))
+            for page in self.pages:
+                h.update(json.dumps([page.page_num, page.names]).encode("utf-8"))
+                h.update(page.coords.tobytes())
+            self._sha256 = h.hexdigest()
+        return self._sha256
+
+    def __getstate__(self):
+        # Caches depend on page sizes seen at runtime; they are not persisted.
+        return {"doc_type": self.doc_type, "units": self.units, "pages": self.pages}
+
+    def __setstate__(self, state):
+        self.__init__(state["doc_type"], state["units"], state["pages"])
+
+    def save_binary(self, path: str | Path) -> Path:
+        # Pickled form for fast startup in long-running workers (trusted files only).
+        # Atomic, so a worker loading it never sees a half-written file.
+        p = Path(path)
+        with atomic_open(p, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return p
+
+    @classmethod
+    def load_binary(cls, path: str | Path) -> "CompiledTemplate":
+        with open(path, "rb") as f:
+            obj = pickle.load(f)
+        if not isinstance(obj, cls):
+            raise TypeError(f"{path} does not contain a CompiledTemplate")
+        return obj
+
+
+_loaded: Dict[str, Tuple[Tuple[int, int], CompiledTemplate]] = {}
+
+
+def load_template(path: str | Path) -> CompiledTemplate:
+    # Return the compiled template for a .json or .pkl path, reusing the copy
+    # already loaded in this process unless the file changed on disk.
+    p = Path(path).resolve()
+    st = p.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _loaded.get(str(p))
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+
+    if p.suffix == BINARY_SUFFIX:
+        tpl = CompiledTemplate.load_binary(p)
+    else:
+        tpl = CompiledTemplate.from_json(p)
+    _loaded[str(p)] = (stamp, tpl)
+    return tpl
+
+
+def binary_path_for(json_path: str | Path) -> Path:
+    return Path(json_path).with_suffix(BINARY_SUFFIX)
+
+
+def fresh_binary(json_path: str | Path) -> Optional[Path]:
+    # The pickled copy of a JSON template when it is at least as new as the JSON
+    # (or the JSON is gone); None when there is none or it is stale, e.g. after
+    # the JSON template was edited.
+    json_p = Path(json_path)
+    bin_p = binary_path_for(json_p)
+    if not bin_p.exists():
+        return None
+    if json_p.exists() and bin_p.stat().st_mtime_ns < json_p.stat().st_mtime_ns:
+        return None
+    return bin_p
+
+
+def write_binary(json_path: str | Path) -> Path:
+    # Compile a JSON template and save its pickled copy next to it.
+    return CompiledTemplate.from_json(json_path).save_binary(binary_path_for(json_path))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write the pickled copy (<template>.pkl) of JSON templates.")
+    ap.add_argument("templates", nargs="+", help="JSON template files")
+    args = ap.parse_args()
+
+    failed = 0
+    for path in args.templates:
+        try:
+            print(f"[OK] Wrote {write_binary(path)}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] {path}: {e}", file=sys.stderr)
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# doc_classifier.py
+# Work out a PDF's doc type from page 1 alone, for files whose name says nothing
+# (e.g. a spooled "job_8812.pdf"). Two cheap fingerprints, tried in order:
+#   1. the reference code printed on the letter, e.g. "UMS025/289733/1/0" -> UMS025;
+#   2. the page's vector layout: drawing rectangles, normalised to the page and
+#      quantised, compared by Jaccard similarity with the layouts the template
+#      registry learned from sample documents.
+# Only page 1 is opened, with PyMuPDF and text-only flags, so a call takes a few
+# milliseconds and no extraction is done.
+#
+#   python -m json_work.python_files.doc_classifier job_8812.pdf --registry templates.registry.pkl
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple
+
+from json_work.python_files.pdf_input import PdfSource, as_source
+
+# Doc type prefix followed by at least two "/<number>" parts.
+REFERENCE_RE = re.compile(r"\b([A-Z]{2,6}\d{2,4})(?:/\d+){2,}")
+
+# Layout grid: normalised coordinates are rounded to 1/LAYOUT_STEPS of the page.
+LAYOUT_STEPS = 100
+# Rectangles smaller than this (points, both sides) are ignored as noise.
+MIN_RECT_SIDE = 4.0
+MIN_LAYOUT_SCORE = 0.6
+
+Signature = FrozenSet[Tuple[int, int, int, int]]
+
+
+class Classification(NamedTuple):
+    doc_type: str
+    method: str  # "reference" or "layout"
+    score: float
+
+
+def _open_first_page(source: PdfSource):
+    import fitz  # type: ignore
+    doc = fitz.open(stream=source.buffer, filetype="pdf")
+    if len(doc) == 0:
+        doc.close()
+        return None, None
+    return doc, doc[0]
+
+
+def _page_signature(page) -> Signature:
+    w, h = page.rect.width, page.rect.height
+    cells = set()
+    for d in page.get_cdrawings():
+        x0, y0, x1, y1 = d["rect"]
+        if x1 - x0 < MIN_RECT_SIDE and y1 - y0 < MIN_RECT_SIDE:
+            continue
+        cells.add((round(x0 / w * LAYOUT_STEPS), round(y0 / h * LAYOUT_STEPS),
+                   round(x1 / w * LAYOUT_STEPS), round(y1 / h * LAYOUT_STEPS)))
+    return frozenset(cells)
+
+
+def layout_signature(pdf) -> Signature:
+    # Quantised drawing rectangles of page 1; pdf is a path or a PdfSource.
+    src = as_source(pdf)
+    try:
+        doc, page = _open_first_page(src)
+        if doc is None:
+            return frozenset()
+        try:
+            return _page_signature(page)
+        finally:
+            doc.close()
+    finally:
+        if src is not pdf:
+            src.close()
+
+
+def jaccard(a: Signature, b: Signature) -> float:
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def reference_doc_type(text: str) -> Optional[str]:
+    match = REFERENCE_RE.search(text or "")
+    return match.group(1) if match else None
+
+
+class DocClassifier:
+
+    def __init__(self, doc_types: Iterable[str], layouts: Optional[Dict[str, Signature]] = None,
+                 min_score: float = MIN_LAYOUT_SCORE):
+        # doc_types: the types a template exists for; a reference code naming any
+        # other type is ignored. layouts: doc_type -> page-1 signature.
+        self.doc_types = set(doc_types)
+        self.layouts = dict(layouts or {})
+        self.doc_types.update(self.layouts)
+        self.min_score = min_score
+
+    @classmethod
+    def from_registry(cls, registry) -> "DocClassifier":
+        return cls(registry.doc_types(), registry.layouts())
+
+    @classmethod
+    def from_folder(cls, json_dir: str | Path) -> "DocClassifier":
+        # Doc types that have a template file (no layouts, so reference codes only).
+        types = set()
+        for tpl in Path(json_dir).glob("*_boxes_template.*"):
+            types.add(tpl.name.split("_boxes_template")[0])
+        return cls(types)
+
+    def classify(self, pdf) -> Optional[Classification]:
+        # pdf: a path or a PdfSource. None when neither fingerprint is conclusive.
+        src = as_source(pdf)
+        try:
+            doc, page = _open_first_page(src)
+            if doc is None:
+                return None
+            try:
+                import fitz  # type: ignore
+                found = reference_doc_type(page.get_text(flags=fitz.TEXTFLAGS_WORDS))
+                if found in self.doc_types:
+                    return Classification(found, "reference", 1.0)
+                if not self.layouts:
+                    return None
+                signature = _page_signature(page)
+            finally:
+                doc.close()
+        finally:
+            if src is not pdf:
+                src.close()
+
+        best, best_score = None, 0.0
+        for doc_type, known in self.layouts.items():
+            score = jaccard(signature, known)
+            if score > best_score:
+                best, best_score = doc_type, score
+        if best is None or best_score < self.min_score:
+            return None
+        return Classification(best, "layout", round(best_score, 3))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Guess the doc type of PDFs from page 1.")
+    ap.add_argument("pdfs", nargs="+")
+    ap.add_argument("--registry", help="Template registry (adds layout matching)")
+    ap.add_argument("--json-dir", default=str(Path("json_work") / "json_files"),
+                    help="Folder of template files, used without --registry")
+    args = ap.parse_args()
+
+    if args.registry:
+        from json_work.python_files.template_registry import load_registry
+        classifier = DocClassifier.from_registry(load_registry(args.registry))
+    else:
+        classifier = DocClassifier.from_folder(args.json_dir)
+
+    unknown = 0
+    for pdf in args.pdfs:
+        t0 = time.perf_counter()
+        result = classifier.classify(pdf)
+        ms = (time.perf_counter() - t0) * 1000
+        if result is None:
+            unknown += 1
+            print(f"[ERROR] {pdf}: unknown doc type ({ms:.1f} ms)")
+        else:
+            print(f"[OK] {pdf}: {result.doc_type} by {result.method} (score {result.score}, {ms:.1f} ms)")
+    sys.exit(1 if unknown else 0)
+
+
+if __name__ == "__main__":
+    main()
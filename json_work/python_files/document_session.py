@@ -0,0 +1,171 @@
+# document_session.py
+# One shared handle per document.
+# The file is memory-mapped once (see pdf_input.PdfSource); pdfplumber (text,
+# words, tables, line layout) and PyMuPDF (drawings) both parse from that buffer,
+# each only when first asked for, so a caller that needs text and drawings pays
+# one read and one xref parse per library instead of reopening the path for every step.
+
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from json_work.python_files.lazy_document import LazyDocument, resolve_pages
+from json_work.python_files.pdf_input import PdfSource, as_source
+
+# Words further apart than this (in points) on one line start a new layout item,
+# so side-by-side columns stay separate.
+LAYOUT_GAP = 12.0
+
+
+class DocumentSession:
+
+    def __init__(self, source, max_pages: int = 4):
+        # source: a path, a PdfSource, PDF bytes/memoryview, or a binary file-like object.
+        # A PdfSource passed in stays open after close(); one created here is closed.
+        if hasattr(source, "read"):
+            source = source.read()
+        self._owns_source = not isinstance(source, PdfSource)
+        self.source = as_source(source)
+        self.path: Optional[Path] = self.source.path
+        self.max_pages = max_pages
+        self._plumber: Optional[LazyDocument] = None
+        self._fitz = None
+        self._error: Optional[Exception] = None
+
+    # --- parsers, opened on first use --------------------------------------
+
+    @property
+    def plumber(self) -> LazyDocument:
+        if self._plumber is None:
+            self._plumber = LazyDocument(self.source.stream(), max_pages=self.max_pages)
+        return self._plumber
+
+    @property
+    def fitz(self):
+        if self._fitz is None:
+            import fitz  # type: ignore
+            self._fitz = fitz.open(stream=self.source.buffer, filetype="pdf")
+        return self._fitz
+
+    def is_valid(self) -> bool:
+        # Readable PDF with at least one page, judged by whichever parser is
+        # already open (pdfplumber if neither is); replaces a separate pypdf pass.
+        if self._error is not None:
+            return False
+        try:
+            if self._plumber is None and self._fitz is not None:
+                return self._fitz.is_pdf and len(self._fitz) > 0
+            return len(self.plumber) > 0
+        except Exception as e:
+            self._error = e
+            return False
+
+    @property
+    def error(self) -> Optional[Exception]:
+        return self._error
+
+    # --- content ---------------------------------------------------------------
+
+    def __len__(self) -> int:
+        if self._plumber is None and self._fitz is not None:
+            return len(self._fitz)
+        return len(self.plumber)
+
+    def page(self, index: int):
+        # The pdfplumber page (0-based), parsed on first use.
+        return self.plumber.page(index)
+
+    def release(self, index: int) -> None:
+        if self._plumber is not None:
+            self._plumber.release(index)
+
+    def words(self, index: int) -> List[dict]:
+        return self.page(index).extract_words() or []
+
+    def text(self, index: int) -> str:
+        return self.page(index).extract_text() or ""
+
+    def tables(self, index: int) -> list:
+        return self.page(index).extract_tables() or []
+
+    def drawings(self, index: int) -> list:
+        return self.fitz[index].get_drawings() or []
+
+    def each_drawing(self, index: int, callback: Callable[[dict], None]) -> None:
+        # Stream the page's paths to callback as PyMuPDF's raw dicts (plain
+        # tuples for rects and points, no style defaults filled in), in the
+        # same order as drawings(), without building the list.
+        self.fitz[index].get_cdrawings(callback=callback)
+
+    def page_size(self, index: int) -> tuple:
+        # (width, height) from whichever parser is open, preferring PyMuPDF's
+        # page box when drawings are in use.
+        if self._fitz is not None:
+            rect = self._fitz[index].rect
+            return rect.width, rect.height
+        page = self.page(index)
+        return page.width, page.height
+
+    def lines_layout(self, pages: Optional[Iterable[int]] = None) -> Dict[str, list]:
+        # Text items per page in the layout JSON shape used under simpler/:
+        # {"pages": [{"pageNumber", "rotation", "textItems": [{"text", "x", "y", "page"}]}]}
+        # x is the item's left edge and y its baseline from the page bottom.
+        # pages: optional 1-based page numbers (negative counts from the end).
+        out = []
+        for index, page in self.plumber.iter_pages(resolve_pages(pages, len(self))):
+            items = []
+            for line in _group_lines(page.extract_words() or []):
+                for run in _split_runs(line):
+                    items.append({
+                        "text": " ".join(w["text"] for w in run),
+                        "x": round(run[0]["x0"], 3),
+                        "y": round(page.height - run[0]["bottom"], 3),
+                        "page": index + 1,
+                    })
+            out.append({"pageNumber": index + 1, "rotation": page.rotation or 0, "textItems": items})
+        return {"pages": out}
+
+    def close(self) -> None:
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        if self._fitz is not None:
+            self._fitz.close()
+            self._fitz = None
+        if self._owns_source:
+            self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _group_lines(words: List[dict], y_tolerance: float = 3.0) -> List[List[dict]]:
+    # Words whose tops are within y_tolerance form one line, sorted left to right.
+    lines: List[List[dict]] = []
+    for w in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if lines and abs(w["top"] - lines[-1][0]["top"]) <= y_tolerance:
+            lines[-1].append(w)
+        else:
+            lines.append([w])
+    for line in lines:
+        line.sort(key=lambda w: w["x0"])
+    return lines
+
+
+def _split_runs(line: List[dict]) -> List[List[dict]]:
+    runs = [[line[0]]]
+    for w in line[1:]:
+        if w["x0"] - runs[-1][-1]["x1"] > LAYOUT_GAP:
+            runs.append([w])
+        else:
+            runs[-1].append(w)
+    return runs
+
+
+def open_session(source, max_pages: int = 4) -> DocumentSession:
+    # Pass sessions through untouched, so helpers can take a path or a session.
+    if isinstance(source, DocumentSession):
+        return source
+    return DocumentSession(source, max_pages=max_pages)
@@ -0,0 +1,187 @@
+# extract_backends.py
+# Pluggable text extraction backends.
+# A backend opens a PdfSource and answers, per 0-based page: page size, words
+# (dicts with text/x0/x1/top/bottom, as pdfplumber's extract_words returns) and
+# full text. Box assignment and the JSON layout stay in the callers, so both
+# backends produce the same boxes/full_text structure.
+#   pdfplumber - reference backend; slower, but the one the templates were tuned on.
+#   pymupdf    - PyMuPDF text; a fraction of pdfplumber's parse time. Word tops are
+#                derived from the span baseline the way pdfminer computes them, and
+#                words come in extract_words' line order, so reading order, line
+#                grouping and the text built from words (layout_text=False) match
+#                pdfplumber. tests/test_backends.py holds the two to the same
+#                full_text, boxes and check outcomes.
+
+from typing import Dict, List, Tuple
+
+from json_work.python_files.lazy_document import LazyDocument
+from json_work.python_files.pdf_input import PdfSource
+
+DEFAULT_BACKEND = "pymupdf"
+
+# Same defaults as pdfplumber's extract_words / extract_text.
+X_TOLERANCE = 3.0
+Y_TOLERANCE = 3.0
+
+
+class ExtractorBackend:
+    # Interface shared by the backends; pages are 0-based.
+    name = ""
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        raise NotImplementedError
+
+    def words(self, index: int) -> List[Dict]:
+        raise NotImplementedError
+
+    def text(self, index: int) -> str:
+        raise NotImplementedError
+
+    def release(self, index: int) -> None:
+        # Drop whatever was parsed for the page.
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PdfplumberBackend(ExtractorBackend):
+    name = "pdfplumber"
+
+    def __init__(self, source: PdfSource, max_pages: int = 4):
+        self._doc = LazyDocument(source.stream(), max_pages=max_pages)
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        page = self._doc.page(index)
+        return page.width, page.height
+
+    def words(self, index: int) -> List[Dict]:
+        return self._doc.page(index).extract_words() or []
+
+    def text(self, index: int) -> str:
+        return self._doc.page(index).extract_text() or ""
+
+    def release(self, index: int) -> None:
+        self._doc.release(index)
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+class PymupdfBackend(ExtractorBackend):
+    name = "pymupdf"
+
+    def __init__(self, source: PdfSource, max_pages: int = 4):
+        import fitz  # type: ignore
+        self._doc = fitz.open(stream=source.buffer, filetype="pdf")
+        # Words of the pages in use, so text() reuses the words() pass.
+        self._words: Dict[int, List[Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        rect = self._doc[index].rect
+        return rect.width, rect.height
+
+    def words(self, index: int) -> List[Dict]:
+        # In pdfplumber's extract_words order (lines top to bottom, each left to
+        # right), so text built from the words (layout_text=False) matches too.
+        words = self._words.get(index)
+        if words is None:
+            words = self._words[index] = [wd for line in _lines(_page_words(self._doc[index])) for wd in line]
+        return words
+
+    def text(self, index: int) -> str:
+        return cluster_text(self.words(index))
+
+    def release(self, index: int) -> None:
+        self._words.pop(index, None)
+
+    def close(self) -> None:
+        self._words.clear()
+        self._doc.close()
+
+
+BACKENDS = {
+    PdfplumberBackend.name: PdfplumberBackend,
+    PymupdfBackend.name: PymupdfBackend,
+}
+
+
+def open_backend(name: str, source: PdfSource, max_pages: int = 4) -> ExtractorBackend:
+    # The caller keeps ownership of source and closes it after the backend.
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extraction backend: {name} (choose from {', '.join(BACKENDS)})") from None
+    return cls(source, max_pages=max_pages)
+
+
+def _page_words(page) -> List[Dict]:
+    # Words from PyMuPDF's per-character output, split on whitespace and on gaps
+    # wider than X_TOLERANCE, as pdfplumber does. get_text("words") boxes use the
+    # font ascender, which differs per font, so words on one visual line get
+    # different tops and sort out of order; pdfminer's box is baseline-based
+    # (top = baseline - size - descent), and that is what is reproduced here.
+    # Text-only flags (those of get_text("words")): rawdict's default also decodes
+    # every image on the page, which costs more than the text itself.
+    import fitz  # type: ignore
+    out: List[Dict] = []
+    for block in page.get_text("rawdict", flags=fitz.TEXTFLAGS_WORDS)["blocks"]:
+        for line in block.get("lines", ()):
+            current = None
+            for span in line["spans"]:
+                size = span["size"]
+                top = round(span["origin"][1] - size * (1 + span["descender"]), 3)
+                bottom = round(top + size, 3)
+                for ch in span["chars"]:
+                    c = ch["c"]
+                    if c.isspace():
+                        if current is not None:
+                            out.append(current)
+                            current = None
+                        continue
+                    x0, _, x1, _ = ch["bbox"]
+                    if current is not None and x0 - current["x1"] <= X_TOLERANCE:
+                        current["text"] += c
+                        current["x1"] = max(current["x1"], x1)
+                        current["top"] = min(current["top"], top)
+                        current["bottom"] = max(current["bottom"], bottom)
+                    else:
+                        if current is not None:
+                            out.append(current)
+                        current = {"text": c, "x0": x0, "x1": x1, "top": top, "bottom": bottom}
+            if current is not None:
+                out.append(current)
+    return out
+
+
+def _lines(words: List[Dict], y_tolerance: float = Y_TOLERANCE) -> List[List[Dict]]:
+    # pdfplumber's line clustering: words sorted by top, a new line when the top
+    # jumps by more than y_tolerance, each line read left to right.
+    lines: List[List[Dict]] = []
+    last_top = None
+    for wd in sorted(words, key=lambda w: w["top"]):
+        if last_top is None or wd["top"] - last_top > y_tolerance:
+            lines.append([])
+        lines[-1].append(wd)
+        last_top = wd["top"]
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+
+def cluster_text(words: List[Dict], y_tolerance: float = Y_TOLERANCE) -> str:
+    # pdfplumber's extract_text() line building over _lines.
+    return "\n".join(" ".join(w["text"] for w in line) for line in _lines(words, y_tolerance))
@@ -1,73 +1,203 @@
 
 # json_work/python_files/extract_boxes_to_json.py
 from pathlib import Path
-from typing import Dict, List
+from typing import Iterator, List, Optional, Sequence
 import json
-import pdfplumber 
 
+from columnar import is_columnar, save_extraction_columns
+from instrumentation import stage, timed
+from json_SL import atomic_open
+from json_work.python_files.box_geometry import words_to_text
+from json_work.python_files.compiled_template import CompiledTemplate, load_template
+from json_work.python_files.extract_backends import DEFAULT_BACKEND, ExtractorBackend, open_backend
+from json_work.python_files.page_shards import map_page_shards
+from json_work.python_files.pdf_input import PdfSource
+from normalise import Normaliser
+from token_index import TokenIndex
 
-def _denorm(box: List[float], w: float, h: float) -> tuple:
-    return (box[0] * w, box[1] * h, box[2] * w, box[3] * h)
+# Bump whenever the extraction output changes, so cached results are invalidated.
+EXTRACTOR_VERSION = "boxes-3"
 
 
-def _intersects(b: tuple, wdict: Dict) -> bool:
-    x0, y0, x1, y1 = b
-    return not (wdict["x1"] < x0 or wdict["x0"] > x1 or wdict["bottom"] < y0 or wdict["top"] > y1)
+def _load_template(template: "str | Path | CompiledTemplate") -> CompiledTemplate:
+    if isinstance(template, CompiledTemplate):
+        return template
+    return load_template(template)
 
 
-def extract_to_json(pdf_path: str, template_path: str, out_path: Path, overwrite: bool = True) -> Path:
-    # Load template
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = json.load(f)
+def _iter_pages(
+    pdf: ExtractorBackend,
+    template: CompiledTemplate,
+    layout_text: bool,
+    page_indices: Optional[Sequence[int]] = None
+):
+    # Yield (page_num, page_text, {box_name: box_result}) per template page
+    # (or only the template pages listed in page_indices). Only template pages
+    # are parsed. One pass per page shares the parsed characters between full
+    # text and boxes, then drops the page's caches.
+    if page_indices is None:
+        page_indices = range(len(template.pages))
+    for page_index in page_indices:
+        pnum = template.pages[page_index].page_num
+        with stage("extract_page", page=pnum):
+            w, h = pdf.page_size(pnum)
+            with stage("extract_words", page=pnum):
+                words = pdf.words(pnum)
+
+            with stage("extract_text", page=pnum):
+                if layout_text:
+                    text = pdf.text(pnum)
+                else:
+                    text = words_to_text(words)
+
+            boxes = {}
+            with stage("assign_boxes", page=pnum):
+                for name, (x0, y0, x1, y1), in_box in template.assign(page_index, words, w, h):
+                    box_text = " ".join(wd["text"] for wd in in_box).strip()
+
+                    boxes[name] = {
+                        "page": pnum,
+                        "raw_text": box_text,
+                        "count_words": len(in_box),
+                        "box_denorm": [x0, y0, x1, y1]
+                    }
+
+            pdf.release(pnum)
+        yield pnum, text, boxes
+
+
+def _extract_page_shard(
+    page_indices: List[int],
+    pdf_path,
+    template: CompiledTemplate,
+    layout_text: bool,
+    backend: str
+) -> list:
+    # Worker entry point: open the PDF in this process and extract a run of pages.
+    # pdf_path is a path, or the PDF bytes for in-memory input.
+    with PdfSource(pdf_path) as src, open_backend(backend, src) as pdf:
+        return list(_iter_pages(pdf, template, layout_text, page_indices))
+
+
+def _page_results(
+    pdf: "str | PdfSource",
+    template: CompiledTemplate,
+    layout_text: bool,
+    workers: int,
+    backend: str = DEFAULT_BACKEND
+):
+    # Serial page loop, or page shards across worker processes; either way the
+    # results arrive in template page order. A PdfSource is read in place; a path
+    # is memory-mapped for the duration of the loop.
+    if workers > 1 and len(template.pages) > 1:
+        indices = range(len(template.pages))
+        if isinstance(pdf, PdfSource):
+            pdf = str(pdf.path) if pdf.path else pdf.buffer.tobytes()
+        yield from map_page_shards(_extract_page_shard, indices, workers, pdf, template, layout_text, backend)
+        return
+    src = pdf if isinstance(pdf, PdfSource) else PdfSource(pdf)
+    try:
+        with open_backend(backend, src) as doc:
+            yield from _iter_pages(doc, template, layout_text)
+    finally:
+        if src is not pdf:
+            src.close()
+
+
+def _doc_path(pdf: "str | PdfSource") -> str:
+    if isinstance(pdf, PdfSource):
+        return str(pdf.path or pdf.name)
+    return str(Path(pdf).resolve())
+
+
+@timed()
+def extract_to_json(
+    pdf_path: "str | PdfSource",
+    template_path: "str | CompiledTemplate",
+    out_path: Path,
+    overwrite: bool = True,
+    layout_text: bool = True,
+    workers: int = 1,
+    backend: str = DEFAULT_BACKEND,
+    token_index: bool = False,
+    normaliser: Optional[Normaliser] = None
+) -> Path:
+    # layout_text=True keeps extract_text()-style line text for full_text;
+    # False builds it from the same words used for the boxes (one parse per page).
+    # backend: "pymupdf" (default) or "pdfplumber"; see extract_backends.
+    # template_path may also be an already loaded CompiledTemplate.
+    # workers > 1 shards the template pages across processes (same output).
+    # pdf_path may be a PdfSource, so callers that already mapped the file
+    # (e.g. to hash it) share that buffer.
+    # An out_path ending in ".cols" is written in the columnar format (columnar.py).
+    # token_index=True stores a TokenIndex of full_text and the box texts, so
+    # checks look values up instead of scanning (see token_index); callers ask
+    # for it only for large plans (validations.wants_index), as it grows the
+    # output several times over. normaliser: the plan's, so the index holds the
+    # normalised tokens its checks search for.
+    template = _load_template(template_path)
 
     extraction = {
-        "doc_path": str(Path(pdf_path).resolve()),
-        "doc_type": template.get("doc_type"),
+        "doc_path": _doc_path(pdf_path),
+        "doc_type": template.doc_type,
         "boxes": {},
         "full_text": ""
     }
 
     # Extract content
-    with pdfplumber.open(pdf_path) as pdf:
-        # Full text (first two pages per template)
-        full_text_parts = []
-        for page_entry in template.get("pages", []):
-            pnum = page_entry["page_num"]
-            t = pdf.pages[pnum].extract_text() or ""
-            full_text_parts.append(t)
-        extraction["full_text"] = "\n".join(full_text_parts)
-
-        # Boxes
-        for page_entry in template.get("pages", []):
-            pnum = page_entry["page_num"]
-            page = pdf.pages[pnum]
-            w, h = page.width, page.height
-            words = page.extract_words() or []
-
-            for field in page_entry.get("fields", []):
-                x0, y0, x1, y1 = _denorm(field["box"], w, h)
-                in_box = [wd for wd in words if _intersects((x0, y0, x1, y1), wd)]
-                in_box.sort(key=lambda wd: (wd["top"], wd["x0"]))
-                text = " ".join(wd["text"] for wd in in_box).strip()
-
-                extraction["boxes"][field["name"]] = {
-                    "page": pnum,
-                    "raw_text": text,
-                    "count_words": len(in_box),
-                    "box_denorm": [x0, y0, x1, y1]
-                }
+    full_text_parts = []
+    for _, text, boxes in _page_results(pdf_path, template, layout_text, workers, backend):
+        full_text_parts.append(text)
+        extraction["boxes"].update(boxes)
+    extraction["full_text"] = "\n".join(full_text_parts)
+    if token_index:
+        with stage("token_index"):
+            extraction["token_index"] = TokenIndex.build(extraction["full_text"], extraction["boxes"],
+                                                         normaliser).to_dict()
 
     # Write JSON
     out_path.parent.mkdir(parents=True, exist_ok=True)
     if out_path.exists() and not overwrite:
         i = 1
         while True:
-            alt = out_path.with_name(out_path.stem + f"_{i}").with_suffix(".json")
+            alt = out_path.with_name(out_path.stem + f"_{i}").with_suffix(out_path.suffix or ".json")
             if not alt.exists():
                 out_path = alt
                 break
             i += 1
 
-    with out_path.open("w", encoding="utf-8") as f:
+    if is_columnar(out_path):
+        with stage("cols_write"):
+            save_extraction_columns(extraction, out_path)
+        return out_path
+
+    # Atomic, like the columnar write: batch workers validating PDFs with the same
+    # stem share this output path and must never read it half-written.
+    with stage("json_write"), atomic_open(out_path) as f:
         json.dump(extraction, f, indent=2)
 
+    return out_path
+
+
+def iter_records(
+    pdf_path: "str | PdfSource",
+    template_path: "str | CompiledTemplate",
+    layout_text: bool = True,
+    workers: int = 1,
+    backend: str = DEFAULT_BACKEND
+) -> Iterator[dict]:
+    # Streaming variant of extract_to_json: one "doc" record, then a "page" record
+    # per template page followed by that page's "box" records, yielded as each
+    # page finishes, for callers that write or check them while extracting
+    # (main's --stream, ValidationPlan.stream). Joining the page texts with "\n"
+    # gives extract_to_json's full_text.
+    template = _load_template(template_path)
+    yield {
+        "type": "doc",
+        "doc_path": _doc_path(pdf_path),
+        "doc_type": template.doc_type
+    }
+    for pnum, text, boxes in _page_results(pdf_path, template, layout_text, workers, backend):
+        yield {"type": "page", "page": pnum, "text": text}
+        for name, box in boxes.items():
+            yield {"type": "box", "name": name, **box}
@@ -0,0 +1,80 @@
+# lazy_document.py
+# On-demand page access over pdfplumber.
+# A page's content stream is only parsed when something asks for it, and at most
+# max_pages parsed pages are kept; older ones are closed (their caches flushed),
+# so memory stays bounded on long documents.
+
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional
+
+import pdfplumber
+
+
+class LazyDocument:
+
+    def __init__(self, source, max_pages: int = 4):
+        # source: a path or a binary file-like object, as accepted by pdfplumber.open.
+        self._pdf = pdfplumber.open(source)
+        self.max_pages = max(1, max_pages)
+        self._parsed: "OrderedDict[int, object]" = OrderedDict()
+
+    def __len__(self) -> int:
+        # Page objects are cheap; content is only parsed on first use.
+        return len(self._pdf.pages)
+
+    def page(self, index: int):
+        # Return the 0-based page, parsing it on first use and marking it recent.
+        page = self._parsed.get(index)
+        if page is not None:
+            self._parsed.move_to_end(index)
+            return page
+
+        page = self._pdf.pages[index]
+        self._parsed[index] = page
+        while len(self._parsed) > self.max_pages:
+            _, old = self._parsed.popitem(last=False)
+            old.close()
+        return page
+
+    def release(self, index: int) -> None:
+        # Drop a page's parsed state now instead of waiting for eviction.
+        page = self._parsed.pop(index, None)
+        if page is not None:
+            page.close()
+
+    def iter_pages(self, indices: Optional[Iterable[int]] = None) -> Iterator[tuple]:
+        # Yield (index, page) for the requested 0-based pages (all if None),
+        # releasing each page once the caller moves on.
+        if indices is None:
+            indices = range(len(self))
+        for index in indices:
+            page = self.page(index)
+            try:
+                yield index, page
+            finally:
+                self.release(index)
+
+    def close(self) -> None:
+        for page in self._parsed.values():
+            page.close()
+        self._parsed.clear()
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def resolve_pages(wanted: Optional[Iterable[int]], page_count: int) -> list:
+    # Turn 1-based page numbers (negative counts from the end) into sorted,
+    # de-duplicated 0-based indices that exist in the document.
+    if wanted is None:
+        return list(range(page_count))
+    out = set()
+    for n in wanted:
+        idx = n - 1 if n > 0 else page_count + n
+        if 0 <= idx < page_count:
+            out.add(idx)
+    return sorted(out)
@@ -0,0 +1,32 @@
+# page_shards.py
+# Split one document's pages across worker processes.
+# Each worker opens the PDF itself and handles a contiguous run of pages; results
+# come back in page order, so callers can merge them exactly as a serial loop would.
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Sequence
+
+
+def shard_pages(indices: Sequence[int], shards: int) -> List[List[int]]:
+    # Contiguous, near-equal runs; contiguity keeps each worker's reads local.
+    indices = list(indices)
+    shards = max(1, min(shards, len(indices)))
+    size, extra = divmod(len(indices), shards)
+    out = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        out.append(indices[start:end])
+        start = end
+    return [s for s in out if s]
+
+
+def map_page_shards(fn: Callable, indices: Sequence[int], workers: int, *args) -> Iterator:
+    # Call fn(shard, *args) for each shard in a process pool and yield the items
+    # of every shard's result list in page order. fn must be a module-level function.
+    # Two shards per worker smooth out pages of uneven cost.
+    shards = shard_pages(indices, workers * 2)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards) or 1)) as pool:
+        futures = [pool.submit(fn, shard, *args) for shard in shards]
+        for fut in futures:
+            yield from fut.result()
@@ -0,0 +1,158 @@
+# pdf_input.py
+# Zero-copy PDF input.
+# PdfSource memory-maps a file once (or wraps bytes/bytearray/memoryview already
+# in memory) and hands the same buffer to every consumer: pdfplumber reads through
+# a seekable stream over it, PyMuPDF gets the memoryview itself, and the content
+# hash for the extraction cache is computed from it. On network storage the file
+# is then fetched once per run instead of once per library.
+
+import glob
+import hashlib
+import io
+import mmap
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+BOXES_SUFFIX = "_boxes"  # "<doc_type>_boxes.pdf": template source, not a document
+
+
+class BufferStream(io.RawIOBase):
+    # Read-only, seekable file object over a memoryview. Reads copy only the
+    # requested slice; the underlying buffer is never duplicated.
+
+    def __init__(self, buffer: memoryview):
+        self._buf = buffer
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._buf) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._pos
+        end = len(self._buf) if size is None or size < 0 else min(len(self._buf), start + size)
+        if start >= end:
+            return b""
+        self._pos = end
+        return self._buf[start:end].tobytes()
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        # Drop the view so the owning PdfSource can unmap.
+        self._buf = memoryview(b"")
+        super().close()
+
+
+class PdfSource:
+
+    def __init__(self, source, name: Optional[str] = None):
+        # source: a path (memory-mapped) or bytes/bytearray/memoryview (wrapped).
+        # name: display/file name for in-memory input, e.g. "UMS025.pdf".
+        self._mmap = None
+        self._sha256: Optional[str] = None
+        if isinstance(source, PdfSource):
+            raise TypeError("already a PdfSource; use as_source()")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.path: Optional[Path] = None
+            self.buffer = memoryview(source).cast("B")
+        else:
+            self.path = Path(source).resolve()
+            with open(self.path, "rb") as f:
+                try:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # empty file cannot be mapped
+                    self._mmap = None
+            self.buffer = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+        self.name = name or (self.path.name if self.path else "document.pdf")
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    @property
+    def stem(self) -> str:
+        return Path(self.name).stem
+
+    def stream(self) -> BufferStream:
+        # A fresh file object over the shared buffer (one per parser).
+        return BufferStream(self.buffer)
+
+    def sha256(self) -> str:
+        # Content hash from the mapped buffer, computed once.
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.buffer).hexdigest()
+        return self._sha256
+
+    def close(self) -> None:
+        # Parsers holding views of the buffer must be closed first; if one still
+        # does, the mapping is left for the garbage collector.
+        try:
+            self.buffer.release()
+        except BufferError:
+            pass
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"PdfSource({self.path or self.name!s}, {len(self)} bytes)"
+
+
+def as_source(source) -> PdfSource:
+    # Pass PdfSource through; wrap paths and byte buffers.
+    if isinstance(source, PdfSource):
+        return source
+    return PdfSource(source)
+
+
+def collect_pdfs(targets: Iterable[str], boxes: bool = False) -> List[Path]:
+    # Expand directories, glob patterns and plain files into a sorted list of
+    # PDFs: documents by default, only the "*_boxes.pdf" template sources with
+    # boxes=True.
+    found = set()
+    for target in targets:
+        p = Path(target)
+        if p.is_dir():
+            candidates = p.glob(f"*{BOXES_SUFFIX}.pdf" if boxes else "*.pdf")
+        elif p.is_file():
+            candidates = [p]
+        else:
+            candidates = (Path(m) for m in glob.glob(target, recursive=True))
+        for c in candidates:
+            if c.suffix.lower() == ".pdf" and c.stem.endswith(BOXES_SUFFIX) == boxes:
+                found.add(c.resolve())
+    return sorted(found)
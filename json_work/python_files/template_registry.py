@@ -0,0 +1,239 @@
+# template_registry.py
+# Every doc type's template in one indexed file.
+# A registry is built from a folder (or glob) of "<doc_type>_boxes.pdf" files, one
+# worker process per PDF, using every page unless max_pages says otherwise. It is
+# saved as a single pickle mapping doc_type -> CompiledTemplate, so a worker
+# loads all templates with one read and looks one up with a dict access, instead
+# of reading a small JSON file per doc type on demand. Rebuilding only re-reads
+# boxes PDFs whose size or mtime changed (or that were built with other options).
+# When a sample document "<doc_type>.pdf" sits next to the boxes PDF, its page-1
+# layout signature is stored too, for doc_classifier's layout matching.
+# --fast builds with build_template's fast rectangle detection.
+# main.py still prefers a doc type's own template file when there is one, as
+# specs name the boxes of that template.
+#
+#   python -m json_work.python_files.template_registry json_work/sample_pdfs --workers 8
+
+import argparse
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from json_SL import atomic_open
+from json_work.python_files.build_template_from_pdf import build_template
+from json_work.python_files.compiled_template import CompiledTemplate
+from json_work.python_files.doc_classifier import Signature, layout_signature
+from json_work.python_files.pdf_input import BOXES_SUFFIX, collect_pdfs
+
+DEFAULT_REGISTRY = Path("json_work") / "json_files" / "templates.registry.pkl"
+REGISTRY_VERSION = 2
+
+
+class TemplateRegistry:
+
+    def __init__(self):
+        self._templates: Dict[str, CompiledTemplate] = {}
+        # doc_type -> [boxes PDF path, size, mtime_ns, max_pages, sample stamp] it was built from.
+        self._sources: Dict[str, list] = {}
+        # doc_type -> page-1 layout signature of its sample document.
+        self._layouts: Dict[str, Signature] = {}
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __contains__(self, doc_type) -> bool:
+        return doc_type in self._templates
+
+    def __getitem__(self, doc_type: str) -> CompiledTemplate:
+        return self._templates[doc_type]
+
+    def get(self, doc_type: Optional[str]) -> Optional[CompiledTemplate]:
+        return self._templates.get(doc_type)
+
+    def doc_types(self) -> List[str]:
+        return sorted(self._templates)
+
+    def layouts(self) -> Dict[str, Signature]:
+        return dict(self._layouts)
+
+    def add(self, template: CompiledTemplate, source: Optional[list] = None, layout: Optional[Signature] = None) -> None:
+        doc_type = template.doc_type
+        self._templates[doc_type] = template
+        if source is not None:
+            self._sources[doc_type] = source
+        else:
+            self._sources.pop(doc_type, None)
+        if layout:
+            self._layouts[doc_type] = layout
+        else:
+            self._layouts.pop(doc_type, None)
+
+    def build(
+        self,
+        boxes_pdfs: Iterable[Path],
+        workers: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        rebuild: bool = False,
+        fast: bool = False
+    ) -> dict:
+        # Build or refresh the templates for these boxes PDFs across a process pool;
+        # entries for other doc types are kept. Returns
+        # {"built": [...], "reused": [...], "failed": {pdf: error}}.
+        stats = {"built": [], "reused": [], "failed": {}}
+        todo: List[Tuple[str, list]] = []
+        for pdf in boxes_pdfs:
+            doc_type = doc_type_for(pdf)
+            source = _source_stamp(pdf, max_pages, fast)
+            if not rebuild and doc_type in self._templates and self._sources.get(doc_type) == source:
+                stats["reused"].append(doc_type)
+            else:
+                todo.append((str(pdf), source))
+
+        for pdf, source, result in _build_all(todo, workers, max_pages, fast):
+            if isinstance(result, Exception):
+                stats["failed"][pdf] = f"{type(result).__name__}: {result}"
+                continue
+            template, layout = result
+            self.add(CompiledTemplate.from_dict(template), source, layout)
+            stats["built"].append(template["doc_type"])
+        return stats
+
+    def save(self, path: str | Path = DEFAULT_REGISTRY) -> Path:
+        # Atomic, so workers loading the registry never see a half-written file.
+        p = Path(path)
+        with atomic_open(p, "wb") as f:
+            pickle.dump({
+                "version": REGISTRY_VERSION,
+                "templates": self._templates,
+                "sources": self._sources,
+                "layouts": self._layouts,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return p
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_REGISTRY) -> "TemplateRegistry":
+        # One read for every template (trusted files only, like CompiledTemplate.load_binary).
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+        if not isinstance(payload, dict) or payload.get("version") != REGISTRY_VERSION:
+            raise ValueError(f"{path} is not a version {REGISTRY_VERSION} template registry")
+        registry = cls()
+        registry._templates = payload["templates"]
+        registry._sources = payload["sources"]
+        registry._layouts = payload["layouts"]
+        return registry
+
+
+def doc_type_for(boxes_pdf: str | Path) -> str:
+    # "UMS025_boxes.pdf" -> "UMS025", matching build_template's doc_type.
+    return Path(boxes_pdf).stem.replace(BOXES_SUFFIX, "")
+
+
+def sample_pdf_for(boxes_pdf: str | Path) -> Path:
+    # "UMS025_boxes.pdf" -> "UMS025.pdf" in the same folder.
+    p = Path(boxes_pdf)
+    return p.with_name(f"{doc_type_for(p)}{p.suffix}")
+
+
+def _source_stamp(pdf: Path, max_pages: Optional[int], fast: bool = False) -> list:
+    st = Path(pdf).stat()
+    sample = sample_pdf_for(pdf)
+    sample_st = sample.stat() if sample.exists() else None
+    return [str(Path(pdf).resolve()), st.st_size, st.st_mtime_ns, max_pages,
+            [sample_st.st_size, sample_st.st_mtime_ns] if sample_st else None, fast]
+
+
+def _build_one(pdf: str, max_pages: Optional[int], fast: bool = False):
+    # Worker entry point: (plain template dict, sample layout signature or None),
+    # small to send back, or the exception, so one unreadable PDF does not abort
+    # the whole build.
+    try:
+        sample = sample_pdf_for(pdf)
+        layout = layout_signature(sample) if sample.exists() else None
+        return build_template(pdf, max_pages=max_pages, fast=fast), layout
+    except Exception as e:
+        return e
+
+
+def _build_all(
+    todo: List[Tuple[str, list]],
+    workers: Optional[int],
+    max_pages: Optional[int],
+    fast: bool = False
+) -> Iterator[tuple]:
+    # Yield (pdf, source, _build_one result) in input order.
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        for pdf, source in todo:
+            yield pdf, source, _build_one(pdf, max_pages, fast)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_build_one, pdf, max_pages, fast) for pdf, _ in todo]
+        for (pdf, source), fut in zip(todo, futures):
+            yield pdf, source, fut.result()
+
+
+def collect_boxes_pdfs(targets: Iterable[str]) -> List[Path]:
+    # Expand directories, glob patterns and plain files into the "*_boxes.pdf" files.
+    return collect_pdfs(targets, boxes=True)
+
+
+_loaded: Dict[str, Tuple[Tuple[int, int], TemplateRegistry]] = {}
+
+
+def load_registry(path: str | Path = DEFAULT_REGISTRY) -> TemplateRegistry:
+    # Return the registry at path, reusing the copy already loaded in this process
+    # unless the file changed on disk (same policy as load_template).
+    p = Path(path).resolve()
+    st = p.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _loaded.get(str(p))
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    registry = TemplateRegistry.load(p)
+    _loaded[str(p)] = (stamp, registry)
+    return registry
+
+
+def build_registry(
+    targets: Iterable[str],
+    out_path: str | Path = DEFAULT_REGISTRY,
+    workers: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    rebuild: bool = False,
+    fast: bool = False
+) -> Tuple[TemplateRegistry, dict]:
+    # Update (or create) the registry file at out_path from the boxes PDFs in targets.
+    out_path = Path(out_path)
+    registry = TemplateRegistry.load(out_path) if out_path.exists() and not rebuild else TemplateRegistry()
+    stats = registry.build(collect_boxes_pdfs(targets), workers=workers, max_pages=max_pages, rebuild=rebuild,
+                           fast=fast)
+    registry.save(out_path)
+    return registry, stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build one template registry from a folder of *_boxes.pdf files.")
+    ap.add_argument("targets", nargs="+", help="Folders, glob patterns or *_boxes.pdf files")
+    ap.add_argument("--out", default=str(DEFAULT_REGISTRY), help="Registry file to create or update")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ap.add_argument("--max-pages", type=int, default=None, help="Only read the first N pages (default: all)")
+    ap.add_argument("--rebuild", action="store_true", help="Rebuild every template, ignoring the existing file")
+    ap.add_argument("--fast", action="store_true",
+                    help="Fast rectangle detection: stream drawings, drop duplicate boxes")
+    args = ap.parse_args()
+
+    registry, stats = build_registry(args.targets, args.out, workers=args.workers,
+                                     max_pages=args.max_pages, rebuild=args.rebuild, fast=args.fast)
+    for pdf, error in stats["failed"].items():
+        print(f"[ERROR] {pdf}: {error}", file=sys.stderr)
+    print(f"[OK] Registry {args.out}: {len(registry)} doc types "
+          f"({len(stats['built'])} built, {len(stats['reused'])} unchanged, {len(stats['failed'])} failed)")
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,138 +2,447 @@
 # main.py
 # Simple orchestrator: template, extraction, validation, summary.
 
+import argparse
 import sys
 from pathlib import Path
+from typing import List, Optional
 import json
 
-from json_SL import load_json, save_json
+from columnar import COLUMNAR_SUFFIX, load_extraction, save_extraction
 from formatting import format_summary, summarize_full_doc
-from validations import full_doc_checks, box_checks
+from extraction_cache import DEFAULT_CACHE_DIR, ExtractionCache, cache_key, open_cache
+from json_SL import NdjsonWriter
+from normalise import Normaliser
+from validation_spec import ValidationPlan, load_plan
+from validations import wants_index
+from incremental import IncrementalState
+import instrumentation
+from instrumentation import stage, timed
 
 from json_work.python_files.build_template_from_pdf import write_template_for_boxes_pdf
-from json_work.python_files.extract_boxes_to_json import extract_to_json
+from json_work.python_files.compiled_template import CompiledTemplate, fresh_binary
+from json_work.python_files.doc_classifier import Classification, DocClassifier
+from json_work.python_files.extract_backends import BACKENDS, DEFAULT_BACKEND
+from json_work.python_files.extract_boxes_to_json import EXTRACTOR_VERSION, extract_to_json, iter_records
+from json_work.python_files.pdf_input import PdfSource
+from json_work.python_files.template_registry import TemplateRegistry, load_registry
 
+DEFAULT_SPEC = Path(__file__).resolve().parent / "specs" / "UMS025.json"
+NDJSON_SUFFIX = ".ndjson"
+CHECKS_SUFFIX = ".checks.ndjson"
 
-def _resolve_paths(pdf_path_arg: str):
-    pdf_path = Path(pdf_path_arg).resolve()
+
+def _resolve_paths(pdf_path_arg: "str | PdfSource", doc_type: Optional[str] = None):
+    if isinstance(pdf_path_arg, PdfSource):
+        pdf_path = pdf_path_arg.path or Path(pdf_path_arg.name)
+    else:
+        pdf_path = Path(pdf_path_arg).resolve()
     json_work_root = Path("./json_work").resolve()
     jw_py = json_work_root / "python_files"
     jw_json = json_work_root / "json_files"
     jw_samples = json_work_root / "sample_pdfs"
 
-    doc_base = pdf_path.stem
+    doc_base = doc_type or pdf_path.stem
     tpl_path = jw_json / f"{doc_base}_boxes_template.json"
+    # Prefer the pickled CompiledTemplate saved alongside (compiled_template.py),
+    # unless the JSON template was changed after it was written.
+    tpl_path = fresh_binary(tpl_path) or tpl_path
     first_half_json = jw_json / f"{doc_base}.first_half.json"
     boxes_pdf = jw_samples / f"{doc_base}_boxes.pdf"
 
     return pdf_path, tpl_path, first_half_json, boxes_pdf, jw_json
 
 
+def _default_plan() -> ValidationPlan:
+    # The built-in expectations live in specs/UMS025.json; compiled once per process.
+    return load_plan(str(DEFAULT_SPEC))
+
+
 def _expected_values_and_mapping():
-    expected_values = {
-        "Title": "Mr",
-        "Surname": "UATjmfC",
-        "First Name": "TDMjmfC",
-        "Address": "Avenue Street",
-        "City": "London",
-        "Postcode": "W2 4BA",
-        "Date 1": "29 November 2025",
-        "Date 2": "26 November 2025",
-        "Customer ID": "7700049486",
-        "Pension Plan": "1000059054L",
-        "Plan Value": "190,664.73",
-        "Cash Withdrawal": "190,664.73",
-        "Plan Value Post Withdrawal": "0.00",
-        "Date 3": "27/11/2025"
-    }
-
-    box_mapping = {
-        "box_0_1": ["Title", "First Name", "Surname", "Address", "City", "Postcode"],
-        "box_0_2": ["Date 1", "Customer ID"],
-        "box_0_3": ["First Name", "Last Name"],
-        "box_0_4": ["Pension Plan"],
-        "box_0_5": ["Plan Value", "Cash Withdrawal", "Date 3", "Plan Value Post Withdrawal"],
-        "box_0_6": ["Cash Withdrawal"],
-        "box_0_7": ["Date 2"]
-    }
-
-    aliases = {
-        "Last Name": "Surname",
-        "CustomerID": "Customer ID"
-    }
-
-    return expected_values, box_mapping, aliases
-
-
-def _ensure_template(tpl_path: Path, boxes_pdf: Path) -> Path:
-    print("Step 1: Checking for template...")
+    return _default_plan().expectations()
+
+
+def _extractor_id(backend: str, token_index: Optional[Normaliser] = None) -> str:
+    # Extractor version plus backend (and the normalisation of the stored token
+    # index, if any), so cache entries and incremental state from one setting are
+    # never reused for another.
+    if token_index is None:
+        return f"{EXTRACTOR_VERSION}+{backend}"
+    return f"{EXTRACTOR_VERSION}+{backend}+index" + (json.dumps(token_index.key()) if token_index.active else "")
+
+
+@timed()
+def _ensure_template(
+    tpl_path: Path,
+    boxes_pdf: Path,
+    verbose: bool = True,
+    registry: Optional[TemplateRegistry] = None,
+    doc_type: Optional[str] = None
+) -> "Path | CompiledTemplate | None":
+    # Return the doc type's template file when it exists, else the registry's
+    # template for doc_type, else a template built from the boxes PDF; None if
+    # there is none. A committed template wins over the registry: its field names
+    # are the ones the specs' box_mapping uses, and a rebuild may number boxes
+    # differently.
+    if verbose:
+        print("Step 1: Checking for template...")
     if tpl_path.exists():
-        print(f"Template found: {tpl_path}")
+        if verbose:
+            print(f"Template found: {tpl_path}")
         return tpl_path
+    if registry is not None and doc_type in registry:
+        if verbose:
+            print(f"Template found in registry: {doc_type}")
+        return registry[doc_type]
 
     if boxes_pdf.exists():
-        print(f"Template missing; building from boxes PDF: {boxes_pdf}")
+        if verbose:
+            print(f"Template missing; building from boxes PDF: {boxes_pdf}")
         out = write_template_for_boxes_pdf(str(boxes_pdf), tpl_path)
-        print(f"[OK] Wrote template to: {out}")
+        if verbose:
+            print(f"[OK] Wrote template to: {out}")
         return out
 
-    print("no template found")
-    sys.exit(2)
-
-
-
-def _extract_first_half(pdf_path: Path, tpl_path: Path, first_half_json: Path) -> Path:
-    print("Step 2: Extracting first-half JSON using template...")
-    out = extract_to_json(str(pdf_path), str(tpl_path), first_half_json, overwrite=True)
-    print(f"[OK] Wrote extraction JSON: {out}")
+    if verbose:
+        print("no template found")
+    return None
+
+
+@timed()
+def _classify(
+    pdf: PdfSource,
+    jw_json: Path,
+    registry: Optional[TemplateRegistry],
+    verbose: bool = True
+) -> Optional[Classification]:
+    # Doc type from page 1 (reference code, else layout via the registry) for a PDF
+    # whose file name matches no template. No extraction is done.
+    if registry is not None:
+        classifier = DocClassifier.from_registry(registry)
+    else:
+        classifier = DocClassifier.from_folder(jw_json)
+    found = classifier.classify(pdf)
+    if verbose:
+        if found is None:
+            print("Could not classify document from page 1")
+        else:
+            print(f"Classified as {found.doc_type} by {found.method} (score {found.score})")
+    return found
+
+
+@timed()
+def _extract_first_half(
+    pdf: PdfSource,
+    tpl_path: "Path | CompiledTemplate",
+    first_half_json: Path,
+    verbose: bool = True,
+    cache: Optional[ExtractionCache] = None,
+    page_workers: int = 1,
+    key: Optional[str] = None,
+    backend: str = DEFAULT_BACKEND,
+    token_index: Optional[Normaliser] = None
+) -> Path:
+    # Extract with the template, reusing a cached result when PDF, template and
+    # extractor version are unchanged. page_workers > 1 shards the pages of this
+    # one document across processes. key: a cache_key() the caller already computed.
+    # token_index: the plan's normaliser when a token index is to be stored.
+    # The PDF is hashed and parsed from the same mapped buffer.
+    if verbose:
+        print("Step 2: Extracting first-half JSON using template...")
+
+    if cache is not None:
+        key = key or cache_key(pdf, tpl_path, _extractor_id(backend, token_index))
+        data = cache.get(key)
+        if data is not None:
+            data["doc_path"] = str(pdf.path or pdf.name)
+            out = save_extraction(data, first_half_json)
+            if verbose:
+                print(f"[OK] Extraction cache hit; wrote: {out}")
+            return out
+
+    out = extract_to_json(pdf, tpl_path, first_half_json, overwrite=True, workers=page_workers,
+                          backend=backend, token_index=token_index is not None, normaliser=token_index)
+    if cache is not None:
+        cache.put(key, load_extraction(out))
+    if verbose:
+        print(f"[OK] Wrote extraction JSON: {out}")
     return out
 
 
-def _validate(first_half_json: Path):
-    print("Step 3: Validating extracted data...")
-    data = load_json(first_half_json)
+def _run_checks(
+    data: dict,
+    verbose: bool = True,
+    plan: Optional[ValidationPlan] = None,
+    overrides: Optional[dict] = None
+) -> List[dict]:
+    # Run full-doc and box checks against a loaded extraction dict.
+    # plan defaults to the built-in spec; overrides are per-document expected values.
+    plan = plan or _default_plan()
+
+    if verbose:
+        full_text = data.get("full_text") or ""
+        boxes = data.get("boxes") or {}
+        print(f"Full text length: {len(full_text)}")
+        print(f"Box count: {len(boxes)}")
+        print(f"Box names: {', '.join(sorted(boxes.keys()))}")
+
+    return plan.run(data, overrides)
+
+
+@timed()
+def _validate(
+    first_half_json: Path,
+    verbose: bool = True,
+    plan: Optional[ValidationPlan] = None,
+    overrides: Optional[dict] = None
+) -> tuple:
+    # Return (exit_code, checks) for an extraction JSON; prints the summary when verbose.
+    if verbose:
+        print("Step 3: Validating extracted data...")
+    with stage("load_json"):
+        data = load_extraction(first_half_json)
     if data is None:
         print(f"[ERROR] Cannot load extraction JSON: {first_half_json}", file=sys.stderr)
-        sys.exit(1)
-
-    expected_values, box_mapping, aliases = _expected_values_and_mapping()
+        return 1, []
 
-    full_text = data.get("full_text") or ""
-    boxes = data.get("boxes") or {}
+    with stage("checks"):
+        checks = _run_checks(data, verbose=verbose, plan=plan, overrides=overrides)
+    return _report(checks, verbose), checks
 
-    print(f"Full text length: {len(full_text)}")
-    print(f"Box count: {len(boxes)}")
-    print(f"Box names: {', '.join(sorted(boxes.keys()))}")
-
-    checks = []
-    checks.extend(full_doc_checks(expected_values, full_text))
-    checks.extend(box_checks(expected_values, boxes, box_mapping, aliases))
-
-    print(summarize_full_doc(checks))
-    print(format_summary(checks))
 
+def _report(checks: List[dict], verbose: bool = True) -> int:
+    # Exit code for a checks list; prints the summary when verbose.
     any_fail = any(not c.get("pass") for c in checks)
-    if any_fail:
-        print(json.dumps({"checks": checks}, indent=2))
-        sys.exit(1)
-    else:
-        sys.exit(0)
+    if verbose:
+        print(summarize_full_doc(checks))
+        print(format_summary(checks))
+        if any_fail:
+            print(json.dumps({"checks": checks}, indent=2))
+    return 1 if any_fail else 0
+
+
+@timed()
+def _validate_incremental(
+    pdf: PdfSource,
+    tpl_path: "Path | CompiledTemplate",
+    first_half_json: Path,
+    state_dir: Path,
+    verbose: bool,
+    cache: Optional[ExtractionCache],
+    page_workers: int,
+    plan: Optional[ValidationPlan],
+    overrides: Optional[dict],
+    result: dict,
+    backend: str = DEFAULT_BACKEND,
+    token_index: Optional[Normaliser] = None
+) -> tuple:
+    # Like _extract_first_half + _validate, but stored check results are reused and
+    # the document is only extracted when a check actually has to be evaluated.
+    state = IncrementalState(state_dir)
+
+    def load_data(key: str) -> Optional[dict]:
+        out = _extract_first_half(pdf, tpl_path, first_half_json, verbose=verbose,
+                                  cache=cache, page_workers=page_workers, key=key, backend=backend,
+                                  token_index=token_index)
+        return load_extraction(out)
+
+    checks = state.run(pdf.path, tpl_path, _extractor_id(backend, token_index), plan or _default_plan(), overrides,
+                       load_data, source=pdf)
+    result["incremental"] = state.stats()
+    if checks is None:
+        print(f"[ERROR] Cannot load extraction JSON: {first_half_json}", file=sys.stderr)
+        return 1, []
+    if verbose:
+        print(f"[OK] Incremental: {state.reused} checks reused, {state.evaluated} evaluated")
+    return _report(checks, verbose), checks
+
+
+@timed()
+def _validate_stream(
+    pdf: PdfSource,
+    tpl_path: "Path | CompiledTemplate",
+    first_half_json: Path,
+    verbose: bool,
+    page_workers: int,
+    plan: Optional[ValidationPlan],
+    overrides: Optional[dict],
+    result: dict,
+    backend: str = DEFAULT_BACKEND
+) -> tuple:
+    # Extract to NDJSON and check the records while they are produced: each check
+    # is written to <doc>.first_half.checks.ndjson (and printed when verbose) as
+    # soon as it is decided, so followers (json_SL.iter_ndjson) see results
+    # before the document is finished. The extraction cache is not used.
+    plan = plan or _default_plan()
+    out = first_half_json.with_suffix(NDJSON_SUFFIX)
+    checks_out = first_half_json.with_suffix(CHECKS_SUFFIX)
+    result["stream"] = {"extraction": str(out), "checks": str(checks_out)}
+    if verbose:
+        print(f"Step 2: Streaming extraction to {out}, checks to {checks_out}...")
+
+    checks: List[dict] = []
+    with NdjsonWriter(out) as extraction, NdjsonWriter(checks_out) as emitted:
+        def records():
+            for record in iter_records(pdf, tpl_path, workers=page_workers, backend=backend):
+                extraction.write(record)
+                yield record
+
+        for check in plan.stream(records(), overrides):
+            emitted.write({"type": "check", **check})
+            checks.append(check)
+            if verbose:
+                print(f"  {'PASS' if check.get('pass') else 'FAIL'} {check.get('name')}")
+    return _report(checks, verbose), checks
+
+
+def validate_document(
+    pdf_path_arg: "str | PdfSource",
+    verbose: bool = False,
+    out_json: Optional[Path] = None,
+    cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+    page_workers: int = 1,
+    plan: Optional[ValidationPlan] = None,
+    overrides: Optional[dict] = None,
+    doc_type: Optional[str] = None,
+    state_dir: Optional[Path] = None,
+    backend: str = DEFAULT_BACKEND,
+    registry: Optional[TemplateRegistry] = None,
+    columnar: bool = False,
+    stream: bool = False,
+    cache: Optional[ExtractionCache] = None
+) -> dict:
+    # Run template, extraction and validation for one PDF and return a result dict
+    # (never exits). exit_code follows main(): 0 pass, 1 failed checks, 2 setup error.
+    # cache_dir=None disables the extraction cache; cache passes an open one instead
+    # (default: this process's open_cache(cache_dir)). result["cache"] counts this
+    # document's hits and misses only. doc_type overrides the
+    # template lookup, which otherwise uses the PDF's file name. plan is a compiled
+    # spec (default: specs/UMS025.json); overrides are this document's manifest row.
+    # state_dir enables incremental mode: only checks whose inputs changed since the
+    # last run are evaluated, and extraction is skipped when none did.
+    # pdf_path_arg may be a PdfSource (e.g. bytes received over the wire); a path
+    # is memory-mapped once and shared by hashing and parsing.
+    # backend: text extraction backend ("pymupdf" or "pdfplumber").
+    # registry: templates by doc type, for doc types without a per-type template file.
+    # Without doc_type, a PDF whose name matches no template is classified from page 1.
+    # columnar: store the extraction as ".cols" (see columnar.py) instead of JSON.
+    # stream: extract to NDJSON and emit checks as they complete (_validate_stream);
+    # not combined with state_dir or columnar.
+    pdf_path, tpl_path, first_half_json, boxes_pdf, jw_json = _resolve_paths(pdf_path_arg, doc_type)
+    if out_json is not None:
+        first_half_json = Path(out_json)
+    if columnar:
+        first_half_json = first_half_json.with_suffix(COLUMNAR_SUFFIX)
+    result = {"pdf": str(pdf_path), "exit_code": 0, "checks": [], "error": None}
+
+    if stream and (state_dir is not None or columnar):
+        result.update(exit_code=2, error="stream mode cannot be combined with state_dir or columnar")
+        return result
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <path_to_main_pdf>")
-        sys.exit(2)
+    if not jw_json.exists():
+        result.update(exit_code=2, error=f"Expected folder missing: {jw_json}")
+        return result
+
+    if not isinstance(pdf_path_arg, PdfSource) and not pdf_path.exists():
+        result.update(exit_code=2, error=f"PDF not found: {pdf_path}")
+        return result
+
+    if cache is None and cache_dir is not None:
+        cache = open_cache(cache_dir)
+    before = cache.stats() if cache is not None else None
+    # The token index is only stored when this document's checks would read it,
+    # normalised as the plan's checks search.
+    plan_used = plan or _default_plan()
+    token_index = plan_used.normaliser if wants_index(plan_used.expected_for(overrides)) else None
+    pdf = pdf_path_arg if isinstance(pdf_path_arg, PdfSource) else PdfSource(pdf_path)
+    try:
+        tpl = _ensure_template(tpl_path, boxes_pdf, verbose=verbose, registry=registry,
+                               doc_type=doc_type or pdf_path.stem)
+        if tpl is None and doc_type is None:
+            found = _classify(pdf, jw_json, registry, verbose=verbose)
+            if found is not None:
+                result["classified"] = found._asdict()
+                _, tpl_path, _, boxes_pdf, _ = _resolve_paths(pdf_path_arg, found.doc_type)
+                tpl = _ensure_template(tpl_path, boxes_pdf, verbose=verbose, registry=registry,
+                                       doc_type=found.doc_type)
+        if tpl is None:
+            result.update(exit_code=2, error=f"no template found for {pdf_path.name}")
+            return result
+
+        if stream:
+            code, checks = _validate_stream(pdf, tpl, first_half_json, verbose, page_workers, plan, overrides,
+                                            result, backend=backend)
+        elif state_dir is not None and pdf.path is not None:
+            code, checks = _validate_incremental(
+                pdf, tpl, first_half_json, state_dir, verbose, cache, page_workers, plan, overrides, result,
+                backend=backend, token_index=token_index
+            )
+        else:
+            _extract_first_half(pdf, tpl, first_half_json, verbose=verbose, cache=cache, page_workers=page_workers,
+                                backend=backend, token_index=token_index)
+            code, checks = _validate(first_half_json, verbose=verbose, plan=plan, overrides=overrides)
+    finally:
+        if pdf is not pdf_path_arg:
+            pdf.close()
+    result.update(exit_code=code, checks=checks)
+    if cache is not None:
+        result["cache"] = {k: v - before[k] for k, v in cache.stats().items()}
+    if code == 1 and not checks:
+        result["error"] = f"Cannot load extraction JSON: {first_half_json}"
+    return result
 
-    pdf_path_arg = sys.argv[1]
-    pdf_path, tpl_path, first_half_json, boxes_pdf, jw_json = _resolve_paths(pdf_path_arg)
 
+def main():
+    ap = argparse.ArgumentParser(description="Validate one PDF: template, extraction, checks.")
+    ap.add_argument("pdf", help="Path to the main PDF")
+    ap.add_argument("--page-workers", type=int, default=1,
+                    help="Extract this document's pages across N processes (long documents)")
+    ap.add_argument("--spec", help="Validation spec (JSON/YAML); default: specs/UMS025.json")
+    ap.add_argument("--state-dir", help="Incremental mode: reuse check results stored in this folder")
+    ap.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                    help="Text extraction backend (pdfplumber for layouts PyMuPDF gets wrong)")
+    ap.add_argument("--registry", help="Template registry file (see template_registry.py)")
+    ap.add_argument("--columnar", action="store_true",
+                    help="Store the extraction in the columnar format (.cols) instead of JSON")
+    ap.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Extraction cache directory")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Always re-extract (e.g. so --profile/--trace time the extraction)")
+    ap.add_argument("--stream", action="store_true",
+                    help="Extract to NDJSON and write each check to <doc>.first_half.checks.ndjson as it completes")
+    ap.add_argument("--profile", help="Write per-stage timings (JSON) to this file")
+    ap.add_argument("--trace", help="Write per-stage timings as Chrome trace events to this file")
+    ap.add_argument("--profile-memory", action="store_true",
+                    help="Also trace Python allocations per stage (slower)")
+    args = ap.parse_args()
+    if args.stream and (args.state_dir or args.columnar):
+        ap.error("--stream cannot be combined with --state-dir or --columnar")
+
+    pdf_path_arg = args.pdf
+    _, _, _, _, jw_json = _resolve_paths(pdf_path_arg)
     if not jw_json.exists():
         print(f"[ERROR] Expected folder missing: {jw_json}", file=sys.stderr)
         sys.exit(2)
 
-    tpl = _ensure_template(tpl_path, boxes_pdf)
-    _extract_first_half(pdf_path, tpl, first_half_json)
-    _validate(first_half_json)
+    plan = load_plan(args.spec) if args.spec else None
+    state_dir = Path(args.state_dir) if args.state_dir else None
+    registry = load_registry(args.registry) if args.registry else None
+    if args.profile or args.trace:
+        instrumentation.enable(trace_memory=args.profile_memory)
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    result = validate_document(pdf_path_arg, verbose=True, cache_dir=cache_dir, page_workers=args.page_workers,
+                               plan=plan, state_dir=state_dir, backend=args.backend, registry=registry,
+                               columnar=args.columnar, stream=args.stream)
+    if result["exit_code"] == 2 and result["error"]:
+        print(f"[ERROR] {result['error']}", file=sys.stderr)
+
+    rec = instrumentation.disable()
+    if rec is not None:
+        print(rec.format_summary())
+        if args.profile:
+            print(f"[OK] Wrote profile to: {rec.to_json(args.profile)}")
+        if args.trace:
+            print(f"[OK] Wrote trace to: {rec.to_chrome_trace(args.trace)}")
+    sys.exit(result["exit_code"])
 
 
 if __name__ == "__main__":
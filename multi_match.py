@@ -0,0 +1,152 @@
+# multi_match.py
+# Multi-pattern matching for expected-value checks, compiled once per value set.
+# Large value sets are compiled into a trie rendered as one regular expression, so
+# a single pass inside the C regex engine finds every value (Aho-Corasick style).
+# Below TRIE_THRESHOLD distinct values, CPython's C substring search per value is
+# faster than any single-pass scan, so the matcher uses that instead; both engines
+# return the same matches.
+
+from typing import Dict, Iterator, List, Tuple
+import re
+
+# Measured crossover: ~300 distinct values, largely independent of text length.
+TRIE_THRESHOLD = 300
+
+
+def _trie_regex(node: dict) -> str:
+    # Render a trie (char -> child, "" marks end of a pattern) as a regex that
+    # prefers the longest pattern at each position.
+    branches = []
+    for ch in sorted(k for k in node if k):
+        branches.append(re.escape(ch) + _trie_regex(node[ch]))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A pattern ends here; longer continuations are optional and tried first.
+        return "(?:" + body + ")?"
+    return body
+
+
+class MultiPatternMatcher:
+    # Find every occurrence of every expected value, with offsets.
+    # Built from the same {label: value} dict the checks use; several labels may
+    # share a value. case_sensitive=False matches like value.lower() in text.lower().
+
+    def __init__(self, patterns: Dict[str, str], case_sensitive: bool = True, engine: str = "auto"):
+        if engine not in ("auto", "find", "trie"):
+            raise ValueError(f"Unknown matcher engine: {engine}")
+        self.case_sensitive = case_sensitive
+        self.labels_for: Dict[str, List[str]] = {}
+        for label, value in patterns.items():
+            if not isinstance(value, str) or not value:
+                continue
+            key = value if case_sensitive else value.lower()
+            self.labels_for.setdefault(key, []).append(label)
+
+        self.max_len = max((len(k) for k in self.labels_for), default=0)
+        if engine == "auto":
+            engine = "trie" if len(self.labels_for) >= TRIE_THRESHOLD else "find"
+        self.engine = engine
+        self._regex = None
+        if engine == "trie":
+            self._compile_trie()
+
+    def _compile_trie(self) -> None:
+        trie: dict = {}
+        for key in self.labels_for:
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[""] = True
+
+        # The regex reports the longest pattern starting at each position; any
+        # shorter pattern that is a prefix of it matches at the same position too.
+        self._prefixes: Dict[str, List[str]] = {}
+        for key in self.labels_for:
+            node = trie
+            shorter = []
+            for i, ch in enumerate(key[:-1], start=1):
+                node = node[ch]
+                if "" in node:
+                    shorter.append(key[:i])
+            self._prefixes[key] = shorter
+        body = _trie_regex(trie)
+        self._regex = re.compile("(?=(" + body + "))", re.DOTALL) if body else None
+
+    def prepare(self, text: str) -> str:
+        # Text as the matcher sees it; offsets refer to this string.
+        text = text or ""
+        return text if self.case_sensitive else text.lower()
+
+    def iter_values(self, text: str, prepared: bool = False) -> Iterator[Tuple[str, int, int]]:
+        # Yield (value, start, end) for every occurrence, including overlapping ones.
+        if not prepared:
+            text = self.prepare(text)
+        if self.engine == "find":
+            for key in self.labels_for:
+                start = text.find(key)
+                while start != -1:
+                    yield key, start, start + len(key)
+                    start = text.find(key, start + 1)
+            return
+        if self._regex is None:
+            return
+        for m in self._regex.finditer(text):
+            longest = m.group(1)
+            if not longest:
+                continue
+            start = m.start()
+            yield longest, start, start + len(longest)
+            for shorter in self._prefixes[longest]:
+                yield shorter, start, start + len(shorter)
+
+    def find_all(self, text: str) -> List[Tuple[str, int, int]]:
+        # Every (label, start, end) match, ordered by position.
+        out = []
+        for value, start, end in self.iter_values(text):
+            for label in self.labels_for[value]:
+                out.append((label, start, end))
+        out.sort(key=lambda t: (t[1], t[2]))
+        return out
+
+    def found(self, text: str) -> Dict[str, int]:
+        # Map each label found to the offset of its first occurrence.
+        first: Dict[str, int] = {}
+        if self.engine == "find":
+            text = self.prepare(text)
+            for key, labels in self.labels_for.items():
+                start = text.find(key)
+                if start != -1:
+                    for label in labels:
+                        first[label] = start
+            return first
+        for value, start, _ in self.iter_values(text):
+            for label in self.labels_for[value]:
+                if label not in first or start < first[label]:
+                    first[label] = start
+        return first
+
+
+class StreamScanner:
+    # Track which labels occur in text that arrives in chunks, giving the same
+    # answer as matcher.found("".join(chunks)). The last max_len - 1 characters
+    # are carried over so values straddling a chunk boundary are still found.
+
+    def __init__(self, matcher: MultiPatternMatcher):
+        self.matcher = matcher
+        self.found: Dict[str, int] = {}
+        self._tail = ""
+        self._offset = 0
+
+    def feed(self, chunk: str) -> None:
+        chunk = chunk or ""
+        text = self._tail + chunk
+        base = self._offset - len(self._tail)
+        for label, start in self.matcher.found(text).items():
+            pos = base + start
+            if label not in self.found or pos < self.found[label]:
+                self.found[label] = pos
+        keep = self.matcher.max_len - 1
+        self._tail = text[-keep:] if keep > 0 else ""
+        self._offset += len(chunk)
@@ -0,0 +1,197 @@
+# normalise.py
+# Text normalisation for checks, configured by a spec's "normalisation" options
+# and compiled once per spec:
+#   casefold    "UATJMFC" matches "UATjmfC"
+#   whitespace  runs of spaces/newlines become one space
+#   amounts     "£ 193,164.73 p", "£193,164.73" and "193,164.73" become "193164.73"
+#   dates       "29 November 2025", "29 Nov 2025", "29 11 2025", "29/11/2025",
+#               "29.11.2025" and "2025-11-29" become "2025-11-29"
+# A document's text is normalised once into a NormalisedText, which keeps an
+# offset map back to the original, and expected values go through the same
+# rules, so every check is a plain substring search of the normalised buffer.
+# The normaliser keeps no texts: a plan or worker lives for many documents, so
+# callers hold a document's normalised buffers only while checking it.
+# With no options set the normaliser is the identity and checks see raw text.
+
+from array import array
+from bisect import bisect_left
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+import re
+
+OPTIONS = ("casefold", "whitespace", "amounts", "dates", "date_order")
+DATE_ORDERS = ("dmy", "mdy")
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH_RE = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+             r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_DATE_RE = re.compile(
+    r"\b(?:"
+    r"(?P<d1>\d{1,2})(?:st|nd|rd|th)?\s+(?P<mon>" + _MONTH_RE + r")\.?,?\s+(?P<y1>\d{4})"
+    r"|(?P<a>\d{1,2})(?P<sep>[/.\- ])(?P<b>\d{1,2})(?P=sep)(?P<y2>\d{4})"
+    r"|(?P<y3>\d{4})-(?P<m3>\d{2})-(?P<d3>\d{2})"
+    r")\b",
+    re.IGNORECASE,
+)
+_NUMBER = r"\d{1,3}(?:,\d{3})+|\d+"
+# A currency sign makes the pence optional; a bare number needs them, so
+# references and IDs are left alone. A trailing "p" (pence column) is dropped.
+_AMOUNT_RE = re.compile(
+    r"(?:[£$€]\s*(?P<ci>" + _NUMBER + r")(?:\.(?P<cd>\d{2}))?"
+    r"|(?<![\d.,])(?P<i>" + _NUMBER + r")\.(?P<d>\d{2}))"
+    r"(?![\d,]|\.\d)(?:\s*p\b)?"
+)
+_SPACE_RE = re.compile(r"\s+")
+
+
+class NormalisedText:
+    # A normalised string with, for each of its characters, the [start, end) span
+    # of original text it came from.
+
+    def __init__(self, original: str, text: str, starts: array, ends: array):
+        self.original = original
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def find(self, needle: str, start: int = 0, end: Optional[int] = None) -> int:
+        return self.text.find(needle, start, len(self.text) if end is None else end)
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        # Span of the original text that normalised [start, end) came from.
+        if end <= start:
+            pos = self.starts[start] if start < len(self.text) else len(self.original)
+            return pos, pos
+        return self.starts[start], self.ends[end - 1]
+
+    def to_normalised(self, offset: int) -> int:
+        # Normalised offset of the first character from original offset onwards.
+        return bisect_left(self.starts, offset)
+
+
+Rule = Callable[[re.Match], Optional[str]]
+
+
+def _apply(rule_re: re.Pattern, rule: Rule, text: str, starts: List[int], ends: List[int]):
+    # One substitution pass that carries the offset map along: unchanged text keeps
+    # its offsets, a replacement maps wholly onto the span of the match.
+    out, new_starts, new_ends = [], [], []
+    pos = 0
+    for m in rule_re.finditer(text):
+        repl = rule(m)
+        if repl is None or repl == m.group():
+            continue
+        ms, me = m.span()
+        out.append(text[pos:ms])
+        new_starts.extend(starts[pos:ms])
+        new_ends.extend(ends[pos:ms])
+        out.append(repl)
+        new_starts.extend([starts[ms]] * len(repl))
+        new_ends.extend([ends[me - 1]] * len(repl))
+        pos = me
+    if pos == 0:
+        return text, starts, ends
+    out.append(text[pos:])
+    new_starts.extend(starts[pos:])
+    new_ends.extend(ends[pos:])
+    return "".join(out), new_starts, new_ends
+
+
+def _iso(year: str, month: int, day: int) -> Optional[str]:
+    try:
+        return date(int(year), month, day).isoformat()
+    except ValueError:
+        return None
+
+
+class Normaliser:
+
+    def __init__(
+        self,
+        casefold: bool = False,
+        whitespace: bool = False,
+        amounts: bool = False,
+        dates: bool = False,
+        date_order: str = "dmy"
+    ):
+        if date_order not in DATE_ORDERS:
+            raise ValueError(f"Unknown date_order: {date_order} (choose from {', '.join(DATE_ORDERS)})")
+        self.options = {"casefold": casefold, "whitespace": whitespace, "amounts": amounts,
+                        "dates": dates, "date_order": date_order}
+        self.active = casefold or whitespace or amounts or dates
+        self._rules: List[Tuple[re.Pattern, Rule]] = []
+        if dates:
+            self._rules.append((_DATE_RE, self._date))
+        if amounts:
+            self._rules.append((_AMOUNT_RE, self._amount))
+        if whitespace:
+            self._rules.append((_SPACE_RE, lambda m: " "))
+        self._casefold = casefold
+
+    @classmethod
+    def from_options(cls, options: Optional[dict]) -> "Normaliser":
+        # A spec's "normalisation" mapping; unknown keys are an error.
+        options = dict(options or {})
+        unknown = set(options) - set(OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown normalisation options: {', '.join(sorted(unknown))}")
+        return cls(**options)
+
+    def key(self) -> Optional[list]:
+        # Stable description for fingerprints; None for the identity.
+        return [self.options[k] for k in OPTIONS] if self.active else None
+
+    # --- rules -------------------------------------------------------------------
+
+    def _date(self, m: re.Match) -> Optional[str]:
+        if m.group("mon"):
+            return _iso(m.group("y1"), _MONTHS[m.group("mon")[:3].lower()], int(m.group("d1")))
+        if m.group("y2"):
+            a, b = int(m.group("a")), int(m.group("b"))
+            day, month = (a, b) if self.options["date_order"] == "dmy" else (b, a)
+            return _iso(m.group("y2"), month, day)
+        return _iso(m.group("y3"), int(m.group("m3")), int(m.group("d3")))
+
+    @staticmethod
+    def _amount(m: re.Match) -> str:
+        whole = (m.group("ci") or m.group("i")).replace(",", "").lstrip("0") or "0"
+        pence = m.group("cd") or m.group("d") or "00"
+        return f"{whole}.{pence}"
+
+    # --- applying ----------------------------------------------------------------
+
+    def apply(self, original: str) -> NormalisedText:
+        text = original or ""
+        starts = list(range(len(text)))
+        ends = list(range(1, len(text) + 1))
+        for rule_re, rule in self._rules:
+            text, starts, ends = _apply(rule_re, rule, text, starts, ends)
+        if self._casefold:
+            folded = text.casefold()
+            if len(folded) != len(text):
+                # Some characters fold to several (e.g. "ß" -> "ss").
+                new_starts, new_ends = [], []
+                for ch, s, e in zip(text, starts, ends):
+                    n = len(ch.casefold())
+                    new_starts.extend([s] * n)
+                    new_ends.extend([e] * n)
+                starts, ends = new_starts, new_ends
+            text = folded
+        return NormalisedText(original or "", text, array("I", starts), array("I", ends))
+
+    def value(self, value: str) -> str:
+        # An expected value, normalised as document text is (and stripped).
+        if not self.active or not isinstance(value, str):
+            return value
+        return self.apply(value).text.strip()
+
+    def values(self, expected: Dict[str, str]) -> Dict[str, str]:
+        if not self.active:
+            return expected
+        return {label: self.value(v) for label, v in expected.items()}
@@ -0,0 +1,196 @@
+# section_index.py
+# Named sections of one document text, held as character offsets.
+# The extractor stores the full text once plus [start, end) spans for every page
+# and for named sections (page ranges such as "pages 6 onwards", or the text
+# between markers such as "P45 Part 1A" and "P45 Part 2"). Checks search the
+# one text buffer within a span (str.find with start/end copies nothing) instead
+# of separate section strings duplicated in the JSON, and presence(...) answers
+# "which sections contain each value" from a single match pass.
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from multi_match import MultiPatternMatcher
+
+FULL = "full"
+SECTION_SUFFIX = "_section"  # "<name>_section" keys of older extraction JSON
+
+Span = Tuple[int, int]
+
+
+class SectionIndex:
+
+    def __init__(
+        self,
+        text: str,
+        pages: Sequence[Sequence[int]] = (),
+        sections: Optional[Dict[str, Sequence[int]]] = None
+    ):
+        # text: the full document text. pages: [page_number, start, end] per
+        # extracted page, in order. sections: {name: [start, end]}.
+        self.text = text or ""
+        self.pages: List[Tuple[int, int, int]] = [(int(n), int(s), int(e)) for n, s, e in pages]
+        self.sections: Dict[str, Span] = {name: (int(s), int(e)) for name, (s, e) in (sections or {}).items()}
+        # Spec sections add_spec_sections could not place (no marker match and no
+        # page spans to fall back on); they search as empty.
+        self.unplaced: List[str] = []
+
+    @classmethod
+    def from_page_texts(cls, page_texts: Iterable[Tuple[int, str]], sep: str = "\n") -> "SectionIndex":
+        # Build the text exactly as sep.join(texts) and record each page's span.
+        parts, pages = [], []
+        offset = 0
+        for n, (page_number, text) in enumerate(page_texts):
+            if n:
+                parts.append(sep)
+                offset += len(sep)
+            parts.append(text)
+            pages.append((page_number, offset, offset + len(text)))
+            offset += len(text)
+        return cls("".join(parts), pages)
+
+    @classmethod
+    def from_dict(cls, text: str, data: dict) -> "SectionIndex":
+        return cls(text, data.get("pages") or (), data.get("sections") or {})
+
+    def to_dict(self) -> dict:
+        return {
+            "pages": [list(p) for p in self.pages],
+            "sections": {name: list(span) for name, span in self.sections.items()},
+        }
+
+    def remapped(self, text: str, offset_map: Callable[[int], int]) -> "SectionIndex":
+        # The same pages and sections over a transformed copy of the text (e.g. a
+        # normalise.NormalisedText), every offset mapped through offset_map.
+        index = SectionIndex(
+            text,
+            [(n, offset_map(s), offset_map(e)) for n, s, e in self.pages],
+            {name: (offset_map(s), offset_map(e)) for name, (s, e) in self.sections.items()},
+        )
+        index.unplaced = list(self.unplaced)
+        return index
+
+    # --- defining sections ------------------------------------------------------
+
+    def page_span(self, first: int = 1, last: Optional[int] = None) -> Optional[Span]:
+        # Span from the start of the first extracted page numbered >= first to the
+        # end of the last one <= last (None: to the last page); None if no page fits.
+        inside = [(s, e) for n, s, e in self.pages if n >= first and (last is None or n <= last)]
+        if not inside:
+            return None
+        return inside[0][0], inside[-1][1]
+
+    def add_pages(self, name: str, first: int = 1, last: Optional[int] = None) -> Optional[Span]:
+        span = self.page_span(first, last)
+        if span is not None:
+            self.sections[name] = span
+        return span
+
+    def add_marker(self, name: str, marker: str, end_marker: Optional[str] = None) -> Optional[Span]:
+        # Section from the first occurrence of marker up to the next end_marker
+        # (or the end of the text); None when the marker does not occur.
+        start = self.text.find(marker)
+        if start == -1:
+            return None
+        end = len(self.text)
+        if end_marker:
+            stop = self.text.find(end_marker, start + len(marker))
+            if stop != -1:
+                end = stop
+        self.sections[name] = (start, end)
+        return self.sections[name]
+
+    def add_spec_sections(self, sections: Iterable[dict]) -> None:
+        # Spec "sections" entries: {"name", "marker", "end_marker"?} or
+        # {"name", "pages": [first, last|null]}. With both, the marker wins and the
+        # page range is the fallback when the marker is missing.
+        for section in sections or ():
+            name = section["name"]
+            if section.get("marker") and self.add_marker(name, section["marker"], section.get("end_marker")):
+                continue
+            if section.get("pages"):
+                first, last = (list(section["pages"]) + [None])[:2]
+                if self.add_pages(name, first or 1, last):
+                    continue
+            self.unplaced.append(name)
+
+    # --- searching --------------------------------------------------------------
+
+    def span(self, name: Optional[str] = None) -> Span:
+        # Span of a section; None or "full" is the whole text. Unknown sections are empty.
+        if name is None or name == FULL:
+            return 0, len(self.text)
+        return self.sections.get(name, (0, 0))
+
+    def find(self, needle: str, name: Optional[str] = None) -> int:
+        # Offset of the first occurrence lying wholly inside the section, or -1.
+        start, end = self.span(name)
+        return self.text.find(needle, start, end)
+
+    def contains(self, needle: str, name: Optional[str] = None) -> bool:
+        return self.find(needle, name) != -1
+
+    def section_text(self, name: Optional[str] = None) -> str:
+        # A copy of the section, for display; searches should use find/contains.
+        start, end = self.span(name)
+        return self.text[start:end]
+
+    def presence(self, matcher: MultiPatternMatcher, names: Optional[Iterable[str]] = None) -> Dict[str, Set[str]]:
+        # {label: sections containing it} for every label the matcher finds, from
+        # one pass over the full text; "full" is included for any hit.
+        names = list(self.sections) if names is None else list(names)
+        spans = [(name, self.span(name)) for name in names]
+        found: Dict[str, Set[str]] = {}
+        for label, start, end in matcher.find_all(self.text):
+            where = found.setdefault(label, {FULL})
+            for name, (s, e) in spans:
+                if s <= start and end <= e:
+                    where.add(name)
+        return found
+
+
+def index_from_extraction(data: dict, sections: Iterable[dict] = ()) -> SectionIndex:
+    # SectionIndex for a structured extraction JSON: its stored "section_index"
+    # when present, else one rebuilt from per-page texts, else (the oldest JSON,
+    # full_document plus "<name>_section" copies) the copies located in the text.
+    # Spec sections it lacks are then added; see SectionIndex.unplaced.
+    text = data.get("full_document", "") or ""
+    stored = data.get("section_index")
+    if stored:
+        index = SectionIndex.from_dict(text, stored)
+    elif data.get("pages") and all("full_text" in p for p in data["pages"]):
+        index = SectionIndex.from_page_texts((p["page_number"], p["full_text"]) for p in data["pages"])
+    else:
+        index = SectionIndex(text, sections=_stored_sections(text, data))
+    index.add_spec_sections(s for s in sections or () if s["name"] not in index.sections)
+    return index
+
+
+def _stored_sections(text: str, data: dict) -> Dict[str, Span]:
+    # Spans of the section copies older extractors stored ("p45_section", ...);
+    # a copy that is not part of full_document means the JSON is inconsistent.
+    spans: Dict[str, Span] = {}
+    for key, value in data.items():
+        if not key.endswith(SECTION_SUFFIX) or not isinstance(value, str) or not value:
+            continue
+        start = text.find(value)
+        if start == -1:
+            raise ValueError(f"Stored {key} not found in full_document")
+        spans[key[:-len(SECTION_SUFFIX)]] = (start, start + len(value))
+    return spans
+
+
+def section_pages(sections: Iterable[dict], page_count: int) -> Optional[List[int]]:
+    # 1-based pages the spec's page-range sections cover, so an extractor can skip
+    # the rest. None (every page) when there are no sections or any section is
+    # located by a marker, since the marker can be on any page.
+    pages: Set[int] = set()
+    sections = list(sections or ())
+    if not sections:
+        return None
+    for section in sections:
+        if section.get("marker") or not section.get("pages"):
+            return None
+        first, last = (list(section["pages"]) + [None])[:2]
+        last = page_count if last is None else min(last, page_count)
+        pages.update(range(first or 1, last + 1))
+    return sorted(pages)
@@ -0,0 +1,283 @@
+# service.py
+# Long-running validation service: a small asyncio HTTP server (TCP or Unix socket)
+# in front of a warm process pool, so callers pay extraction time per document
+# instead of interpreter start-up and pdfplumber import.
+#
+#   POST /validate  {"pdf_path": "...", "doc_type": "UMS025"?, "spec": {...}?, "values": {...}?}
+#                   {"pdf_base64": "...", "doc_type": "UMS025", "spec": {...}?, "values": {...}?}
+#   GET  /health
+#
+# "spec" uses the specs/*.json format; keys it leaves out fall back to the default
+# spec. "values" overrides expected values for this document only, like a manifest row.
+# An optional "backend" ("pymupdf" or "pdfplumber") picks the text extraction backend.
+# The response body is validate_document()'s result.
+# When every worker is busy and the wait queue is full, requests get 503 + Retry-After.
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+from main import DEFAULT_SPEC, validate_document
+from json_work.python_files.extract_backends import DEFAULT_BACKEND
+from json_work.python_files.pdf_input import PdfSource
+from json_work.python_files.template_registry import TemplateRegistry, load_registry
+from validation_spec import ValidationPlan, load_plan, load_spec
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+_registry: Optional[TemplateRegistry] = None
+
+
+def _warm_worker(registry_path: Optional[str] = None) -> None:
+    # Pay the heavy imports and template loads once per worker process. With a
+    # registry that is a single file read; otherwise every template file is loaded.
+    global _registry
+    import fitz  # noqa: F401
+    import pdfplumber  # noqa: F401
+    from json_work.python_files.compiled_template import load_template
+
+    load_plan(str(DEFAULT_SPEC))
+
+    if registry_path:
+        _registry = load_registry(registry_path)
+        return
+    for tpl in Path("./json_work/json_files").glob("*_boxes_template.*"):
+        try:
+            load_template(tpl)
+        except Exception:
+            pass
+
+
+_plans = {}
+
+
+def _plan(spec: Optional[dict]) -> Optional[ValidationPlan]:
+    # Compile each distinct request spec once per worker; None means the default plan.
+    if not spec:
+        return None
+    key = json.dumps(spec, sort_keys=True)
+    plan = _plans.get(key)
+    if plan is None:
+        if len(_plans) >= 64:
+            _plans.clear()
+        plan = _plans[key] = ValidationPlan({**load_spec(DEFAULT_SPEC), **spec})
+    return plan
+
+
+def _service_validate(request: dict) -> dict:
+    # Worker entry point. Extraction JSON goes to a private temp dir, so
+    # concurrent requests for the same doc type never share an output file.
+    doc_type = request.get("doc_type")
+    plan = _plan(request.get("spec"))
+    with tempfile.TemporaryDirectory(prefix="rlpdf_") as tmp:
+        out_json = Path(tmp) / "extraction.json"
+        if "pdf_base64" in request:
+            # Validated straight from memory; the PDF never touches disk.
+            pdf_path = PdfSource(base64.b64decode(request["pdf_base64"]), name=f"{doc_type}.pdf")
+        else:
+            pdf_path = Path(request["pdf_path"])
+            if not pdf_path.exists():
+                return {"pdf": str(pdf_path), "exit_code": 2, "checks": [], "error": f"PDF not found: {pdf_path}"}
+            pdf_path = str(pdf_path)
+        try:
+            return validate_document(
+                pdf_path,
+                verbose=False,
+                out_json=out_json,
+                plan=plan,
+                overrides=request.get("values"),
+                doc_type=doc_type,
+                backend=request.get("backend") or DEFAULT_BACKEND,
+                registry=_registry
+            )
+        except Exception as e:
+            return {"pdf": str(getattr(pdf_path, "name", pdf_path)), "exit_code": 2, "checks": [],
+                    "error": f"{type(e).__name__}: {e}"}
+
+
+class ValidationService:
+
+    def __init__(self, workers: int, max_queue: int, registry_path: Optional[str] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker, initargs=(registry_path,))
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.running = 0
+        self.served = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        # Spin every worker up now rather than on the first request.
+        self._slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)))
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "served": self.served,
+            "rejected": self.rejected,
+        }
+
+    async def validate(self, request: dict) -> Tuple[int, dict]:
+        # Bounded admission: at most `workers` documents run and `max_queue` wait.
+        if self.waiting >= self.max_queue and self._slots.locked():
+            self.rejected += 1
+            return 503, {"error": "busy, retry later"}
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, _service_validate, request)
+        finally:
+            self.running -= 1
+            self._slots.release()
+        self.served += 1
+        return 200, result
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # One request per connection; enough HTTP/1.1 for curl and test runners.
+        try:
+            status, body, extra = await self._dispatch(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        payload = json.dumps(body).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                  503: "Service Unavailable"}.get(status, "OK")
+        head = [f"HTTP/1.1 {status} {reason}", "Content-Type: application/json",
+                f"Content-Length: {len(payload)}", "Connection: close"] + extra
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("ascii") + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader: asyncio.StreamReader) -> tuple:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) < 2:
+            return 400, {"error": "malformed request line"}, []
+        method, target = parts[0].upper(), parts[1]
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "GET" and target == "/health":
+            return 200, self.health(), []
+        if method != "POST" or target != "/validate":
+            return 404, {"error": f"no route for {method} {target}"}, []
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return 400, {"error": "bad Content-Length"}, []
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "request body too large"}, []
+        try:
+            request = json.loads(await reader.readexactly(length) or b"{}")
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"invalid JSON: {e}"}, []
+
+        error = _check_request(request)
+        if error:
+            return 400, {"error": error}, []
+
+        status, body = await self.validate(request)
+        return status, body, (["Retry-After: 1"] if status == 503 else [])
+
+
+def _check_request(request) -> Optional[str]:
+    if not isinstance(request, dict):
+        return "request body must be a JSON object"
+    if "pdf_base64" in request:
+        if not request.get("doc_type"):
+            return "doc_type is required with pdf_base64"
+        try:
+            base64.b64decode(request["pdf_base64"], validate=True)
+        except (binascii.Error, TypeError):
+            return "pdf_base64 is not valid base64"
+    elif not isinstance(request.get("pdf_path"), str):
+        return "pdf_path or pdf_base64 is required"
+    if "spec" in request:
+        if not isinstance(request["spec"], dict):
+            return "spec must be an object"
+        try:
+            _plan(request["spec"])
+        except (TypeError, ValueError) as e:
+            return f"invalid spec: {e}"
+    if "values" in request and not isinstance(request["values"], dict):
+        return "values must be an object"
+    return None
+
+
+async def serve(
+    host: str,
+    port: int,
+    unix_path: Optional[str],
+    workers: int,
+    max_queue: int,
+    registry_path: Optional[str] = None
+) -> None:
+    service = ValidationService(workers, max_queue, registry_path)
+    await service.start()
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(service.handle, host=host, port=port)
+        where = f"http://{host}:{port}"
+    print(f"[OK] Validation service on {where} ({workers} workers, queue {max_queue})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve PDF validation over HTTP with a warm worker pool.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--unix", dest="unix_path", help="Listen on this Unix socket instead of TCP")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--max-queue", type=int, default=64, help="Requests allowed to wait for a worker")
+    ap.add_argument("--registry", help="Template registry file, loaded once per worker at start-up")
+    args = ap.parse_args()
+
+    registry_path = str(Path(args.registry).resolve()) if args.registry else None
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix_path, args.workers, args.max_queue, registry_path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
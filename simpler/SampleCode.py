@@ -1,20 +1,28 @@
 
 # SampleCode.py
-# - Ensures extracted JSON exists (creates it if missing by calling extract_to_json).
+# - Ensures extracted JSON is current (re-extracts on a cache miss: PDF bytes,
+#   extractor version or expected values changed). The JSON lives in the
+#   extraction cache (.cache/extraction); files next to the PDF are never written.
 # - Validates that expected values appear somewhere in the full document.
 # - Prints a human-friendly summary and machine-readable JSON.
 # No templates, no coordinates, no page/box logic.
+# Run from the repo root: python -m simpler.SampleCode simpler/UMS025.pdf
 
 import json
 import sys
+import tempfile
 from pathlib import Path
 
-from extract_to_json import extract_pdf_to_structured_json, expected_values
+from extraction_cache import ExtractionCache, cache_key
+from json_work.python_files.extract_backends import DEFAULT_BACKEND
+from multi_match import MultiPatternMatcher
+from simpler.extract_to_json import EXTRACTOR_VERSION, extract_pdf_to_structured_json, expected_values, spec_normaliser
 
 
 def contains(haystack: str, needle: str) -> bool:
-    # Case-insensitive containment check with basic None safety.
-    return (needle or "").lower() in (haystack or "").lower()
+    # Containment under the spec's normalisation, with basic None safety.
+    norm = spec_normaliser()
+    return norm.value(needle or "") in norm.apply(haystack or "").text
 
 
 def format_summary(validations: dict) -> str:
@@ -41,19 +49,23 @@ def format_summary(validations: dict) -> str:
 
 def validate_full_document(full_document: str, exp: dict) -> dict:
     # Produce a dict of PASS/FAIL messages per expected field.
+    # Values and document go through the spec's normalisation once each;
+    # messages keep the values as written in the spec.
+    norm = spec_normaliser()
+    hits = MultiPatternMatcher(norm.values(exp)).found(norm.apply(full_document).text)
     results = {}
     for label, value in exp.items():
-        ok = contains(full_document, value)
+        ok = not value or label in hits
         results[label] = "PASS" if ok else f"FAIL - Expected '{value}'"
 
     return results
 
 
 def main():
-    # Usage: python SampleCode.py <pdf_path>
-    # JSON will be created in ./json_work/json_files/<PDF_NAME>.json (if missing).
+    # Usage: python -m simpler.SampleCode <pdf_path>
+    # The extracted JSON is kept in the extraction cache, keyed by the PDF's bytes.
     if len(sys.argv) < 2:
-        print("Usage: python SampleCode.py <pdf_path>")
+        print("Usage: python -m simpler.SampleCode <pdf_path>")
         sys.exit(2)
 
     pdf_path = Path(sys.argv[1]).resolve()
@@ -61,19 +73,23 @@ def main():
         print(f"ERROR: PDF not found: {pdf_path}")
         sys.exit(2)
 
-    # Where we store the extracted JSON (in the same folder as PDF)
-    json_out_path = pdf_path.with_suffix('.json')
-
-    # Create the JSON if it doesn't exist
-    if not json_out_path.exists():
+    # Reuse a cached extraction only if the PDF bytes, extractor and expected
+    # values and normalisation (they drive header discovery) all match.
+    cache = ExtractionCache()
+    key = cache_key(pdf_path, None, EXTRACTOR_VERSION, expected=expected_values(),
+                    normalisation=spec_normaliser().key(), backend=DEFAULT_BACKEND)
+    data = cache.get(key)
+    if data is not None:
+        print("Step 1: Extraction cache hit; reusing JSON...")
+        data["pdf_path"] = str(pdf_path)
+    else:
         print("Step 1: Extracting PDF to JSON...")
-        created = extract_pdf_to_structured_json(str(pdf_path), str(json_out_path))
-        print(f"[OK] Saved JSON to {created}")
-
-    # Load the JSON
-    print("Step 2: Loading JSON for validation...")
-    with json_out_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+        with tempfile.TemporaryDirectory() as tmp:
+            created = extract_pdf_to_structured_json(str(pdf_path), str(Path(tmp) / "extraction.json"),
+                                                     backend=DEFAULT_BACKEND)
+            with created.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        print(f"[OK] Saved JSON to {cache.put(key, data)}")
 
     full_document = data.get("full_document", "") or ""
     if not full_document.strip():
@@ -81,7 +97,7 @@ def main():
         sys.exit(2)
 
     # Run validations
-    print("Step 3: Validating expected values in full document...")
+    print("Step 2: Validating expected values in full document...")
     exp = expected_values()
     results = validate_full_document(full_document, exp)
 
@@ -3,51 +3,110 @@
 # Simple extractor:
 # - Reads a PDF and writes a JSON containing:
 #   - full_document (concatenated text of all pages)
-#   - pages[x].full_text (text per page)
+#   - section_index (offsets into full_document: each page's span and the spec's
+#     named sections, e.g. pre5 / p45; see section_index.py)
 #   - pages[x].headers (expected values found on that page)
 #   - headers_global (expected values found anywhere across the document)
+# Page and section texts are not stored again; they are spans of full_document.
+# Shares the repository's helpers, so it is imported from the repo root
+# (python -m simpler.SampleCode, like the benchmarks).
 
 import json
+from functools import lru_cache
 from pathlib import Path
-import pdfplumber  # pip install pdfplumber
+from typing import Iterable, Optional
+
+from multi_match import MultiPatternMatcher
+from normalise import Normaliser
+from section_index import SectionIndex, section_pages
+from json_work.python_files.extract_backends import DEFAULT_BACKEND, open_backend
+from json_work.python_files.lazy_document import resolve_pages
+from json_work.python_files.pdf_input import PdfSource
+from json_work.python_files.page_shards import map_page_shards
+from validation_spec import load_spec
+
+# Bump whenever the JSON layout changes, so cached extractions are invalidated.
+EXTRACTOR_VERSION = "structured-2"
+
+SPEC_PATH = Path(__file__).resolve().parent.parent / "specs" / "UMS025_P45.json"
 
 
 def expected_values() -> dict:
-    # Central place to define expected values for discovery in the PDF text.
-    return {
-        "Title": "MR",
-        "Surname": "UATjmfC",
-        "First Name": "TDMjmfC",
-        "Address": "Avenue Street",
-        "City": "London",
-        "Postcode": "W2 4BA",
-        "Date 1": "29 November 2025",
-        "Date 2": "26 November 2025",
-        "Customer ID": "7700049486",
-        "Pension Plan": "1000059054L",
-        "Plan Value": "190,664.73",
-        "Cash Withdrawal": "190,664.73",
-        "Plan Value Post Withdrawal": "0.00",
-        "Date 3": "27/11/2025",
-        # P45 section values:
-        "NI Number": "WM764243B",
-        "Leaving Date": "27 11 2025",
-        "Tax Code": "1250L",
-        "Total Pay to Date": "193,164.73",
-        "Total Tax to Date": "85,305.15",
-        "Date of Birth": "01 01 1995",
-        "Month Number": "8",
-        "Gender":"Male X"
-    }
+    # Expected values for discovery in the PDF text, from the UMS025 P45 spec.
+    return dict(load_spec(SPEC_PATH)["expected_values"])
 
 
-def contains(haystack: str, needle: str) -> bool:
-    # Case-insensitive containment check with basic None safety.
-    return (needle or "").lower() in (haystack or "").lower()
+def spec_sections() -> list:
+    # Named sections (page ranges / markers) indexed during extraction.
+    return list(load_spec(SPEC_PATH).get("sections") or [])
+
+
+def spec_pages(page_count: int) -> Optional[list]:
+    # Pages the spec needs parsed: every page while it has expected values (they
+    # are searched across the whole document), else the pages its sections cover.
+    if expected_values():
+        return None
+    return section_pages(spec_sections(), page_count)
 
 
-def extract_pdf_to_structured_json(pdf_path: str, output_json_path: str) -> Path:
+def spec_normaliser() -> Normaliser:
+    # The spec's "normalisation" options (case, whitespace, amounts, dates),
+    # compiled once per options; it keeps no texts, each caller normalises a
+    # document's text once and drops it with the document.
+    return _normaliser(json.dumps(load_spec(SPEC_PATH).get("normalisation") or {}, sort_keys=True))
+
+
+@lru_cache(maxsize=4)
+def _normaliser(options: str) -> Normaliser:
+    return Normaliser.from_options(json.loads(options))
+
+
+def contains(haystack: str, needle: str) -> bool:
+    # Containment under the spec's normalisation, with basic None safety.
+    norm = spec_normaliser()
+    return norm.value(needle or "") in norm.apply(haystack or "").text
+
+
+def _page_text(pdf, index: int) -> str:
+    text = pdf.text(index)
+    pdf.release(index)
+    return text
+
+
+def _extract_text_shard(indices: list, pdf_path: str, backend: str) -> list:
+    # Worker entry point: open the PDF in this process and extract a run of pages.
+    with PdfSource(pdf_path) as src, open_backend(backend, src) as pdf:
+        return [(index + 1, _page_text(pdf, index)) for index in indices]
+
+
+def _iter_page_texts(pdf_path: str, pages: Optional[Iterable[int]], workers: int, backend: str = DEFAULT_BACKEND):
+    # Yield (page_number, text) in page order, serially or from page shards
+    # spread over worker processes.
+    # pages=None parses only what the spec needs (spec_pages).
+    with PdfSource(pdf_path) as src, open_backend(backend, src) as pdf:
+        if pages is None:
+            pages = spec_pages(len(pdf))
+        indices = resolve_pages(pages, len(pdf))
+        if workers <= 1 or len(indices) < 2:
+            for index in indices:
+                yield index + 1, _page_text(pdf, index)
+            return
+    yield from map_page_shards(_extract_text_shard, indices, workers, pdf_path, backend)
+
+
+def extract_pdf_to_structured_json(
+    pdf_path: str,
+    output_json_path: str,
+    pages: Optional[Iterable[int]] = None,
+    workers: int = 1,
+    backend: str = DEFAULT_BACKEND
+) -> Path:
     # Open the PDF and collect full text per page and discovered headers.
+    # pages: 1-based page numbers to extract (negative counts from the end);
+    # None extracts the pages the spec needs (spec_pages). Pages not listed are
+    # never parsed.
+    # workers > 1 shards the pages across processes (same output).
+    # backend: "pymupdf" (default) or "pdfplumber".
     pdf_path_p = Path(pdf_path).resolve()
     out_p = Path(output_json_path).resolve()
 
@@ -55,41 +114,41 @@ def extract_pdf_to_structured_json(pdf_path: str, output_json_path: str) -> Path
         raise FileNotFoundError(f"PDF not found: {pdf_path_p}")
 
     exp = expected_values()
+    # Compiled once: each text is normalised once, not once per expected value.
+    norm = spec_normaliser()
+    matcher = MultiPatternMatcher(norm.values(exp))
     pages_out = []
-    full_document_parts = []
+    page_texts = []
 
-    with pdfplumber.open(str(pdf_path_p)) as pdf:
-        for idx, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            full_document_parts.append(text)
+    for idx, text in _iter_page_texts(str(pdf_path_p), pages, workers, backend):
+        page_texts.append((idx, text))
 
-            # Discover which expected values appear on this page
-            found_on_page = {}
-            for label, value in exp.items():
-                if contains(text, value):
-                    found_on_page[label] = value
+        # Discover which expected values appear on this page
+        hits = matcher.found(norm.apply(text).text)
+        found_on_page = {label: value for label, value in exp.items() if not value or label in hits}
 
-            pages_out.append({
-                "page_number": idx,
-                "full_text": text,
-                "headers": found_on_page
-            })
+        pages_out.append({
+            "page_number": idx,
+            "headers": found_on_page
+        })
 
-    # Build full document concatenation
-    full_document = "\n".join(full_document_parts)
+    # Build full document concatenation, with page spans and named sections
+    index = SectionIndex.from_page_texts(page_texts)
+    index.add_spec_sections(spec_sections())
+    full_document = index.text
+    del page_texts
 
     # Discover which expected values appear anywhere in the doc
-    headers_global = {}
-    for label, value in exp.items():
-        if contains(full_document, value):
-            headers_global[label] = value
+    hits = matcher.found(norm.apply(full_document).text)
+    headers_global = {label: value for label, value in exp.items() if not value or label in hits}
 
     data = {
         "pdf_path": str(pdf_path_p),
         "full_document": full_document,
+        "section_index": index.to_dict(),
         "headers_global": headers_global,
         "pages": pages_out
     }
     with out_p.open("w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
-
+    return out_p
@@ -0,0 +1,25 @@
+# conftest.py
+# Shared fixtures. main.py resolves templates and writes extraction JSON under
+# ./json_work, so tests that run the pipeline work in a copy of it in a temporary
+# directory and never touch the committed files.
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_PDF = REPO_ROOT / "json_work" / "sample_pdfs" / "UMS025.pdf"
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch) -> Path:
+    # A json_work tree with the committed template and sample PDFs; cwd is its parent.
+    for sub in ("json_files", "sample_pdfs"):
+        (tmp_path / "json_work" / sub).mkdir(parents=True)
+    shutil.copy(REPO_ROOT / "json_work" / "json_files" / "UMS025_boxes_template.json",
+                tmp_path / "json_work" / "json_files")
+    for pdf in ("UMS025.pdf", "UMS025_boxes.pdf"):
+        shutil.copy(REPO_ROOT / "json_work" / "sample_pdfs" / pdf, tmp_path / "json_work" / "sample_pdfs")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
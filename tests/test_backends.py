@@ -0,0 +1,72 @@
+# test_backends.py
+# Backend conformance: PyMuPDF (the default) must extract what the reference
+# pdfplumber backend does - full_text and box texts, with layout text and with
+# text built from the words - on the sample statement and on synthetic
+# documents, so switching backends never changes a check outcome.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic_pdf import STYLES, make_document
+from json_work.python_files.build_template_from_pdf import write_template_for_boxes_pdf
+from json_work.python_files.extract_backends import BACKENDS, DEFAULT_BACKEND, open_backend
+from json_work.python_files.extract_boxes_to_json import extract_to_json
+from json_work.python_files.pdf_input import PdfSource
+from validation_spec import load_plan
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_PDF = REPO_ROOT / "json_work" / "sample_pdfs" / "UMS025.pdf"
+SAMPLE_TEMPLATE = REPO_ROOT / "json_work" / "json_files" / "UMS025_boxes_template.json"
+SPECS = [REPO_ROOT / "specs" / "UMS025.json", REPO_ROOT / "specs" / "UMS025_P45.json"]
+REFERENCE = "pdfplumber"
+
+
+def _extract(pdf: Path, template: Path, out_dir: Path, layout_text: bool) -> dict:
+    out = {}
+    for name in BACKENDS:
+        path = extract_to_json(str(pdf), str(template), out_dir / f"{name}.{layout_text}.json",
+                               layout_text=layout_text, backend=name)
+        with path.open("r", encoding="utf-8") as f:
+            out[name] = json.load(f)
+    return out
+
+
+def _assert_same(runs: dict) -> None:
+    ref = runs[REFERENCE]
+    for name, data in runs.items():
+        assert data["full_text"] == ref["full_text"], name
+        assert {k: v["raw_text"] for k, v in data["boxes"].items()} == \
+               {k: v["raw_text"] for k, v in ref["boxes"].items()}, name
+
+
+def test_default_backend_is_a_known_backend():
+    assert DEFAULT_BACKEND in BACKENDS and REFERENCE in BACKENDS
+
+
+@pytest.mark.parametrize("layout_text", [True, False])
+def test_sample_extraction_and_checks_match(tmp_path, layout_text):
+    runs = _extract(SAMPLE_PDF, SAMPLE_TEMPLATE, tmp_path, layout_text)
+    _assert_same(runs)
+    for spec in SPECS:
+        plan = load_plan(str(spec))
+        assert plan.run(runs[DEFAULT_BACKEND]) == plan.run(runs[REFERENCE])
+
+
+def test_sample_page_texts_match():
+    with PdfSource(SAMPLE_PDF) as src:
+        texts = {}
+        for name in BACKENDS:
+            with open_backend(name, src) as backend:
+                texts[name] = [backend.text(i) for i in range(len(backend))]
+    assert texts[DEFAULT_BACKEND] == texts[REFERENCE]
+
+
+@pytest.mark.parametrize("layout_text", [True, False])
+@pytest.mark.parametrize("style", STYLES)
+def test_synthetic_extraction_matches(tmp_path, style, layout_text):
+    doc = make_document(tmp_path, style=style, pages=3, words_per_page=300, boxes=8)
+    template = write_template_for_boxes_pdf(str(doc.boxes_pdf_path), tmp_path / f"{doc.doc_type}_template.json")
+    _assert_same(_extract(doc.pdf_path, template, tmp_path, layout_text))
@@ -0,0 +1,66 @@
+# test_batch.py
+# Batch mode: one bad PDF is reported as that document's error without sinking
+# the run, results keep input order whatever the worker count, and the exit
+# code is the worst document's.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+import shutil
+import subprocess
+import sys
+
+from batch import BatchSummary, ResultsWriter, run_batch
+
+from conftest import REPO_ROOT, SAMPLE_PDF
+
+
+def _docs(workspace):
+    good = workspace / "docs" / "UMS025.pdf"
+    good.parent.mkdir()
+    shutil.copy(SAMPLE_PDF, good)
+    bad = workspace / "docs" / "broken.pdf"
+    bad.write_bytes(b"%PDF-1.4 not really a pdf")
+    return [good, bad, workspace / "docs" / "missing.pdf"]
+
+
+def test_errors_are_isolated_per_document(workspace):
+    pdfs = _docs(workspace)
+    results = run_batch(pdfs, workers=2, cache_dir=None)
+    assert [r["pdf"] for r in results] == [str(p) for p in pdfs]
+    assert [r["exit_code"] for r in results] == [0, 2, 2]
+    assert results[0]["error"] is None and results[0]["checks"]
+    assert results[1]["error"] and results[2]["error"]
+
+    summary = BatchSummary()
+    for r in results:
+        summary.add(r)
+    assert (summary.documents, summary.passed, len(summary.errors), summary.exit_code) == (3, 1, 2, 2)
+
+
+def test_worker_count_does_not_change_results(workspace):
+    pdfs = _docs(workspace)[:1] * 3
+    serial = run_batch(pdfs, workers=1, cache_dir=None)
+    pooled = run_batch(pdfs, workers=3, cache_dir=None)
+    assert [r["checks"] for r in serial] == [r["checks"] for r in pooled]
+
+
+def test_failed_check_exit_code_and_results_file(workspace):
+    spec = json.loads((REPO_ROOT / "specs" / "UMS025.json").read_text(encoding="utf-8"))
+    spec["expected_values"]["Surname"] = "NOT-IN-THE-PDF"
+    spec_path = workspace / "spec.json"
+    spec_path.write_text(json.dumps(spec), encoding="utf-8")
+    results = run_batch(_docs(workspace)[:1], workers=1, cache_dir=None, spec_path=str(spec_path))
+    assert results[0]["exit_code"] == 1
+
+    with ResultsWriter(workspace / "results.json") as out:
+        for r in results:
+            out.write(r)
+    assert json.loads((workspace / "results.json").read_text(encoding="utf-8"))["results"] == results
+
+
+def test_cli_exit_code_is_the_worst_document(workspace):
+    _docs(workspace)
+    proc = subprocess.run([sys.executable, str(REPO_ROOT / "batch.py"), "docs", "--workers", "1", "--no-cache"],
+                          capture_output=True, text=True, cwd=workspace)
+    assert proc.returncode == 2, proc.stdout + proc.stderr
+    assert "Documents: 2  Passed: 1  Failed: 0  Errors: 1" in proc.stdout
@@ -0,0 +1,82 @@
+# test_box_geometry.py
+# Word-to-box assignment: the grid index gives exactly the naive per-box scan,
+# including words touching box edges, words off the boxes and inverted rects;
+# the NumPy path gives the grid's reading-ordered result, ties included.
+# Run from the repo root: python -m pytest -q tests
+
+import random
+
+import pytest
+
+from json_work.python_files import box_geometry
+from json_work.python_files.box_geometry import (
+    BoxGrid,
+    assign_reading_order,
+    assign_words_naive,
+    assign_words_numpy,
+    assign_words_to_boxes,
+)
+
+from benchmarks.bench_box_assignment import synthetic_boxes, synthetic_words
+
+
+def _edge_cases():
+    # Words sharing an edge with a box, a zero-size box, an inverted rect and a
+    # word far outside everything.
+    rects = [(10.0, 10.0, 50.0, 30.0), (50.0, 30.0, 90.0, 60.0), (70.0, 70.0, 70.0, 70.0), (80.0, 5.0, 20.0, 1.0)]
+    words = [
+        {"text": "corner", "x0": 40.0, "x1": 50.0, "top": 20.0, "bottom": 30.0},
+        {"text": "point", "x0": 70.0, "x1": 71.0, "top": 69.0, "bottom": 70.0},
+        {"text": "left", "x0": 0.0, "x1": 10.0, "top": 0.0, "bottom": 10.0},
+        {"text": "away", "x0": 500.0, "x1": 520.0, "top": 700.0, "bottom": 710.0},
+    ]
+    return words, rects
+
+
+@pytest.mark.parametrize("n_words,n_boxes", [(0, 5), (30, 0), (50, 1), (300, 7), (1000, 50), (2000, 200)])
+def test_grid_matches_naive(n_words, n_boxes):
+    rng = random.Random(n_words * 1000 + n_boxes)
+    words = synthetic_words(n_words, rng)
+    rects = synthetic_boxes(n_boxes, rng)
+    assert assign_words_to_boxes(words, rects) == assign_words_naive(words, rects)
+
+
+@pytest.mark.parametrize("cells", [0, 1, 3, 40])
+def test_grid_matches_naive_on_edges(cells):
+    words, rects = _edge_cases()
+    assert BoxGrid(rects, cells_per_axis=cells).assign(words) == assign_words_naive(words, rects)
+    assert [w["text"] for w in assign_words_naive(words, rects)[0]] == ["corner", "left"]
+
+
+needs_numpy = pytest.mark.skipif(box_geometry.np is None, reason="NumPy is not installed")
+
+
+@needs_numpy
+@pytest.mark.parametrize("n_words,n_boxes", [(0, 5), (30, 0), (50, 7), (1000, 50), (box_geometry._NUMPY_BLOCK + 10, 20)])
+def test_numpy_matches_grid(n_words, n_boxes):
+    rng = random.Random(n_words + n_boxes)
+    words = synthetic_words(n_words, rng)
+    # Shared tops and x0s, so ties must keep the original word order.
+    for wd in words[::5]:
+        wd["top"] = round(wd["top"] / 50) * 50.0
+        wd["bottom"], wd["x0"], wd["x1"] = wd["top"] + 9.5, 100.0, 120.0
+    rects = synthetic_boxes(n_boxes, rng)
+    assert assign_words_numpy(words, rects) == assign_reading_order(words, rects, use_numpy=False)
+
+
+@needs_numpy
+def test_numpy_matches_grid_on_edges():
+    words, rects = _edge_cases()
+    assert assign_words_numpy(words, rects) == assign_reading_order(words, rects, use_numpy=False)
+
+
+def test_reading_order_picks_numpy_by_size(monkeypatch):
+    calls = []
+    monkeypatch.setattr(box_geometry, "assign_words_numpy", lambda w, r: calls.append(len(w)) or [[] for _ in r])
+    rng = random.Random(1)
+    rects = synthetic_boxes(10, rng)
+    small = synthetic_words(box_geometry.NUMPY_MIN_PAIRS // 10 - 1, rng)
+    large = synthetic_words(box_geometry.NUMPY_MIN_PAIRS // 10, rng)
+    assign_reading_order(small, rects)
+    assign_reading_order(large, rects)
+    assert calls == ([len(large)] if box_geometry.np is not None else [])
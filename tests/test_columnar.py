@@ -0,0 +1,80 @@
+# test_columnar.py
+# The .cols format is another encoding of the same data: extraction and layout
+# JSON come back exactly (token index and extra keys included), JSON <-> .cols
+# conversion is lossless, and validating from .cols gives the same checks.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+
+import pytest
+
+from columnar import (
+    ColumnarError,
+    ColumnarFile,
+    StringTable,
+    convert,
+    is_columnar,
+    load_extraction,
+    load_layout,
+    save_extraction,
+    save_layout,
+)
+from json_SL import load_json
+from main import validate_document
+from token_index import TokenIndex
+
+from conftest import REPO_ROOT, SAMPLE_PDF
+
+EXTRACTION = REPO_ROOT / "json_work" / "json_files" / "UMS025.first_half.json"
+LAYOUT = REPO_ROOT / "UMS025.layout.json"
+
+
+def _extraction() -> dict:
+    data = load_json(EXTRACTION)
+    data["token_index"] = TokenIndex.build(data["full_text"], data["boxes"]).to_dict()
+    name = next(iter(data["boxes"]))
+    data["boxes"][name]["note"] = {"é": [1, None]}
+    return json.loads(json.dumps(data))
+
+
+def test_extraction_round_trip(tmp_path):
+    data = _extraction()
+    path = save_extraction(data, tmp_path / "x.cols")
+    assert is_columnar(path) and not is_columnar(EXTRACTION)
+    assert load_extraction(path) == data
+    assert load_extraction(tmp_path / "missing.cols") is None
+    assert load_extraction(save_extraction(data, tmp_path / "x.json")) == data
+
+
+def test_layout_round_trip(tmp_path):
+    layout = load_json(LAYOUT)
+    columns = load_layout(save_layout(layout, tmp_path / "x.cols"))
+    assert columns.to_dict() == layout
+    first = layout["pages"][0]
+    assert columns.page_texts(first["pageNumber"]) == [i["text"] for i in first["textItems"]]
+    assert columns.rows(-1) == range(0)
+
+
+def test_convert_both_ways(tmp_path):
+    for src in (EXTRACTION, LAYOUT):
+        json_copy = tmp_path / src.name
+        json_copy.write_bytes(src.read_bytes())
+        cols = convert(json_copy)
+        back = convert(cols, tmp_path / "back.json")
+        assert load_json(back) == load_json(src)
+
+
+def test_bad_input(tmp_path):
+    with pytest.raises(ColumnarError):
+        StringTable().add("a\x00b")
+    with pytest.raises(ColumnarError):
+        ColumnarFile(b"not a columnar file at all")
+    with pytest.raises(ColumnarError):
+        load_layout(save_extraction(_extraction(), tmp_path / "x.cols"))
+
+
+def test_columnar_validation(workspace):
+    plain = validate_document(str(SAMPLE_PDF), cache_dir=None)
+    columnar = validate_document(str(SAMPLE_PDF), cache_dir=None, columnar=True)
+    assert (workspace / "json_work" / "json_files" / "UMS025.first_half.cols").exists()
+    assert plain["error"] is None and columnar["checks"] == plain["checks"]
@@ -0,0 +1,67 @@
+# test_compiled_template.py
+# CompiledTemplate: the pickled copy is the same template as its JSON (boxes,
+# names, hash and word assignment), a stale copy is not used, and validating
+# with it gives the same checks.
+# Run from the repo root: python -m pytest -q tests
+
+import os
+import random
+import shutil
+
+from json_work.python_files.compiled_template import (
+    CompiledTemplate,
+    binary_path_for,
+    fresh_binary,
+    load_template,
+    write_binary,
+)
+from main import validate_document
+
+from benchmarks.bench_box_assignment import synthetic_words
+from conftest import REPO_ROOT
+
+TEMPLATE = REPO_ROOT / "json_work" / "json_files" / "UMS025_boxes_template.json"
+
+
+def _same(a: CompiledTemplate, b: CompiledTemplate) -> None:
+    assert (a.doc_type, a.units, a.sha256()) == (b.doc_type, b.units, b.sha256())
+    words = synthetic_words(500, random.Random(0))
+    for i, page in enumerate(a.pages):
+        assert (page.page_num, page.names, page.coords) == (b.pages[i].page_num, b.pages[i].names, b.pages[i].coords)
+        assert a.rects(i, 595.0, 842.0) == b.rects(i, 595.0, 842.0)
+        assert a.assign(i, words, 595.0, 842.0) == b.assign(i, words, 595.0, 842.0)
+
+
+def test_binary_round_trip(tmp_path):
+    tpl = CompiledTemplate.from_json(TEMPLATE)
+    tpl.rects(0, 100.0, 100.0)
+    loaded = CompiledTemplate.load_binary(tpl.save_binary(tmp_path / "t.pkl"))
+    assert not loaded._rects and not loaded._grids
+    _same(tpl, loaded)
+
+
+def test_fresh_binary_follows_the_json(tmp_path):
+    json_path = tmp_path / "X_boxes_template.json"
+    shutil.copy(TEMPLATE, json_path)
+    assert fresh_binary(json_path) is None
+    bin_path = write_binary(json_path)
+    assert bin_path == binary_path_for(json_path) and fresh_binary(json_path) == bin_path
+    _same(load_template(bin_path), load_template(json_path))
+
+    st = bin_path.stat()
+    os.utime(json_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert fresh_binary(json_path) is None
+    json_path.unlink()
+    assert fresh_binary(json_path) == bin_path
+
+
+def test_validation_with_binary_template(workspace, monkeypatch):
+    pdf = workspace / "json_work" / "sample_pdfs" / "UMS025.pdf"
+    plain = validate_document(str(pdf), cache_dir=None)
+    write_binary(workspace / "json_work" / "json_files" / "UMS025_boxes_template.json")
+    loads = []
+    real = CompiledTemplate.load_binary.__func__
+    monkeypatch.setattr(CompiledTemplate, "load_binary", classmethod(lambda cls, p: loads.append(p) or real(cls, p)))
+    binary = validate_document(str(pdf), cache_dir=None)
+    assert len(loads) == 1
+    assert plain["error"] is None and binary["checks"] == plain["checks"]
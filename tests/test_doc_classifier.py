@@ -0,0 +1,71 @@
+# test_doc_classifier.py
+# Doc type from page 1: the reference code names a type with a template, the
+# registry's layouts recognise a page without one, and anything else is None
+# rather than a guess. main uses it for PDFs whose name matches no template.
+# Run from the repo root: python -m pytest -q tests
+
+import shutil
+
+import pytest
+
+from json_work.python_files.doc_classifier import Classification, DocClassifier, reference_doc_type
+from json_work.python_files.template_registry import TemplateRegistry, collect_boxes_pdfs
+from main import validate_document
+
+from benchmarks.synthetic_pdf import make_document
+from conftest import REPO_ROOT, SAMPLE_PDF
+
+JSON_DIR = REPO_ROOT / "json_work" / "json_files"
+
+
+@pytest.fixture(scope="module")
+def registry() -> TemplateRegistry:
+    registry = TemplateRegistry()
+    registry.build(collect_boxes_pdfs([str(SAMPLE_PDF.parent)]), workers=1)
+    return registry
+
+
+@pytest.fixture(scope="module")
+def unmarked_pdf(tmp_path_factory):
+    # The sample with its reference code redacted; the drawings are kept.
+    import fitz  # type: ignore
+    out = tmp_path_factory.mktemp("unmarked") / "scan_0001.pdf"
+    doc = fitz.open(SAMPLE_PDF)
+    page = doc[0]
+    for rect in page.search_for("UMS025/289733/1/0"):
+        page.add_redact_annot(rect)
+    page.apply_redactions(images=0, graphics=0)
+    doc.save(out)
+    doc.close()
+    return out
+
+
+def test_reference_code():
+    assert reference_doc_type("Ref: UMS025/289733/1/0 ") == "UMS025"
+    assert reference_doc_type("UMS025/289733") is None
+    assert reference_doc_type("") is None
+
+
+def test_reference_code_with_template(tmp_path):
+    assert DocClassifier.from_folder(JSON_DIR).classify(SAMPLE_PDF) == Classification("UMS025", "reference", 1.0)
+    assert DocClassifier.from_folder(tmp_path).classify(SAMPLE_PDF) is None
+
+
+def test_layout_from_registry(registry, unmarked_pdf):
+    assert DocClassifier.from_folder(JSON_DIR).classify(unmarked_pdf) is None
+    found = DocClassifier.from_registry(registry).classify(unmarked_pdf)
+    assert found is not None and found[:2] == ("UMS025", "layout")
+
+
+def test_unrelated_pdf_is_unknown(registry, tmp_path):
+    doc = make_document(tmp_path, style="letter")
+    assert DocClassifier.from_registry(registry).classify(doc.pdf_path) is None
+    assert DocClassifier.from_folder(JSON_DIR).classify(doc.pdf_path) is None
+
+
+def test_main_classifies_unnamed_pdf(workspace):
+    pdf = workspace / "job_8812.pdf"
+    shutil.copy(SAMPLE_PDF, pdf)
+    result = validate_document(str(pdf), cache_dir=None)
+    assert result["error"] is None and result["classified"]["doc_type"] == "UMS025"
+    assert result["checks"] == validate_document(str(SAMPLE_PDF), cache_dir=None, doc_type="UMS025")["checks"]
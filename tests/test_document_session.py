@@ -0,0 +1,68 @@
+# test_document_session.py
+# DocumentSession: one handle serves template building, text and layout with
+# each library opened at most once, gives the same results as opening the path
+# per step, and reports unreadable input instead of raising.
+# Run from the repo root: python -m pytest -q tests
+
+import fitz  # type: ignore
+import pdfplumber
+
+from json_work.python_files.build_template_from_pdf import build_template
+from json_work.python_files.document_session import DocumentSession, open_session
+from json_work.python_files.lazy_document import resolve_pages
+from json_work.python_files.pdf_input import PdfSource
+
+from conftest import REPO_ROOT, SAMPLE_PDF
+
+BOXES_PDF = REPO_ROOT / "json_work" / "sample_pdfs" / "UMS025_boxes.pdf"
+
+
+def test_each_library_opens_once(monkeypatch):
+    opened = []
+    real_plumber, real_fitz = pdfplumber.open, fitz.open
+    monkeypatch.setattr(pdfplumber, "open", lambda *a, **kw: opened.append("pdfplumber") or real_plumber(*a, **kw))
+    monkeypatch.setattr(fitz, "open", lambda *a, **kw: opened.append("fitz") or real_fitz(*a, **kw))
+    with DocumentSession(BOXES_PDF) as session:
+        assert open_session(session) is session
+        template = build_template(session)
+        text = [session.text(i) for i in range(len(session))]
+        layout = session.lines_layout()
+        assert session.is_valid()
+    assert sorted(opened) == ["fitz", "pdfplumber"]
+
+    monkeypatch.undo()
+    assert template == build_template(str(BOXES_PDF))
+    with pdfplumber.open(BOXES_PDF) as pdf:
+        assert text == [page.extract_text() or "" for page in pdf.pages]
+    assert len(layout["pages"]) == len(text)
+
+
+def test_layout_items():
+    with DocumentSession(SAMPLE_PDF) as session:
+        layout = session.lines_layout(pages=[1, -1, 99])
+        assert [p["pageNumber"] for p in layout["pages"]] == [1, len(session)]
+        first = session.lines_layout(pages=[1])["pages"][0]
+        height = session.page(0).height
+        words = session.words(0)
+    joined = " ".join(item["text"] for item in first["textItems"])
+    assert sorted(joined.split()) == sorted(w["text"] for w in words)
+    for item in first["textItems"]:
+        assert item["page"] == 1 and 0 <= item["x"] and 0 <= item["y"] <= height
+    assert resolve_pages([2, -1, 2, 0, 8], 7) == [1, 6]
+
+
+def test_invalid_input_is_reported():
+    with DocumentSession(b"%PDF-1.4 not really") as session:
+        assert not session.is_valid() and session.error is not None
+    with DocumentSession(SAMPLE_PDF) as session:
+        session.fitz
+        assert session.is_valid() and session._plumber is None
+
+
+def test_borrowed_source_stays_open():
+    with PdfSource(SAMPLE_PDF) as src:
+        with DocumentSession(src) as session:
+            pages = len(session)
+        assert src.sha256() and len(src.buffer) == len(src)
+    with SAMPLE_PDF.open("rb") as f, DocumentSession(f) as session:
+        assert len(session) == pages
@@ -0,0 +1,84 @@
+# test_extraction.py
+# extract_to_json's one pass per page writes what the two-pass extraction it
+# replaced did (pdfplumber backend, layout text): the same full_text and, per
+# box, the same words in reading order and coordinates. Sharding the pages
+# across worker processes changes nothing in the output.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+from pathlib import Path
+
+import pdfplumber
+import pytest
+
+from benchmarks.synthetic_pdf import STYLES, make_document
+from json_work.python_files.build_template_from_pdf import write_template_for_boxes_pdf
+from json_work.python_files.extract_boxes_to_json import extract_to_json
+from json_work.python_files.page_shards import shard_pages
+
+from conftest import REPO_ROOT, SAMPLE_PDF
+
+SAMPLE_TEMPLATE = REPO_ROOT / "json_work" / "json_files" / "UMS025_boxes_template.json"
+
+
+def _two_pass(pdf_path: Path, template_path: Path) -> dict:
+    # The original extraction: extract_text() per page, then extract_words() per
+    # page and a scan of every word for every box.
+    with open(template_path, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    boxes = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        full_text = "\n".join(pdf.pages[p["page_num"]].extract_text() or "" for p in template["pages"])
+        for page_entry in template["pages"]:
+            page = pdf.pages[page_entry["page_num"]]
+            words = page.extract_words() or []
+            for field in page_entry["fields"]:
+                b = field["box"]
+                x0, y0, x1, y1 = b[0] * page.width, b[1] * page.height, b[2] * page.width, b[3] * page.height
+                in_box = [wd for wd in words
+                          if not (wd["x1"] < x0 or wd["x0"] > x1 or wd["bottom"] < y0 or wd["top"] > y1)]
+                in_box.sort(key=lambda wd: (wd["top"], wd["x0"]))
+                boxes[field["name"]] = {"page": page_entry["page_num"],
+                                        "raw_text": " ".join(wd["text"] for wd in in_box).strip(),
+                                        "count_words": len(in_box), "box_denorm": [x0, y0, x1, y1]}
+    return {"full_text": full_text, "boxes": boxes}
+
+
+def _extract(pdf: Path, template: Path, out: Path) -> dict:
+    with extract_to_json(str(pdf), str(template), out, backend="pdfplumber").open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_sample_matches_two_pass(tmp_path):
+    data = _extract(SAMPLE_PDF, SAMPLE_TEMPLATE, tmp_path / "x.json")
+    reference = _two_pass(SAMPLE_PDF, SAMPLE_TEMPLATE)
+    assert data["full_text"] == reference["full_text"] and data["boxes"] == reference["boxes"]
+    assert data["doc_path"] == str(SAMPLE_PDF.resolve())
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_synthetic_matches_two_pass(tmp_path, style):
+    doc = make_document(tmp_path, style=style, pages=3)
+    template = write_template_for_boxes_pdf(str(doc.boxes_pdf_path), tmp_path / "t.json", fast=True)
+    data = _extract(doc.pdf_path, template, tmp_path / "x.json")
+    reference = _two_pass(doc.pdf_path, template)
+    assert data["full_text"] == reference["full_text"] and data["boxes"] == reference["boxes"]
+
+
+
+@pytest.mark.parametrize("backend", ["pdfplumber", "pymupdf"])
+def test_page_workers_match_serial(tmp_path, backend):
+    doc = make_document(tmp_path, style="letter", pages=5)
+    template = write_template_for_boxes_pdf(str(doc.boxes_pdf_path), tmp_path / "t.json", fast=True)
+    outputs = [extract_to_json(str(doc.pdf_path), str(template), tmp_path / f"w{n}.json", workers=n,
+                               backend=backend).read_text("utf-8") for n in (1, 2, 4)]
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+def test_shards_are_contiguous_and_complete():
+    for pages in range(0, 12):
+        for shards in range(1, 6):
+            runs = shard_pages(range(pages), shards)
+            assert [i for run in runs for i in run] == list(range(pages))
+            assert all(runs) and len(runs) <= max(1, shards)
+            assert max(map(len, runs), default=0) - min(map(len, runs), default=0) <= 1
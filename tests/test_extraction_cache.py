@@ -0,0 +1,64 @@
+# test_extraction_cache.py
+# ExtractionCache: keys follow content and options, eviction keeps the newest
+# entries under the limits, and one cache per directory per process scans the
+# directory once however many documents go through it.
+# Run from the repo root: python -m pytest -q tests
+
+import os
+
+from extraction_cache import ExtractionCache, cache_key, open_cache
+
+
+def _pdf(tmp_path, name: str, data: bytes):
+    p = tmp_path / name
+    p.write_bytes(data)
+    return p
+
+
+def test_key_follows_content_and_options(tmp_path):
+    a = _pdf(tmp_path, "a.pdf", b"%PDF-1 one")
+    b = _pdf(tmp_path, "b.pdf", b"%PDF-1 one")
+    c = _pdf(tmp_path, "c.pdf", b"%PDF-1 two")
+    assert cache_key(a, None, "v1") == cache_key(b, None, "v1")
+    assert cache_key(a, None, "v1") != cache_key(c, None, "v1")
+    assert cache_key(a, None, "v1") != cache_key(a, None, "v2")
+    assert cache_key(a, None, "v1", backend="pymupdf") != cache_key(a, None, "v1", backend="pdfplumber")
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, {"full_text": "x"})
+    assert cache.get("ab" * 32) == {"full_text": "x"}
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_eviction_drops_oldest_entries(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache", max_entries=5)
+    keys = [f"{n:02d}" * 32 for n in range(8)]
+    for n, key in enumerate(keys):
+        p = cache.put(key, {"n": n})
+        os.utime(p, (n, n))
+    assert cache.evictions > 0
+    left = [k for k in keys if cache.get(k) is not None]
+    assert len(left) <= 5
+    assert left == keys[-len(left):]
+
+
+def test_overwrite_keeps_size_tally(tmp_path):
+    cache = ExtractionCache(tmp_path / "cache")
+    cache.put("cd" * 32, {"v": "a" * 100})
+    cache.put("cd" * 32, {"v": "b"})
+    assert cache._count == 1
+    assert cache._size == sum(e[1] for e in cache._entries())
+
+
+def test_open_cache_scans_directory_once(tmp_path, monkeypatch):
+    scans = []
+    real = ExtractionCache._entries
+    monkeypatch.setattr(ExtractionCache, "_entries", lambda self: scans.append(1) or real(self))
+    root = tmp_path / "cache"
+    assert open_cache(root) is open_cache(str(root))
+    for n in range(20):
+        open_cache(root).put(f"{n:02d}" * 32, {"n": n})
+    assert len(scans) == 1
@@ -0,0 +1,54 @@
+# test_incremental.py
+# Incremental mode: a re-run reuses every stored check without extracting, a
+# changed expected value re-evaluates only its own checks, a touched but
+# unchanged PDF is still reused and a changed PDF is evaluated in full. The
+# checks always equal a plain run's.
+# Run from the repo root: python -m pytest -q tests
+
+import os
+
+import pytest
+
+import main
+from main import validate_document
+
+
+@pytest.fixture
+def run(workspace, monkeypatch):
+    pdf = workspace / "json_work" / "sample_pdfs" / "UMS025.pdf"
+    extractions = []
+    real = main._extract_first_half
+    monkeypatch.setattr(main, "_extract_first_half", lambda *a, **kw: extractions.append(1) or real(*a, **kw))
+
+    def run(overrides=None):
+        extractions.clear()
+        result = validate_document(str(pdf), cache_dir=None, state_dir=workspace / "state", overrides=overrides)
+        assert result["error"] is None
+        assert result["checks"] == validate_document(str(pdf), cache_dir=None, overrides=overrides)["checks"]
+        # (reuse counts, extractions by the incremental run; the plain run makes one)
+        return result["incremental"], len(extractions) - 1
+
+    run.pdf = pdf
+    return run
+
+
+def test_rerun_reuses_every_check(run):
+    first, extracted = run()
+    assert first["reused"] == 0 and first["evaluated"] > 0 and extracted == 1
+    assert run() == ({"reused": first["evaluated"], "evaluated": 0}, 0)
+
+
+def test_changed_value_evaluates_its_checks_only(run):
+    total = run()[0]["evaluated"]
+    # City is one exists check and one in_box check (box_0_1).
+    assert run({"City": "Paris"}) == ({"reused": total - 2, "evaluated": 2}, 1)
+
+
+def test_pdf_changes(run):
+    total = run()[0]["evaluated"]
+    st = run.pdf.stat()
+    os.utime(run.pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert run() == ({"reused": total, "evaluated": 0}, 0)
+    with run.pdf.open("ab") as f:
+        f.write(b"\n% appended\n")
+    assert run() == ({"reused": 0, "evaluated": total}, 1)
@@ -0,0 +1,65 @@
+# test_instrumentation.py
+# Stage instrumentation: nothing is recorded while disabled; when enabled, the
+# pipeline's stages nest as they ran, memory peaks are charged to the stage
+# that allocated, and the JSON and Chrome trace exports carry every stage.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+
+import pytest
+
+import instrumentation
+from instrumentation import disable, enable, recorder, stage, timed
+from main import validate_document
+
+from conftest import SAMPLE_PDF
+
+
+@pytest.fixture
+def rec(request):
+    # Memory tracing slows the pipeline down a lot, so only where asked for.
+    r = enable(trace_memory=getattr(request, "param", False))
+    yield r
+    disable()
+
+
+@timed()
+def _work():
+    with stage("inner", n=1):
+        data = bytearray(4 * 1024 * 1024)
+    return len(data)
+
+
+def test_disabled_records_nothing():
+    assert recorder() is None
+    assert stage("x") is instrumentation._NULL_STAGE
+    assert _work() == 4 * 1024 * 1024
+
+
+@pytest.mark.parametrize("rec", [True], indirect=True)
+def test_nesting_and_memory(rec):
+    _work()
+    _work()
+    inner, outer = rec.stages[0], rec.stages[1]
+    assert (inner["name"], inner["depth"], inner["args"]) == ("inner", 1, {"n": 1})
+    assert (outer["name"], outer["depth"]) == ("_work", 0)
+    assert inner["py_peak_kb"] >= 4096 and outer["py_peak_kb"] >= inner["py_peak_kb"]
+    summary = rec.summary()
+    assert list(summary) == ["inner", "_work"] and summary["inner"]["count"] == 2
+    assert summary["_work"]["wall_ms"] >= summary["inner"]["wall_ms"]
+    assert "inner" in rec.format_summary()
+
+
+def test_pipeline_stages_and_exports(rec, workspace):
+    assert validate_document(str(SAMPLE_PDF), cache_dir=None)["error"] is None
+    assert all("py_peak_kb" not in s for s in rec.stages)
+    names = {s["name"] for s in rec.stages}
+    assert {"_extract_first_half", "extract_to_json", "extract_page", "assign_boxes", "_validate"} <= names
+    pages = sorted(s["args"]["page"] for s in rec.stages if s["name"] == "extract_page")
+    assert pages == [0, 1]
+
+    saved = json.loads(rec.to_json(workspace / "stages.json").read_text("utf-8"))
+    assert saved["stages"] == json.loads(json.dumps(rec.stages)) and saved["summary"] == rec.summary()
+    trace = json.loads(rec.to_chrome_trace(workspace / "trace.json").read_text("utf-8"))
+    assert len(trace["traceEvents"]) == len(rec.stages)
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in trace["traceEvents"])
@@ -0,0 +1,75 @@
+# test_multi_match.py
+# MultiPatternMatcher: both engines find exactly what a per-value str.find does,
+# first offsets and overlapping matches included, below and above the trie
+# threshold; StreamScanner over chunks answers like found() on the whole text.
+# Run from the repo root: python -m pytest -q tests
+
+import random
+
+import pytest
+
+from multi_match import TRIE_THRESHOLD, MultiPatternMatcher, StreamScanner
+
+
+def _case(n_values: int, seed: int):
+    # Short values over a small alphabet, so prefixes, overlaps and shared values
+    # are common; a few labels are missing, empty or not strings.
+    rng = random.Random(seed)
+    text = "".join(rng.choice("abcd .-") for _ in range(5000))
+    patterns = {}
+    for n in range(n_values):
+        if n % 3 == 0:
+            i = rng.randrange(len(text) - 8)
+            value = text[i:i + rng.randint(1, 8)]
+        else:
+            value = "".join(rng.choice("abcdx") for _ in range(rng.randint(1, 6)))
+        patterns[f"v{n}"] = value
+    patterns.update(empty="", number=12, upper="ABC")
+    return text, patterns
+
+
+def _first(text: str, patterns: dict) -> dict:
+    return {label: text.find(v) for label, v in patterns.items() if isinstance(v, str) and v and v in text}
+
+
+def _all(text: str, patterns: dict) -> list:
+    out = []
+    for label, v in patterns.items():
+        if isinstance(v, str) and v:
+            out += [(label, i, i + len(v)) for i in range(len(text)) if text.startswith(v, i)]
+    return sorted(out, key=lambda t: (t[1], t[2], t[0]))
+
+
+@pytest.mark.parametrize("engine", ["find", "trie"])
+@pytest.mark.parametrize("n_values", [5, TRIE_THRESHOLD + 50])
+def test_engines_match_per_value_find(engine, n_values):
+    text, patterns = _case(n_values, n_values)
+    matcher = MultiPatternMatcher(patterns, engine=engine)
+    assert matcher.found(text) == _first(text, patterns)
+    assert sorted(matcher.find_all(text), key=lambda t: (t[1], t[2], t[0])) == _all(text, patterns)
+
+
+@pytest.mark.parametrize("engine", ["find", "trie"])
+def test_case_insensitive(engine):
+    text, patterns = _case(40, 1)
+    matcher = MultiPatternMatcher(patterns, case_sensitive=False, engine=engine)
+    lowered = {k: v.lower() if isinstance(v, str) else v for k, v in patterns.items()}
+    assert matcher.found(text.upper()) == _first(text, lowered)
+
+
+def test_engine_follows_threshold():
+    assert MultiPatternMatcher({f"v{n}": f"value {n}" for n in range(TRIE_THRESHOLD - 1)}).engine == "find"
+    assert MultiPatternMatcher({f"v{n}": f"value {n}" for n in range(TRIE_THRESHOLD)}).engine == "trie"
+    with pytest.raises(ValueError):
+        MultiPatternMatcher({}, engine="regex")
+
+
+@pytest.mark.parametrize("engine", ["find", "trie"])
+@pytest.mark.parametrize("chunk", [1, 3, 7, 100])
+def test_stream_scanner_matches_found(engine, chunk):
+    text, patterns = _case(60, chunk)
+    matcher = MultiPatternMatcher(patterns, engine=engine)
+    scanner = StreamScanner(matcher)
+    for i in range(0, len(text), chunk):
+        scanner.feed(text[i:i + chunk])
+    assert scanner.found == matcher.found(text)
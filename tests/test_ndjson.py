@@ -0,0 +1,82 @@
+# test_ndjson.py
+# NDJSON streams: a complete stream ends with END_RECORD, a stream whose writer
+# failed is reported as incomplete rather than read as short, and stream mode
+# makes the same checks as the whole-document run.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+import threading
+import time
+
+import pytest
+
+from json_SL import END_RECORD, IncompleteStreamError, NdjsonWriter, iter_ndjson
+from main import validate_document
+
+from conftest import SAMPLE_PDF
+
+RECORDS = [{"type": "doc", "n": 0}, {"type": "page", "text": "é\nline"}, {"type": "box", "name": "b"}]
+
+
+def _key(check: dict) -> str:
+    return json.dumps(check, sort_keys=True)
+
+
+def test_writer_ends_with_end_record(tmp_path):
+    path = tmp_path / "x.ndjson"
+    with NdjsonWriter(path) as w:
+        for r in RECORDS:
+            w.write(r)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == len(RECORDS) + 1 and json.loads(lines[-1]) == END_RECORD
+    assert list(iter_ndjson(path)) == RECORDS
+
+
+def test_failed_writer_leaves_incomplete_stream(tmp_path):
+    path = tmp_path / "x.ndjson"
+    with pytest.raises(RuntimeError):
+        with NdjsonWriter(path) as w:
+            w.write(RECORDS[0])
+            raise RuntimeError("extraction failed")
+    with pytest.raises(IncompleteStreamError):
+        list(iter_ndjson(path))
+    with pytest.raises(IncompleteStreamError):
+        list(iter_ndjson(path, follow=True, poll_interval=0.01, timeout=0.1))
+
+
+def test_follow_reads_while_writing(tmp_path):
+    path = tmp_path / "x.ndjson"
+    w = NdjsonWriter(path)
+
+    def produce():
+        for r in RECORDS:
+            time.sleep(0.05)
+            w.write(r)
+        w.close()
+
+    t = threading.Thread(target=produce)
+    t.start()
+    assert list(iter_ndjson(path, follow=True, poll_interval=0.01, timeout=5)) == RECORDS
+    t.join()
+
+
+def test_stream_mode_makes_the_same_checks(workspace):
+    pdf = workspace / "json_work" / "sample_pdfs" / "UMS025.pdf"
+    plain = validate_document(str(pdf), cache_dir=None)
+    streamed = validate_document(str(pdf), cache_dir=None, stream=True)
+    assert plain["error"] is None and streamed["error"] is None
+    assert streamed["exit_code"] == plain["exit_code"]
+    assert sorted(map(_key, streamed["checks"])) == sorted(map(_key, plain["checks"]))
+
+    written = list(iter_ndjson(streamed["stream"]["checks"]))
+    assert [dict(c, type="check") for c in streamed["checks"]] == written
+    records = list(iter_ndjson(streamed["stream"]["extraction"]))
+    extraction = json.loads((workspace / "json_work" / "json_files" / "UMS025.first_half.json").read_text("utf-8"))
+    pages = [r["text"] for r in records if r["type"] == "page"]
+    assert "\n".join(pages) == extraction["full_text"]
+    assert {r["name"] for r in records if r["type"] == "box"} == set(extraction["boxes"])
+
+
+def test_stream_mode_refuses_state_dir(tmp_path):
+    result = validate_document(str(SAMPLE_PDF), cache_dir=None, stream=True, state_dir=tmp_path)
+    assert result["exit_code"] == 2 and result["error"]
@@ -0,0 +1,98 @@
+# test_normalise.py
+# Normaliser: the equivalences promised in normalise.py's header hold, IDs and
+# references are left alone, and every normalised span maps back to the
+# original text it came from. A normalising spec finds values written
+# differently from the document.
+# Run from the repo root: python -m pytest -q tests
+
+import pytest
+
+from json_SL import load_json
+from normalise import Normaliser
+from validation_spec import ValidationPlan, load_spec
+
+from conftest import REPO_ROOT
+
+ALL = Normaliser(casefold=True, whitespace=True, amounts=True, dates=True)
+EXTRACTION = REPO_ROOT / "json_work" / "json_files" / "UMS025.first_half.json"
+
+
+@pytest.mark.parametrize("written,expected", [
+    ("UATJMFC", "uatjmfc"),
+    ("Avenue \n\t Street", "avenue street"),
+    ("£ 193,164.73 p", "193164.73"),
+    ("£193,164.73", "193164.73"),
+    ("193,164.73", "193164.73"),
+    ("£0", "0.00"),
+    ("29 November 2025", "2025-11-29"),
+    ("29th Nov. 2025", "2025-11-29"),
+    ("29 11 2025", "2025-11-29"),
+    ("29/11/2025", "2025-11-29"),
+    ("29.11.2025", "2025-11-29"),
+    ("2025-11-29", "2025-11-29"),
+])
+def test_header_examples(written, expected):
+    assert ALL.value(written) == expected
+
+
+@pytest.mark.parametrize("text", ["7700049486", "UMS025/289733/1/0", "1000059054L", "31/02/2025", "0345 266 9336"])
+def test_ids_and_invalid_dates_unchanged(text):
+    assert Normaliser(amounts=True, dates=True).value(text) == text
+
+
+def test_date_order():
+    assert Normaliser(dates=True, date_order="mdy").value("11/29/2025") == "2025-11-29"
+    assert Normaliser(dates=True).value("11/29/2025") == "11/29/2025"
+    with pytest.raises(ValueError):
+        Normaliser(date_order="ymd")
+
+
+def test_options_and_key():
+    assert Normaliser.from_options(None).key() is None
+    assert not Normaliser().active and Normaliser().value("A  B") == "A  B"
+    assert Normaliser.from_options({"casefold": True}).key() == [True, False, False, False, "dmy"]
+    with pytest.raises(ValueError):
+        Normaliser.from_options({"lowercase": True})
+
+
+@pytest.mark.parametrize("text", [
+    "Paid £ 193,164.73 p on 29 November 2025 to MR  STRASSE",
+    "Straße 29/11/2025\n\n  £5",
+    "",
+])
+def test_offsets_map_back(text):
+    norm = ALL.apply(text)
+    assert len(norm.starts) == len(norm.ends) == len(norm.text)
+    assert list(norm.starts) == sorted(norm.starts)
+    for i in range(len(norm.text)):
+        assert 0 <= norm.starts[i] < norm.ends[i] <= len(text)
+    assert norm.original_span(0, len(norm)) == ((norm.starts[0], norm.ends[-1]) if text else (0, 0))
+
+
+def test_spans_of_found_values():
+    text = "Plan value: £ 190,664.73 p, paid 27/11/2025 to Mr UATjmfC."
+    norm = ALL.apply(text)
+    for value, original in [("190,664.73", "£ 190,664.73 p"), ("27 Nov 2025", "27/11/2025"), ("uatjmfc", "UATjmfC")]:
+        start = norm.find(ALL.value(value))
+        assert start != -1
+        s, e = norm.original_span(start, start + len(ALL.value(value)))
+        assert text[s:e] == original
+        assert norm.to_normalised(s) == start
+
+
+def test_casefold_expanding_characters():
+    norm = Normaliser(casefold=True).apply("Straße X")
+    assert norm.text == "strasse x"
+    assert norm.original_span(norm.find("ss"), norm.find("ss") + 2) == (4, 5)
+    assert norm.original_span(norm.find("x"), norm.find("x") + 1) == (7, 8)
+
+
+def test_spec_values_written_differently():
+    spec = load_spec(REPO_ROOT / "specs" / "UMS025_P45.json")
+    spec["expected_values"] = {"Surname": "uatjmfc", "Date 1": "29/11/2025", "Plan Value": "£ 190664.73",
+                               "Missing": "£1.00"}
+    spec["box_mapping"] = {}
+    checks = {c["name"]: c for c in ValidationPlan(spec).run(load_json(EXTRACTION))}
+    assert [checks[f"{label}__exists"]["pass"] for label in spec["expected_values"]] == [True, True, True, False]
+    raw = dict(spec, normalisation={})
+    assert not any(c["pass"] for c in ValidationPlan(raw).run(load_json(EXTRACTION)))
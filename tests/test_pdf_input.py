@@ -0,0 +1,62 @@
+# test_pdf_input.py
+# PdfSource: a mapped file and the same bytes in memory are one document to
+# every consumer - content hash, extraction cache key, both backends and a full
+# validation (also with page workers) give the same answers.
+# Run from the repo root: python -m pytest -q tests
+
+import io
+
+import pytest
+
+from extraction_cache import cache_key, file_sha256
+from json_work.python_files.extract_backends import BACKENDS, open_backend
+from json_work.python_files.pdf_input import PdfSource, as_source, collect_pdfs
+from main import validate_document
+
+from conftest import SAMPLE_PDF
+
+
+def test_stream_reads_like_a_file():
+    data = SAMPLE_PDF.read_bytes()
+    with PdfSource(SAMPLE_PDF) as src:
+        s, f = src.stream(), io.BytesIO(data)
+        for offset, whence, size in [(0, 0, 10), (100, 1, 1000), (-50, 2, 100), (10, 0, -1)]:
+            assert s.seek(offset, whence) == f.seek(offset, whence)
+            assert s.read(size) == f.read(size)
+        assert s.tell() == f.tell()
+
+
+def test_bytes_and_path_are_the_same_document():
+    data = SAMPLE_PDF.read_bytes()
+    with PdfSource(SAMPLE_PDF) as mapped, PdfSource(data, name="UMS025.pdf") as in_memory:
+        assert mapped.sha256() == in_memory.sha256() == file_sha256(SAMPLE_PDF)
+        assert cache_key(mapped, None, "v") == cache_key(in_memory, None, "v") == cache_key(SAMPLE_PDF, None, "v")
+        assert (mapped.stem, in_memory.stem, in_memory.path) == ("UMS025", "UMS025", None)
+        assert as_source(mapped) is mapped
+        for name in BACKENDS:
+            with open_backend(name, mapped) as a, open_backend(name, in_memory) as b:
+                assert len(a) == len(b)
+                assert [a.text(i) for i in range(len(a))] == [b.text(i) for i in range(len(b))]
+
+
+@pytest.mark.parametrize("page_workers", [1, 2])
+def test_validation_from_bytes(workspace, page_workers):
+    by_path = validate_document(str(SAMPLE_PDF), cache_dir=None, page_workers=page_workers)
+    in_memory = PdfSource(SAMPLE_PDF.read_bytes(), name="UMS025.pdf")
+    by_bytes = validate_document(in_memory, cache_dir=None, page_workers=page_workers)
+    in_memory.close()
+    assert by_path["error"] is None and by_bytes["checks"] == by_path["checks"]
+
+
+def test_empty_file(tmp_path):
+    empty = tmp_path / "empty.pdf"
+    empty.write_bytes(b"")
+    with PdfSource(empty) as src:
+        assert len(src) == 0 and src.stream().read() == b""
+
+
+def test_collect_pdfs(tmp_path):
+    for name in ("b.pdf", "a.pdf", "a_boxes.pdf", "notes.txt"):
+        (tmp_path / name).write_bytes(b"%PDF")
+    assert [p.name for p in collect_pdfs([str(tmp_path)])] == ["a.pdf", "b.pdf"]
+    assert [p.name for p in collect_pdfs([str(tmp_path)], boxes=True)] == ["a_boxes.pdf"]
@@ -0,0 +1,55 @@
+# test_section_index.py
+# Regression tests for SectionIndex on the committed extractions: the oldest
+# JSON shape (full_document plus "p45_section", no page spans) must still place
+# the spec's sections, so root SampleCode's section checks keep their results.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from section_index import index_from_extraction, section_pages
+from validation_spec import load_spec
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LEGACY_JSON = REPO_ROOT / "UMS025.json"
+SPEC = REPO_ROOT / "specs" / "UMS025_P45.json"
+
+
+def _legacy() -> dict:
+    with LEGACY_JSON.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_legacy_json_places_stored_section():
+    data = _legacy()
+    index = index_from_extraction(data, load_spec(SPEC)["sections"])
+    assert index.section_text("p45") == data["p45_section"]
+    # pre5 has no stored copy and the JSON no page spans: reported, not faked.
+    assert index.unplaced == ["pre5"]
+
+
+def test_stored_section_missing_from_text_raises():
+    data = dict(_legacy(), p45_section="text that is not in the document")
+    with pytest.raises(ValueError):
+        index_from_extraction(data, load_spec(SPEC)["sections"])
+
+
+def test_sample_code_section_checks_on_legacy_json():
+    proc = subprocess.run([sys.executable, "SampleCode.py", "UMS025.pdf"], cwd=REPO_ROOT,
+                          capture_output=True, text=True, encoding="utf-8")
+    results = json.loads(proc.stdout)
+    p45 = results["P45 Validations"]
+    comparisons = results["P45 vs Full PDF Comparisons"]
+    assert sum("PASS" in v for v in p45.values()) == 9
+    assert sum("PASS" in v for v in comparisons.values()) == 6
+
+
+def test_section_pages_from_page_ranges():
+    sections = [{"name": "pre5", "pages": [1, 2]}, {"name": "tail", "pages": [8, None]}]
+    assert section_pages(sections, 9) == [1, 2, 8, 9]
+    assert section_pages(sections + [{"name": "p45", "marker": "P45"}], 9) is None
+    assert section_pages(load_spec(SPEC)["sections"], 9) is None
@@ -0,0 +1,82 @@
+# test_service.py
+# Validation service: over HTTP, a request by path and one carrying the PDF
+# bytes return validate_document()'s result; malformed requests are refused
+# with 4xx before reaching a worker, and a full queue answers 503.
+# Run from the repo root: python -m pytest -q tests
+
+import asyncio
+import base64
+import json
+
+from main import validate_document
+from service import ValidationService
+
+from conftest import SAMPLE_PDF
+
+
+async def _request(port: int, method: str, target: str, body=None) -> tuple:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode("utf-8"))
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(payload)}\r\n\r\n".encode("ascii")
+                 + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    return int(lines[0].split()[1]), json.loads(data), lines[1:]
+
+
+def _serve(workers: int, max_queue: int, client) -> list:
+    async def run():
+        service = ValidationService(workers, max_queue)
+        try:
+            await service.start()
+            server = await asyncio.start_server(service.handle, host="127.0.0.1", port=0)
+            async with server:
+                return await client(service, server.sockets[0].getsockname()[1])
+        finally:
+            service.close()
+    return asyncio.run(run())
+
+
+def test_validate_by_path_and_bytes(workspace):
+    expected = validate_document(str(SAMPLE_PDF), cache_dir=None)["checks"]
+    pdf_b64 = base64.b64encode(SAMPLE_PDF.read_bytes()).decode("ascii")
+
+    async def client(service, port):
+        return [await _request(port, "GET", "/health"),
+                await _request(port, "POST", "/validate", {"pdf_path": str(SAMPLE_PDF)}),
+                await _request(port, "POST", "/validate", {"pdf_base64": pdf_b64, "doc_type": "UMS025"}),
+                await _request(port, "POST", "/validate", {"pdf_path": str(SAMPLE_PDF), "values": {"City": "Paris"}})]
+
+    health, by_path, by_bytes, override = _serve(1, 4, client)
+    assert health[0] == 200 and health[1]["workers"] == 1
+    assert by_path[0] == by_bytes[0] == 200
+    assert by_path[1]["checks"] == by_bytes[1]["checks"] == expected
+    assert override[1]["exit_code"] == 1
+
+
+def test_bad_requests(workspace):
+    async def client(service, port):
+        out = [await _request(port, "POST", "/validate", body) for body in
+               [b"{not json", [1], {}, {"pdf_base64": "AAAA"}, {"pdf_base64": "***", "doc_type": "X"},
+                {"pdf_path": "a.pdf", "spec": []}, {"pdf_path": "a.pdf", "spec": {"bogus": 1}},
+                {"pdf_path": "a.pdf", "values": "x"}]]
+        out.append(await _request(port, "GET", "/nowhere"))
+        out.append(await _request(port, "POST", "/validate", {"pdf_path": "missing.pdf"}))
+        return out, service.served
+
+    results, served = _serve(1, 4, client)
+    assert [status for status, _, _ in results] == [400] * 8 + [404, 200]
+    assert results[-1][1]["exit_code"] == 2
+    assert served == 1
+
+
+def test_full_queue_is_rejected(workspace):
+    async def client(service, port):
+        request = {"pdf_path": str(SAMPLE_PDF)}
+        return await asyncio.gather(service.validate(request), service.validate(request))
+
+    (first, _), (second, body) = _serve(1, 0, client)
+    assert (first, second) == (200, 503) and body["error"]
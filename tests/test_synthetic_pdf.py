@@ -0,0 +1,37 @@
+# test_synthetic_pdf.py
+# The benchmark generator's documents are valid inputs for the real pipeline:
+# the template built from each boxes PDF has the box names of the returned
+# mapping, and every expected value is found in the text and in its box.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+
+import pytest
+
+from benchmarks.synthetic_pdf import STYLES, make_document
+from json_work.python_files.build_template_from_pdf import write_template_for_boxes_pdf
+from json_work.python_files.extract_boxes_to_json import extract_to_json
+from validation_spec import ValidationPlan
+
+
+@pytest.mark.parametrize("style", STYLES)
+def test_documents_validate(tmp_path, style):
+    doc = make_document(tmp_path, style=style, pages=3, words_per_page=200, boxes=5)
+    template = write_template_for_boxes_pdf(str(doc.boxes_pdf_path), tmp_path / "t.json")
+    names = {f["name"] for page in json.loads(template.read_text("utf-8"))["pages"] for f in page["fields"]}
+    assert names == set(doc.box_mapping)
+
+    extraction = json.loads(extract_to_json(str(doc.pdf_path), str(template), tmp_path / "x.json").read_text("utf-8"))
+    checks = ValidationPlan({"expected_values": doc.expected_values, "box_mapping": doc.box_mapping}).run(extraction)
+    assert len(checks) == len(doc.expected_values) * 2 + len(doc.box_mapping)
+    assert [c for c in checks if not c["pass"]] == []
+
+
+def test_seed_fixes_the_content(tmp_path):
+    a = make_document(tmp_path / "a", seed=3)
+    b = make_document(tmp_path / "b", seed=3)
+    c = make_document(tmp_path / "c", seed=4)
+    assert (a.expected_values, a.box_mapping, a.words) == (b.expected_values, b.box_mapping, b.words)
+    assert a.expected_values != c.expected_values
+    with pytest.raises(ValueError):
+        make_document(tmp_path, style="invoice")
@@ -0,0 +1,64 @@
+# test_template_builder.py
+# Fast template building keeps the boxes the get_drawings builder finds, with
+# the same names and coordinates, minus duplicates (a box drawn twice or an
+# inset border); nested smaller boxes stay separate fields.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+
+import pytest
+
+from json_work.python_files.build_template_from_pdf import (
+    _dedupe,
+    build_template,
+    build_template_fast,
+    build_template_first_two_pages,
+    write_template_for_boxes_pdf,
+)
+
+from benchmarks.bench_template_builder import make_boxes_pdf
+from conftest import REPO_ROOT
+
+SAMPLE = REPO_ROOT / "json_work" / "sample_pdfs" / "UMS025_boxes.pdf"
+
+
+def _fields(template: dict) -> dict:
+    return {f["name"]: f["box"] for page in template["pages"] for f in page["fields"]}
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    return make_boxes_pdf(tmp_path_factory.mktemp("boxes") / "SYN_boxes.pdf", pages=3, paths=200, boxes=6)
+
+
+def test_fast_keeps_names_and_boxes_on_sample():
+    full, fast = _fields(build_template(str(SAMPLE))), _fields(build_template_fast(str(SAMPLE)))
+    assert fast and set(fast) <= set(full)
+    assert all(fast[name] == full[name] for name in fast)
+
+
+def test_fast_drops_inset_borders(synthetic):
+    full_t, fast_t = build_template(str(synthetic)), build_template_fast(str(synthetic))
+    full, fast = _fields(full_t), _fields(fast_t)
+    assert len(full) == 2 * 6 * 3 and len(fast) == 6 * 3
+    assert set(fast) <= set(full) and all(fast[name] == full[name] for name in fast)
+    assert fast_t["doc_type"] == full_t["doc_type"] == "SYN"
+
+
+def test_page_limits(synthetic):
+    assert len(build_template(str(synthetic))["pages"]) == 3
+    assert len(build_template_first_two_pages(str(synthetic))["pages"]) == 2
+    assert len(build_template_fast(str(synthetic), max_pages=1)["pages"]) == 1
+
+
+def test_write_template(synthetic, tmp_path):
+    slow = json.loads(write_template_for_boxes_pdf(str(synthetic), tmp_path / "a.json").read_text("utf-8"))
+    fast = json.loads(write_template_for_boxes_pdf(str(synthetic), tmp_path / "b.json", fast=True).read_text("utf-8"))
+    assert len(slow["pages"]) == 2 and len(fast["pages"]) == 3
+
+
+def test_dedupe_keeps_nested_boxes():
+    outer = (0.0, 0.0, 100.0, 100.0)
+    boxes = [(0, outer), (1, (0.5, 0.5, 99.5, 99.5)), (2, (10.0, 10.0, 40.0, 40.0)), (3, outer),
+             (4, (200.0, 0.0, 300.0, 100.0))]
+    assert [idx for idx, _ in _dedupe(boxes)] == [0, 2, 4]
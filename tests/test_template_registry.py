@@ -0,0 +1,51 @@
+# test_template_registry.py
+# The template registry is a faster way to the same templates: validating with
+# a registry built from the sample boxes PDF gives the same checks as without,
+# both for a PDF named after its doc type and for one that is classified.
+# Run from the repo root: python -m pytest -q tests
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from main import validate_document
+from validation_spec import load_plan
+from json_work.python_files.pdf_input import collect_pdfs
+from json_work.python_files.template_registry import TemplateRegistry, collect_boxes_pdfs, load_registry
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLES = REPO_ROOT / "json_work" / "sample_pdfs"
+P45_SPEC = REPO_ROOT / "specs" / "UMS025_P45.json"
+
+
+@pytest.fixture(scope="module")
+def registry_path(tmp_path_factory) -> Path:
+    registry = TemplateRegistry()
+    stats = registry.build(collect_boxes_pdfs([str(SAMPLES)]), workers=1)
+    assert stats["built"] == ["UMS025"] and not stats["failed"]
+    return registry.save(tmp_path_factory.mktemp("registry") / "templates.registry.pkl")
+
+
+def _run(pdf: Path, tmp_path: Path, spec, registry=None) -> dict:
+    return validate_document(str(pdf), out_json=tmp_path / f"{pdf.stem}.first_half.json", cache_dir=None,
+                             plan=spec, registry=registry)
+
+
+@pytest.mark.parametrize("spec_path", [None, P45_SPEC])
+@pytest.mark.parametrize("name", ["UMS025.pdf", "job_8812.pdf"])
+def test_registry_gives_the_same_checks(registry_path, tmp_path, monkeypatch, spec_path, name):
+    monkeypatch.chdir(REPO_ROOT)
+    pdf = tmp_path / name
+    shutil.copy(SAMPLES / "UMS025.pdf", pdf)
+    spec = load_plan(str(spec_path)) if spec_path else None
+    plain = _run(pdf, tmp_path, spec)
+    with_registry = _run(pdf, tmp_path, spec, load_registry(registry_path))
+    assert plain["error"] is None and with_registry["error"] is None
+    assert with_registry["checks"] == plain["checks"]
+    assert with_registry["exit_code"] == plain["exit_code"]
+
+
+def test_collect_pdfs_splits_documents_and_boxes():
+    assert [p.name for p in collect_pdfs([str(SAMPLES)])] == ["UMS025.pdf"]
+    assert [p.name for p in collect_boxes_pdfs([str(SAMPLES / "*.pdf")])] == ["UMS025_boxes.pdf"]
@@ -0,0 +1,76 @@
+# test_token_index.py
+# The token index is a shortcut, never a different answer: checks with the
+# extraction's index give exactly the results of the plain scan, for a
+# normalising (P45-style) plan as for raw text, and an index built with other
+# normalisation is not used.
+# Run from the repo root: python -m pytest -q tests
+
+import json
+import random
+from pathlib import Path
+
+import validations
+from token_index import TokenIndex
+from validation_spec import ValidationPlan, load_spec
+from validations import INDEXED_MIN_VALUES, wants_index
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+EXTRACTION = REPO_ROOT / "json_work" / "json_files" / "UMS025.first_half.json"
+P45_SPEC = REPO_ROOT / "specs" / "UMS025_P45.json"
+
+
+def _extraction() -> dict:
+    with EXTRACTION.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _indexed(extraction: dict, normaliser) -> dict:
+    index = TokenIndex.build(extraction["full_text"], extraction["boxes"], normaliser)
+    return dict(extraction, token_index=json.loads(json.dumps(index.to_dict())))
+
+
+def _large_spec(extraction: dict, count: int) -> dict:
+    # The P45 spec plus `count` values cut from the document (1-3 words, some
+    # with a word changed so they are missing), mapped onto every box.
+    rng = random.Random(0)
+    words = extraction["full_text"].split()
+    spec = load_spec(P45_SPEC)
+    values = dict(spec["expected_values"])
+    for n in range(count):
+        i = rng.randrange(len(words) - 3)
+        value = " ".join(words[i:i + rng.randint(1, 3)])
+        values[f"v{n}"] = value + "x" if n % 7 == 0 else value
+    labels = list(values)
+    mapping = {name: labels[k::len(extraction["boxes"])] for k, name in enumerate(extraction["boxes"])}
+    return dict(spec, expected_values=values, box_mapping=mapping)
+
+
+def test_index_matches_scan_on_p45_plan(monkeypatch):
+    monkeypatch.setattr(validations, "INDEXED_MIN_VALUES", 0)
+    monkeypatch.setattr(validations, "INDEXED_BOX_CHARS", 0)
+    plan = ValidationPlan(load_spec(P45_SPEC))
+    assert plan.normaliser.active
+    extraction = _extraction()
+    indexed = _indexed(extraction, plan.normaliser)
+    assert plan.prepare(indexed, plan.expected_for())[3] is not None
+    assert plan.run(indexed) == plan.run(extraction)
+
+
+def test_index_matches_scan_at_the_real_threshold():
+    extraction = _extraction()
+    plan = ValidationPlan(_large_spec(extraction, INDEXED_MIN_VALUES))
+    expected = plan.expected_for()
+    assert wants_index(expected)
+    indexed = _indexed(extraction, plan.normaliser)
+    assert plan.prepare(indexed, expected)[3] is not None
+    checks = plan.run(indexed)
+    assert checks == plan.run(extraction)
+    assert any(c["pass"] for c in checks) and not all(c["pass"] for c in checks)
+
+
+def test_index_with_other_normalisation_is_ignored():
+    extraction = _extraction()
+    plan = ValidationPlan(_large_spec(extraction, INDEXED_MIN_VALUES))
+    raw = _indexed(extraction, None)
+    assert plan.prepare(raw, plan.expected_for())[3] is None
+    assert plan.run(raw) == plan.run(extraction)
@@ -0,0 +1,98 @@
+# test_validation_spec.py
+# Spec files replace the hardcoded expectations: the default spec holds exactly
+# the values main.py used to carry, a compiled plan checks like the check
+# functions called directly, and manifest rows override values per document.
+# Run from the repo root: python -m pytest -q tests
+
+import shutil
+
+import pytest
+
+from batch import run_manifest
+from json_SL import load_json
+from main import DEFAULT_SPEC
+from validation_spec import SpecError, ValidationPlan, iter_manifest, load_plan, load_spec
+from validations import box_checks, full_doc_checks
+
+from conftest import REPO_ROOT, SAMPLE_PDF
+
+EXTRACTION = REPO_ROOT / "json_work" / "json_files" / "UMS025.first_half.json"
+
+# main.py's former _expected_values_and_mapping().
+HARDCODED = (
+    {
+        "Title": "Mr", "Surname": "UATjmfC", "First Name": "TDMjmfC", "Address": "Avenue Street",
+        "City": "London", "Postcode": "W2 4BA", "Date 1": "29 November 2025", "Date 2": "26 November 2025",
+        "Customer ID": "7700049486", "Pension Plan": "1000059054L", "Plan Value": "190,664.73",
+        "Cash Withdrawal": "190,664.73", "Plan Value Post Withdrawal": "0.00", "Date 3": "27/11/2025",
+    },
+    {
+        "box_0_1": ["Title", "First Name", "Surname", "Address", "City", "Postcode"],
+        "box_0_2": ["Date 1", "Customer ID"],
+        "box_0_3": ["First Name", "Last Name"],
+        "box_0_4": ["Pension Plan"],
+        "box_0_5": ["Plan Value", "Cash Withdrawal", "Date 3", "Plan Value Post Withdrawal"],
+        "box_0_6": ["Cash Withdrawal"],
+        "box_0_7": ["Date 2"],
+    },
+    {"Last Name": "Surname", "CustomerID": "Customer ID"},
+)
+
+
+def test_default_spec_is_the_hardcoded_one():
+    plan = load_plan(str(DEFAULT_SPEC))
+    assert plan.expectations() == HARDCODED
+    assert not plan.normaliser.active
+
+
+def test_plan_checks_like_the_check_functions():
+    data = load_json(EXTRACTION)
+    expected, mapping, aliases = HARDCODED
+    direct = full_doc_checks(expected, data["full_text"]) + box_checks(expected, data["boxes"], mapping, aliases)
+    assert load_plan(str(DEFAULT_SPEC)).run(data) == direct
+
+
+def test_spec_shapes_and_errors(tmp_path):
+    plan = ValidationPlan({"box_mapping": {"a": "X", "b": None}})
+    assert plan.box_mapping == {"a": ["X"], "b": []}
+    with pytest.raises(SpecError):
+        ValidationPlan({"expected": {}})
+    with pytest.raises(SpecError):
+        ValidationPlan({"normalisation": {"lowercase": True}})
+    bad = tmp_path / "bad.json"
+    bad.write_text("[1, 2]", encoding="utf-8")
+    with pytest.raises(SpecError):
+        load_spec(bad)
+
+
+def test_yaml_spec(tmp_path):
+    yaml = pytest.importorskip("yaml")
+    spec = load_spec(DEFAULT_SPEC)
+    path = tmp_path / "spec.yaml"
+    path.write_text(yaml.safe_dump(spec), encoding="utf-8")
+    assert ValidationPlan.from_file(path).expectations() == HARDCODED
+
+
+def test_overrides():
+    plan = load_plan(str(DEFAULT_SPEC))
+    merged = plan.expected_for({"pdf": "x.pdf", "doc_type": "UMS025", "Last Name": "Smith", "City": "",
+                                "Plan Value": 12, "Notes": "ignored"})
+    assert merged == dict(HARDCODED[0], Surname="Smith", **{"Plan Value": "12"})
+    assert plan.expected_for(None) is plan.expected_values
+
+
+def test_manifest(workspace):
+    shutil.copy(SAMPLE_PDF, workspace / "a.pdf")
+    manifest = workspace / "manifest.csv"
+    manifest.write_text("pdf,doc_type,City,Notes\na.pdf,UMS025,,first\na.pdf,UMS025,Paris,second\n",
+                        encoding="utf-8")
+    assert [row["Notes"] for row in iter_manifest(manifest)] == ["first", "second"]
+    results = list(run_manifest(manifest, workers=2, cache_dir=None))
+    assert [r["exit_code"] for r in results] == [0, 1]
+    failed = [c["name"] for c in results[1]["checks"] if not c["pass"]]
+    assert failed == ["City__exists", "City__in_box_0_1"]
+
+    bad = workspace / "bad.csv"
+    bad.write_text("file\na.pdf\n", encoding="utf-8")
+    with pytest.raises(SpecError):
+        list(iter_manifest(bad))
@@ -0,0 +1,217 @@
+# token_index.py
+# Inverted index over the extracted words, stored in the extraction JSON when
+# the plan is large enough for checks to read it (validations.wants_index).
+# The full text and every box's raw_text are normalised with the plan's
+# Normaliser (the same buffers ValidationPlan.prepare searches) and tokenised
+# on whitespace into one token stream; tokens are interned in a vocabulary, and the stream, its
+# line-break flags and the postings (stream positions grouped by token, with one
+# offset per token) are flat unsigned-int arrays, so loading the index is a few
+# array decodes and a lookup is a bisect, with no per-token Python objects.
+# A value whose words appear consecutively, single-space separated and inside
+# the right field (full text or one box) is present: that is a lookup rather
+# than a scan. A value the index cannot confirm (e.g. "190,664.73" inside the
+# token "£190,664.73") falls back to the usual substring search, so checks
+# give exactly the same answers with or without the index.
+# The index depends on the extraction and the normalisation options only, so
+# cached extractions are re-validated against new values without rebuilding
+# it; a plan that normalises differently ignores it.
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import base64
+import re
+import sys
+
+from normalise import Normaliser
+
+INDEX_VERSION = 2
+FULL = ""  # field name of the full text; boxes use their own names
+
+_TOKEN_RE = re.compile(r"\S+")
+
+
+def _encode(arr: array) -> str:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return base64.b64encode(arr.tobytes()).decode("ascii")
+
+
+def _decode(typecode: str, data: str) -> array:
+    arr = array(typecode)
+    arr.frombytes(base64.b64decode(data))
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+class TokenIndex:
+
+    def __init__(self):
+        self.vocab: List[str] = []
+        self.ids: Dict[str, int] = {}
+        # Token id at every stream position, and 1 where the token does not follow
+        # its predecessor after exactly one space (field start, newline, gap).
+        self.tokens = array("I")
+        self.breaks = array("B")
+        # (field name, page, first position, end position), in stream order.
+        self.fields: List[Tuple[str, Optional[int], int, int]] = []
+        self._field_span: Dict[str, Tuple[int, int]] = {}
+        # Normaliser.key() of the options the texts went through (None: raw text).
+        self.normalisation: Optional[list] = None
+        # Postings: positions of token id t are order[offsets[t]:offsets[t + 1]],
+        # ascending. Built on demand after adding fields, stored by to_dict.
+        self._order: Optional[array] = None
+        self._offsets: Optional[array] = None
+        self._queries: Dict[str, Optional[Tuple[int, ...]]] = {}
+
+    # --- building ----------------------------------------------------------------
+
+    def add_field(self, name: str, text: str, page: Optional[int] = None) -> None:
+        start = len(self.tokens)
+        prev_end = None
+        for m in _TOKEN_RE.finditer(text or ""):
+            tok = sys.intern(m.group())
+            tid = self.ids.get(tok)
+            if tid is None:
+                tid = self.ids[tok] = len(self.vocab)
+                self.vocab.append(tok)
+            self.tokens.append(tid)
+            self.breaks.append(0 if prev_end is not None and m.start() - prev_end == 1
+                               and text[prev_end] == " " else 1)
+            prev_end = m.end()
+        self.fields.append((name, page, start, len(self.tokens)))
+        self._field_span[name] = (start, len(self.tokens))
+        self._order = self._offsets = None
+        self._queries.clear()
+
+    @classmethod
+    def build(cls, full_text: str, boxes: Dict[str, dict], normaliser: Optional[Normaliser] = None) -> "TokenIndex":
+        # normaliser: the plan's; each text is indexed as the checks will see it.
+        index = cls()
+        active = normaliser is not None and normaliser.active
+        if active:
+            index.normalisation = normaliser.key()
+
+        def norm(text: str) -> str:
+            return normaliser.apply(text).text if active else text
+
+        index.add_field(FULL, norm(full_text or ""))
+        for name, box in boxes.items():
+            index.add_field(name, norm(box.get("raw_text") or ""), box.get("page"))
+        return index
+
+    def _postings(self) -> Tuple[array, array]:
+        if self._order is None:
+            offsets = array("I", bytes(4 * (len(self.vocab) + 1)))
+            for tid in self.tokens:
+                offsets[tid + 1] += 1
+            for t in range(len(self.vocab)):
+                offsets[t + 1] += offsets[t]
+            fill = offsets[:-1]
+            order = array("I", bytes(4 * len(self.tokens)))
+            for pos, tid in enumerate(self.tokens):
+                order[fill[tid]] = pos
+                fill[tid] += 1
+            self._order, self._offsets = order, offsets
+        return self._order, self._offsets
+
+    # --- storage -----------------------------------------------------------------
+
+    def to_dict(self) -> dict:
+        # Compact JSON form: vocabulary once, arrays as little-endian base64.
+        order, offsets = self._postings()
+        return {
+            "version": INDEX_VERSION,
+            "vocab": self.vocab,
+            "tokens": _encode(self.tokens),
+            "breaks": _encode(self.breaks),
+            "postings": _encode(order),
+            "offsets": _encode(offsets),
+            "fields": [list(f) for f in self.fields],
+            "normalisation": self.normalisation,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TokenIndex":
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported token index version: {data.get('version')}")
+        index = cls()
+        index.normalisation = data.get("normalisation")
+        index.vocab = [sys.intern(t) for t in data["vocab"]]
+        index.ids = {t: i for i, t in enumerate(index.vocab)}
+        index.tokens = _decode("I", data["tokens"])
+        index.breaks = _decode("B", data["breaks"])
+        index._order = _decode("I", data["postings"])
+        index._offsets = _decode("I", data["offsets"])
+        if len(index._order) != len(index.tokens) or len(index._offsets) != len(index.vocab) + 1:
+            raise ValueError("Token index arrays do not match its vocabulary")
+        for name, page, start, end in data["fields"]:
+            index.fields.append((name, page, start, end))
+            index._field_span[name] = (start, end)
+        return index
+
+    @classmethod
+    def from_extraction(cls, extraction: dict, normaliser: Optional[Normaliser] = None) -> Optional["TokenIndex"]:
+        # The index stored in an extraction dict, or None when it has none, one
+        # this version cannot read, or one normalised other than normaliser
+        # would; checks then just scan the text.
+        data = extraction.get("token_index")
+        if not data:
+            return None
+        wanted = normaliser.key() if normaliser is not None else None
+        if data.get("normalisation") != wanted:
+            return None
+        try:
+            return cls.from_dict(data)
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    # --- lookups -----------------------------------------------------------------
+
+    def _query(self, value: str) -> Optional[Tuple[int, ...]]:
+        # Token ids of value, or None when it is not a single-space separated
+        # run of known tokens; memoised, as a value is usually looked up in
+        # several fields.
+        try:
+            return self._queries[value]
+        except KeyError:
+            pass
+        ids: Optional[Tuple[int, ...]] = None
+        if isinstance(value, str) and value and " ".join(value.split()) == value:
+            found = [self.ids.get(tok) for tok in value.split(" ")]
+            if None not in found:
+                ids = tuple(found)
+        self._queries[value] = ids
+        return ids
+
+    def _phrase_at(self, pos: int, ids: Tuple[int, ...]) -> bool:
+        # ids[0] is known to be at pos; a phrase never spans two fields, as
+        # every field starts with a break.
+        tokens, breaks = self.tokens, self.breaks
+        if pos + len(ids) > len(tokens):
+            return False
+        for j in range(1, len(ids)):
+            if tokens[pos + j] != ids[j] or breaks[pos + j]:
+                return False
+        return True
+
+    def contains(self, value: str, field: str = FULL) -> bool:
+        # True means value is in the field's text; False only means the index
+        # cannot tell (the caller falls back to a substring search).
+        span = self._field_span.get(field)
+        ids = self._query(value)
+        if span is None or ids is None:
+            return False
+        order, offsets = self._postings()
+        start, end = span
+        hi = offsets[ids[0] + 1]
+        i = bisect_left(order, start, offsets[ids[0]], hi)
+        if len(ids) == 1:
+            return i < hi and order[i] < end
+        while i < hi and order[i] < end:
+            if self._phrase_at(order[i], ids):
+                return True
+            i += 1
+        return False
@@ -0,0 +1,197 @@
+# validation_spec.py
+# Declarative validation specs and the plans compiled from them.
+# A spec (JSON, or YAML when PyYAML is installed) holds expected values, box
+# mappings, aliases, section rules and normalisation options. It is compiled once
+# into a ValidationPlan and reused for every document; per-document values come
+# from a manifest (CSV, or Parquet when pyarrow is installed) streamed row by row.
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import csv
+import json
+
+from multi_match import MultiPatternMatcher, StreamScanner
+from normalise import Normaliser
+from validations import box_checks, exists_checks, full_doc_checks, index_for
+
+SPEC_KEYS = ("doc_type", "expected_values", "box_mapping", "aliases", "sections", "normalisation")
+
+# Manifest columns that describe the document rather than an expected value.
+MANIFEST_PDF_COLUMN = "pdf"
+MANIFEST_RESERVED = {MANIFEST_PDF_COLUMN, "doc_type"}
+
+
+class SpecError(ValueError):
+    pass
+
+
+def load_spec(path: str | Path) -> dict:
+    # Read a spec file; .yaml/.yml needs PyYAML, anything else is parsed as JSON.
+    p = Path(path)
+    with p.open("r", encoding="utf-8") as f:
+        if p.suffix.lower() in (".yaml", ".yml"):
+            try:
+                import yaml  # type: ignore
+            except ImportError:
+                raise SpecError(f"PyYAML is required to read {p}") from None
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise SpecError(f"Spec {p} must be a mapping")
+    return spec
+
+
+class ValidationPlan:
+    # Compiled form of a spec: labels are alias-resolved and the matcher for the
+    # spec's own values is built once. Per-document overrides only rebuild the
+    # matcher when the resulting value set has not been seen recently.
+
+    def __init__(self, spec: dict):
+        unknown = set(spec) - set(SPEC_KEYS)
+        if unknown:
+            raise SpecError(f"Unknown spec keys: {', '.join(sorted(unknown))}")
+
+        self.doc_type: Optional[str] = spec.get("doc_type")
+        self.expected_values: Dict[str, str] = dict(spec.get("expected_values") or {})
+        self.aliases: Dict[str, str] = dict(spec.get("aliases") or {})
+        self.sections: List[dict] = list(spec.get("sections") or [])
+        self.normalisation: dict = dict(spec.get("normalisation") or {})
+        try:
+            self.normaliser = Normaliser.from_options(self.normalisation)
+        except (TypeError, ValueError) as e:
+            raise SpecError(f"Invalid normalisation: {e}") from None
+
+        self.box_mapping: Dict[str, List[str]] = {}
+        for box_name, labels in (spec.get("box_mapping") or {}).items():
+            if labels is None:
+                labels = []
+            elif isinstance(labels, str):
+                labels = [labels]
+            self.box_mapping[box_name] = list(labels)
+
+        self._matchers = lru_cache(maxsize=256)(self._build_matcher)
+        self.matcher = self.matcher_for(self.expected_values)
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "ValidationPlan":
+        return cls(load_spec(path))
+
+    @staticmethod
+    def _build_matcher(items: tuple) -> MultiPatternMatcher:
+        return MultiPatternMatcher(dict(items))
+
+    def matcher_for(self, expected_values: Dict[str, str]) -> MultiPatternMatcher:
+        return self._matchers(tuple(expected_values.items()))
+
+    def expected_for(self, overrides: Optional[dict] = None) -> Dict[str, str]:
+        # Spec values, with non-empty manifest cells on top. A column overrides
+        # the spec label it names (directly or via aliases); other columns (ids,
+        # notes, ...) describe the row and are not expected values.
+        if not overrides:
+            return self.expected_values
+        merged = dict(self.expected_values)
+        for label, value in overrides.items():
+            if label in MANIFEST_RESERVED or value is None or value == "":
+                continue
+            canon = self.aliases.get(label, label)
+            if canon in self.expected_values:
+                merged[canon] = str(value)
+        return merged
+
+    def expectations(self, overrides: Optional[dict] = None) -> tuple:
+        # (expected_values, box_mapping, aliases), the shape main.py's checks take.
+        return self.expected_for(overrides), self.box_mapping, self.aliases
+
+    def prepare(self, extraction: dict, expected: Dict[str, str]) -> tuple:
+        # (expected values, full text, boxes, token index) as the checks see them.
+        # With normalisation configured, values and texts go through the spec's
+        # normaliser; the extraction's index is used where that is faster and it
+        # was built with the same normalisation. Each distinct text of this
+        # extraction is normalised once; nothing is kept after the call.
+        full_text = extraction.get("full_text") or ""
+        boxes = extraction.get("boxes") or {}
+        if not self.normaliser.active:
+            return expected, full_text, boxes, index_for(extraction, expected)
+        memo: Dict[str, str] = {}
+
+        def normalised(text: str) -> str:
+            if text not in memo:
+                memo[text] = self.normaliser.apply(text).text
+            return memo[text]
+
+        boxes = {name: dict(box, raw_text=normalised(box.get("raw_text") or "")) if isinstance(box, dict) else box
+                 for name, box in boxes.items()}
+        expected = self.normaliser.values(expected)
+        return expected, normalised(full_text), boxes, index_for(extraction, expected, self.normaliser)
+
+    def run(self, extraction: dict, overrides: Optional[dict] = None) -> List[dict]:
+        # Full-doc and box checks for one extraction dict; messages quote the
+        # values as written, not as normalised.
+        shown = self.expected_for(overrides)
+        expected, full_text, boxes, index = self.prepare(extraction, shown)
+        checks = full_doc_checks(expected, full_text, matcher=self.matcher_for(expected), index=index, shown=shown)
+        checks.extend(box_checks(expected, boxes, self.box_mapping, self.aliases, index=index, shown=shown))
+        return checks
+
+    def stream(self, records: Iterable[dict], overrides: Optional[dict] = None) -> Iterator[dict]:
+        # The checks run() makes, for extract_boxes_to_json.iter_records records
+        # consumed one at a time, each yielded as soon as it is decided: a value's
+        # exists check when it is first found, a box's checks when its record
+        # arrives, and the rest (values never found, boxes never seen) at the end
+        # of the stream. Records go through prepare() like a whole extraction;
+        # pages are normalised one at a time, so whitespace around a page break
+        # may normalise differently.
+        shown = self.expected_for(overrides)
+        expected = self.prepare({}, shown)[0]
+        scanner = StreamScanner(self.matcher_for(expected))
+        sep = self.prepare({"full_text": "\n"}, {})[1]
+        pending = dict(expected)
+        seen = set()
+        first_page = True
+        for record in records:
+            kind = record.get("type")
+            if kind == "page":
+                if not first_page:
+                    scanner.feed(sep)
+                scanner.feed(self.prepare({"full_text": record.get("text") or ""}, {})[1])
+                first_page = False
+                found = {label: pending.pop(label) for label in list(pending)
+                         if label in scanner.found and pending[label]}
+                yield from exists_checks(found, scanner.found, shown)
+            elif kind == "box" and record.get("name") in self.box_mapping:
+                name = record["name"]
+                seen.add(name)
+                boxes = self.prepare({"boxes": {name: record}}, {})[2]
+                yield from box_checks(expected, boxes, {name: self.box_mapping[name]}, self.aliases, shown=shown)
+
+        yield from exists_checks(pending, scanner.found, shown)
+        unseen = {name: labels for name, labels in self.box_mapping.items() if name not in seen}
+        yield from box_checks(expected, {}, unseen, self.aliases, shown=shown)
+
+
+@lru_cache(maxsize=32)
+def load_plan(path: str) -> ValidationPlan:
+    # One compiled plan per spec path per process (worker processes reuse it).
+    return ValidationPlan.from_file(path)
+
+
+def iter_manifest(path: str | Path) -> Iterator[dict]:
+    # Stream manifest rows as dicts: CSV with csv.DictReader, Parquet in record
+    # batches via pyarrow. Each row needs a "pdf" column.
+    p = Path(path)
+    if p.suffix.lower() == ".parquet":
+        try:
+            import pyarrow.parquet as pq  # type: ignore
+        except ImportError:
+            raise SpecError(f"pyarrow is required to read {p}") from None
+        for batch in pq.ParquetFile(p).iter_batches():
+            yield from batch.to_pylist()
+        return
+
+    with p.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or MANIFEST_PDF_COLUMN not in reader.fieldnames:
+            raise SpecError(f"Manifest {p} needs a '{MANIFEST_PDF_COLUMN}' column")
+        yield from reader
@@ -1,24 +1,89 @@
 
 # validations.py
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from multi_match import TRIE_THRESHOLD, MultiPatternMatcher
+from normalise import Normaliser
+from token_index import TokenIndex
+
+# When the token index pays for itself (benchmarks/bench_token_index.py): with
+# fewer values than the matcher's trie threshold, per-value substring search
+# beats decoding the index. Most in-box lookups miss (a value belongs to one
+# box) and then fall back to the substring search anyway, so only box texts of
+# page size and more gain from the index.
+INDEXED_MIN_VALUES = TRIE_THRESHOLD
+INDEXED_BOX_CHARS = 131072
+
+
+def wants_index(expected_values: Dict[str, str]) -> bool:
+    # Whether checks for these values read a token index; extractions only
+    # store one then (it adds several times the text's size).
+    return len(expected_values) >= INDEXED_MIN_VALUES
+
+
+def index_for(
+    extraction: dict,
+    expected_values: Dict[str, str],
+    normaliser: Optional[Normaliser] = None
+) -> Optional[TokenIndex]:
+    # The extraction's token index if the checks for these values would use it
+    # and it was built with the same normalisation.
+    if not wants_index(expected_values):
+        return None
+    return TokenIndex.from_extraction(extraction, normaliser)
 
 
 def _norm_label(label: str, aliases: Dict[str, str]) -> str:
     return aliases.get(label, label)
 
 
-def full_doc_checks(expected_values: Dict[str, str], full_text: str) -> List[dict]:
-    checks: List[dict] = []
+def full_doc_checks(
+    expected_values: Dict[str, str],
+    full_text: str,
+    matcher: Optional[MultiPatternMatcher] = None,
+    index: Optional[TokenIndex] = None,
+    shown: Optional[Dict[str, str]] = None
+) -> List[dict]:
+    # matcher may be prebuilt from expected_values and reused across documents.
+    # index: the extraction's token index; values it finds skip the text scan and
+    # only the rest are searched for (same results either way).
+    # shown: values to quote in messages, when expected_values are normalised.
     corpus = full_text or ""
+    if index is None or len(expected_values) < INDEXED_MIN_VALUES:
+        found = (matcher or MultiPatternMatcher(expected_values)).found(corpus)
+        return exists_checks(expected_values, found, shown)
+
+    found = {}
+    misses = {}
+    for label, value in expected_values.items():
+        if isinstance(value, str) and index.contains(value):
+            found[label] = 1
+        else:
+            misses[label] = value
+    if misses:
+        if matcher is None or len(misses) < TRIE_THRESHOLD:
+            # Few misses: a matcher for just those (find engine) is cheapest.
+            matcher = MultiPatternMatcher(misses)
+        found.update((label, n) for label, n in matcher.found(corpus).items() if label in misses)
+    return exists_checks(expected_values, found, shown)
+
+
+def exists_checks(
+    expected_values: Dict[str, str],
+    found: Dict[str, int],
+    shown: Optional[Dict[str, str]] = None
+) -> List[dict]:
+    checks: List[dict] = []
+    shown = shown or expected_values
     for label, value in expected_values.items():
         name = f"{label}__exists"
-        if value and (value in corpus):
+        if value and (label in found):
             checks.append({"name": name, "pass": True})
         else:
             checks.append({
                 "name": name,
                 "pass": False,
-                "message": f"Expected '{value}' not found in full first-half text"
+                "message": f"Expected '{shown.get(label, value)}' not found in full first-half text"
             })
     return checks
 
@@ -27,10 +92,16 @@ def box_checks(
     expected_values: Dict[str, str],
     boxes: Dict[str, Dict],
     box_mapping: Dict[str, List[str]],
-    aliases: Dict[str, str] | None = None
+    aliases: Dict[str, str] | None = None,
+    index: Optional[TokenIndex] = None,
+    shown: Optional[Dict[str, str]] = None
 ) -> List[dict]:
+    # index: the token index of the extraction the boxes came from; for long box
+    # texts a hit there saves the substring search.
+    # shown: values to quote in messages, when expected_values are normalised.
     checks: List[dict] = []
     aliases = aliases or {}
+    shown = shown or {}
 
     # Basic type guards to prevent NoneType failures
     if not isinstance(expected_values, dict):
@@ -45,6 +116,7 @@ def box_checks(
 
     for box_name, labels in box_mapping.items():
         box_text = (boxes.get(box_name, {}) or {}).get("raw_text", "") or ""
+        box_index = index if len(box_text) >= INDEXED_BOX_CHARS else None
 
         # Confirm presence of the box in extraction
         if box_name not in boxes:
@@ -74,13 +146,13 @@ def box_checks(
 
             exp_val = expected_values[canon]
             name = f"{canon}__in_{box_name}"
-            if exp_val and (exp_val in box_text):
+            if exp_val and ((box_index is not None and box_index.contains(exp_val, box_name)) or exp_val in box_text):
                 checks.append({"name": name, "pass": True})
             else:
                 checks.append({
                     "name": name,
                     "pass": False,
-                    "message": f"Expected '{exp_val}' not found in {box_name}"
+                    "message": f"Expected '{shown.get(canon, exp_val)}' not found in {box_name}"
                                })
     return checks
 